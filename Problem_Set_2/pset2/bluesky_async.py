@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Asyncio client for the Bluesky public API.
+
+AsyncBlueskyClient mirrors the wrapper functions in bluesky_helpers.py
+(make_request, get_profile, get_follows, get_all_follows, get_author_feed,
+get_post_thread) but lets many requests be in flight at once. Each request
+is still executed by bluesky_helpers.make_request, so responses (and the
+None-on-error behaviour) are identical to the sync helpers.
+
+Usage:
+    async with AsyncBlueskyClient(max_in_flight=8) as client:
+        feeds = await asyncio.gather(
+            *(client.get_author_feed(h) for h in handles))
+
+Concurrency vs. rate limiting:
+    max_in_flight bounds how many requests are open at the same time, which
+    hides network latency. The overall request rate is enforced separately by
+    the shared RATE_LIMITER that make_request consults (bluesky_ratelimit.py),
+    so the client runs at the API limit no matter how many are in flight.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import bluesky_helpers
+from bluesky_helpers import (DEFAULT_TIMEOUT, POSTS_BATCH_SIZE, PaginationError,
+                             parse_datetime, split_feed_window)
+from bluesky_records import FollowEdge
+
+# Default number of requests allowed in flight at once
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+class AsyncBlueskyClient:
+    """
+    Bounded-concurrency async wrapper around the Bluesky helper functions.
+
+    Args:
+        max_in_flight: Maximum number of requests open at the same time
+        timeout: Per-request timeout in seconds
+
+    All get_* methods are coroutines returning exactly what the matching
+    function in bluesky_helpers returns.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 timeout=DEFAULT_TIMEOUT):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Shut down the worker threads used to run requests."""
+        self._executor.shutdown(wait=True)
+
+    async def make_request(self, endpoint, params=None):
+        """
+        Make a GET request to the Bluesky API without blocking the event loop.
+
+        Args:
+            endpoint: API endpoint (e.g., 'app.bsky.actor.getProfile')
+            params: Dictionary of query parameters
+
+        Returns:
+            Parsed JSON response as a dictionary, or None on error
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, bluesky_helpers.make_request,
+                endpoint, params, self.timeout)
+
+    # ------------------------------------------------------------------
+    # Endpoint wrappers (same signatures as bluesky_helpers)
+    # ------------------------------------------------------------------
+
+    async def get_profile(self, handle):
+        """Async version of bluesky_helpers.get_profile()."""
+        return await self.make_request('app.bsky.actor.getProfile',
+                                       {'actor': handle})
+
+    async def get_posts(self, uris):
+        """Async version of bluesky_helpers.get_posts()."""
+        if len(uris) > POSTS_BATCH_SIZE:
+            raise ValueError(f"getPosts accepts at most {POSTS_BATCH_SIZE} uris")
+        return await self.make_request('app.bsky.feed.getPosts', {'uris': list(uris)})
+
+    async def get_follows(self, handle, limit=100, cursor=None):
+        """Async version of bluesky_helpers.get_follows()."""
+        params = {'actor': handle, 'limit': min(limit, 100)}
+        if cursor:
+            params['cursor'] = cursor
+        return await self.make_request('app.bsky.graph.getFollows', params)
+
+    async def get_all_follows(self, handle, as_records=False):
+        """
+        Async version of bluesky_helpers.get_all_follows().
+
+        Pages are fetched one after another (each needs the previous cursor),
+        but many handles can be paginated concurrently with asyncio.gather().
+        """
+        if as_records:
+            return [FollowEdge.from_api(follow, follower=handle)
+                    async for follow in self.iter_follows(handle)]
+        return [follow async for follow in self.iter_follows(handle)]
+
+    async def get_author_feed(self, handle, limit=50, cursor=None):
+        """Async version of bluesky_helpers.get_author_feed()."""
+        params = {'actor': handle, 'limit': min(limit, 100)}
+        if cursor:
+            params['cursor'] = cursor
+        return await self.make_request('app.bsky.feed.getAuthorFeed', params)
+
+    async def get_post_thread(self, uri, depth=50):
+        """Async version of bluesky_helpers.get_post_thread()."""
+        params = {'uri': uri, 'depth': depth}
+        return await self.make_request('app.bsky.feed.getPostThread', params)
+
+    # ------------------------------------------------------------------
+    # Pagination (async generators, see the sync versions in bluesky_helpers)
+    # ------------------------------------------------------------------
+
+    async def iter_pages(self, endpoint, params, items_key, cursor=None,
+                         keep_going=None, prefetch=True):
+        """
+        Async version of bluesky_helpers.iter_pages().
+
+        Yields (items, next_cursor) per page; with prefetch the next page is
+        already being requested while the caller processes the current one.
+        Raises PaginationError if a page request fails.
+        """
+        def fetch(page_cursor):
+            page_params = dict(params)
+            if page_cursor:
+                page_params['cursor'] = page_cursor
+            return self.make_request(endpoint, page_params)
+
+        page_cursor = cursor
+        page = await fetch(page_cursor)
+        while True:
+            if page is None:
+                raise PaginationError(endpoint, page_cursor)
+            items = page.get(items_key, [])
+            next_cursor = page.get('cursor')
+            more = bool(next_cursor) and (keep_going is None or keep_going(items))
+
+            task = asyncio.ensure_future(fetch(next_cursor)) if more and prefetch else None
+            try:
+                yield items, next_cursor
+            except GeneratorExit:
+                if task is not None:
+                    task.cancel()
+                raise
+            if not more:
+                return
+            page_cursor = next_cursor
+            page = await task if task else await fetch(next_cursor)
+
+    async def iter_follows(self, handle, cursor=None):
+        """Async version of bluesky_helpers.iter_follows()."""
+        async for follows, _ in self.iter_pages(
+                'app.bsky.graph.getFollows', {'actor': handle, 'limit': 100},
+                'follows', cursor):
+            for follow in follows:
+                yield follow
+
+    async def iter_followers(self, handle, cursor=None):
+        """Async version of bluesky_helpers.iter_followers()."""
+        async for followers, _ in self.iter_pages(
+                'app.bsky.graph.getFollowers', {'actor': handle, 'limit': 100},
+                'followers', cursor):
+            for follower in followers:
+                yield follower
+
+    async def iter_author_feed_pages(self, handle, since=None, cursor=None, limit=100):
+        """Async version of bluesky_helpers.iter_author_feed_pages()."""
+        if isinstance(since, str):
+            since = parse_datetime(since)
+
+        def keep_going(items):
+            return not split_feed_window(items, since)[1]
+
+        params = {'actor': handle, 'limit': min(limit, 100)}
+        async for items, next_cursor in self.iter_pages(
+                'app.bsky.feed.getAuthorFeed', params, 'feed', cursor,
+                keep_going=keep_going):
+            kept, _ = split_feed_window(items, since)
+            yield kept, next_cursor
+
+    async def iter_author_feed(self, handle, since=None, cursor=None, limit=100):
+        """Async version of bluesky_helpers.iter_author_feed()."""
+        async for items, _ in self.iter_author_feed_pages(handle, since, cursor, limit):
+            for item in items:
+                yield item
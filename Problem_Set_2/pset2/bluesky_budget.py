@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Crawl budget planning: how many requests and how long, before a run starts.
+
+The collectors' cost is driven by numbers the API tells us up front:
+
+    getFollows      ceil(followsCount / 100) pages per senator
+    getAuthorFeed   ceil(posts in the window / 100) pages per author, where
+                    posts per day ~ postsCount / account age in days
+    getPostThread   one per senator post in the window that has replies
+    getProfiles     one per 25 repliers when replies are enriched
+
+CrawlEstimator turns profile counts (one getProfiles call per 25 accounts)
+into request counts per work unit, and turns requests into wall time using
+latencies from earlier runs' telemetry dumps (feeds_telemetry.jsonl, ...),
+the collectors' concurrency and the API's ~3,000 requests / 5 minutes:
+
+    estimator = CrawlEstimator.from_accounts(plan.authors, telemetry_files=[...])
+    print(estimator.author_feeds(plan.authors).summary())
+
+Given a time budget, prioritize() orders the units (most-followed authors
+first, by default) and cuts the list where the budget runs out, and
+CrawlBudget lets a running collector stop cleanly at that point: it checks
+budget.exhausted() before starting a unit, so everything it finished is
+journaled and the next run picks up the rest.
+
+    python bluesky_budget.py --budget 45m             # estimates for every collector
+    python bluesky_budget.py --budget 45m --collector feeds --show 20
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+from bluesky_helpers import load_json, load_senators, parse_datetime, save_json
+from bluesky_ratelimit import DEFAULT_MAX_REQUESTS, DEFAULT_WINDOW
+
+PAGE_SIZE = 100
+PROFILES_PER_REQUEST = 25
+
+# Round-trip time assumed for endpoints without telemetry
+DEFAULT_LATENCY = 0.3
+
+# Used when a profile (or earlier data) can't tell us better
+DEFAULT_POSTS_PER_DAY = 2.0
+DEFAULT_REPLIES_PER_POST = 20.0
+
+# Share of a senator's posts that have at least one reply
+DEFAULT_REPLIED_FRACTION = 0.9
+
+# Cached getProfiles results used for the estimates
+DEFAULT_PROFILE_FILE = 'crawl_profiles.json'
+
+TELEMETRY_FILES = ('feeds_telemetry.jsonl',)
+
+
+# ============================================================================
+# Inputs: profiles and historical telemetry
+# ============================================================================
+
+def load_profiles(handles, path=DEFAULT_PROFILE_FILE):
+    """
+    Profile counts for handles (getProfiles, 25 per request), cached in path.
+
+    Returns:
+        Dict of handle -> {'followsCount', 'postsCount', 'createdAt', ...};
+        accounts that couldn't be found are missing
+    """
+    from bluesky_profiles import ProfileHydrator
+    cached = load_json(path) if path and os.path.exists(path) else {}
+    missing = [h for h in dict.fromkeys(handles) if h not in cached]
+    if missing:
+        for handle, profile in ProfileHydrator().hydrate(missing).items():
+            if profile is not None:
+                cached[handle] = {key: profile.get(key) for key in
+                                  ('followersCount', 'followsCount', 'postsCount',
+                                   'createdAt')}
+        if path:
+            save_json(cached, path)
+    return cached
+
+
+def load_latencies(paths=TELEMETRY_FILES):
+    """
+    Median latency per endpoint from telemetry dumps of earlier runs.
+
+    Reads the last snapshot of each TELEMETRY.start_dump() file; when
+    several files know an endpoint, the one with more calls wins.
+
+    Returns:
+        Dict of endpoint -> seconds
+    """
+    best = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        last = None
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    last = line
+        if last is None:
+            continue
+        try:
+            endpoints = json.loads(last).get('endpoints', {})
+        except json.JSONDecodeError:
+            continue
+        for endpoint, stats in endpoints.items():
+            if stats.get('latency_p50') and stats.get('calls', 0) > best.get(endpoint, (0, 0))[0]:
+                best[endpoint] = (stats['calls'], stats['latency_p50'])
+    return {endpoint: latency for endpoint, (_, latency) in best.items()}
+
+
+def replies_per_post(pattern_dir='.'):
+    """Average collected replies per post in existing replies_*.json files, or None."""
+    posts = replies = 0
+    for name in os.listdir(pattern_dir):
+        if name.startswith('replies_') and name.endswith('.json'):
+            try:
+                data = load_json(os.path.join(pattern_dir, name))
+            except (OSError, ValueError):
+                continue
+            if not isinstance(data, list):
+                continue
+            posts += len(data)
+            replies += sum(len(post.get('replies', [])) for post in data)
+    return replies / posts if posts else None
+
+
+# ============================================================================
+# Estimates
+# ============================================================================
+
+class Estimate:
+    """
+    Cost of one collector run.
+
+    Attributes:
+        name: Collector
+        units: List of (unit, {endpoint: requests}) in crawl order
+        requests: Total requests per endpoint
+        seconds: Estimated wall time
+    """
+
+    def __init__(self, name, units, seconds_per_request):
+        self.name = name
+        self.units = units
+        self._seconds_per_request = seconds_per_request
+        self.requests = {}
+        for _, cost in units:
+            for endpoint, n in cost.items():
+                self.requests[endpoint] = self.requests.get(endpoint, 0) + n
+        self.seconds = sum(self.unit_seconds(cost) for _, cost in units)
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    def unit_seconds(self, cost):
+        return sum(n * self._seconds_per_request(endpoint) for endpoint, n in cost.items())
+
+    def summary(self):
+        parts = ', '.join(f"{endpoint.rsplit('.', 1)[-1]} {n}"
+                          for endpoint, n in sorted(self.requests.items()))
+        return (f"{self.name}: {len(self.units)} units, {self.total_requests} requests "
+                f"({parts}), ~{format_duration(self.seconds)}")
+
+
+class CrawlEstimator:
+    """
+    Request and time estimates from profile counts and past latencies.
+
+    Args:
+        profiles: Dict of handle -> profile counts (load_profiles())
+        latencies: Dict of endpoint -> median seconds (load_latencies())
+        max_in_flight: Concurrent requests of the collector
+        rate: Requests per second allowed by the API
+        now: Reference time for account ages (default: now)
+    """
+
+    def __init__(self, profiles, latencies=None, max_in_flight=8,
+                 rate=DEFAULT_MAX_REQUESTS / DEFAULT_WINDOW, now=None):
+        self.profiles = profiles
+        self.latencies = latencies or {}
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.now = now or datetime.now(timezone.utc)
+
+    @classmethod
+    def from_accounts(cls, handles, telemetry_files=TELEMETRY_FILES,
+                      profile_file=DEFAULT_PROFILE_FILE, **kwargs):
+        return cls(load_profiles(handles, profile_file), load_latencies(telemetry_files),
+                   **kwargs)
+
+    def seconds_per_request(self, endpoint, max_in_flight=None):
+        """Wall time one request adds: latency shared by the in-flight slots, or the rate limit."""
+        latency = self.latencies.get(endpoint, DEFAULT_LATENCY)
+        in_flight = max_in_flight or self.max_in_flight
+        return max(latency / in_flight, 1.0 / self.rate)
+
+    def posts_per_day(self, handle):
+        profile = self.profiles.get(handle) or {}
+        posts = profile.get('postsCount')
+        if posts is None:
+            return DEFAULT_POSTS_PER_DAY
+        try:
+            age_days = (self.now - parse_datetime(profile['createdAt'])).total_seconds() / 86400
+        except (KeyError, TypeError, ValueError):
+            return DEFAULT_POSTS_PER_DAY
+        return posts / max(age_days, 1.0)
+
+    def _pages(self, n):
+        return max(1, math.ceil(n / PAGE_SIZE))
+
+    def _estimate(self, name, units, max_in_flight=None):
+        return Estimate(name, units,
+                        lambda endpoint: self.seconds_per_request(endpoint, max_in_flight))
+
+    def follows(self, senators):
+        """Phase 1 of collect_feeds: every senator's follow list."""
+        units = []
+        for senator in senators:
+            count = (self.profiles.get(senator) or {}).get('followsCount') or 0
+            units.append((senator, {'app.bsky.graph.getFollows': self._pages(count)}))
+        return self._estimate('follows', units)
+
+    def author_feeds(self, authors, hours=24, name='author feeds', max_in_flight=None):
+        """Phase 2 of collect_feeds (and collect_senator_feed_uris): each author's window."""
+        units = [(author, {'app.bsky.feed.getAuthorFeed':
+                           self._pages(self.posts_per_day(author) * hours / 24)})
+                 for author in authors]
+        return self._estimate(name, units, max_in_flight)
+
+    def replies(self, senators, days=7, replies_per_post=None, enrich=True):
+        """bluesky_part2.1.py: posts, one thread per replied post, replier profiles."""
+        if replies_per_post is None:
+            replies_per_post = DEFAULT_REPLIES_PER_POST
+        units = []
+        for senator in senators:
+            posts = self.posts_per_day(senator) * days
+            cost = {'app.bsky.feed.getAuthorFeed': self._pages(posts),
+                    'app.bsky.feed.getPostThread': math.ceil(posts * DEFAULT_REPLIED_FRACTION)}
+            if enrich:
+                cost['app.bsky.actor.getProfiles'] = math.ceil(
+                    posts * replies_per_post / PROFILES_PER_REQUEST)
+            units.append((senator, cost))
+        return self._estimate('replies', units)
+
+
+# ============================================================================
+# Budgets
+# ============================================================================
+
+def prioritize(estimate, budget_seconds, key=None):
+    """
+    Order an estimate's units and cut the list where the time budget runs out.
+
+    Args:
+        estimate: Estimate
+        budget_seconds: Time available
+        key: Optional sort key for (unit, cost) pairs; by default the units
+            keep the estimate's order (CrawlPlan.authors is already
+            most-followed first)
+
+    Returns:
+        (selected, deferred): lists of units that fit in the budget and
+        units left for a later run
+    """
+    units = sorted(estimate.units, key=key) if key else list(estimate.units)
+    selected, deferred = [], []
+    spent = 0.0
+    for unit, cost in units:
+        seconds = estimate.unit_seconds(cost)
+        if not deferred and spent + seconds <= budget_seconds:
+            selected.append(unit)
+            spent += seconds
+        else:
+            deferred.append(unit)
+    return selected, deferred
+
+
+class CrawlBudget:
+    """
+    Time and/or request allowance for a running collector.
+
+    Check exhausted() before starting each unit of work; units that were
+    never started are simply left for the next (resumed) run.
+
+    Args:
+        seconds: Wall-time allowance (None = unlimited)
+        requests: Request allowance, counted with TELEMETRY (None = unlimited)
+        telemetry: Telemetry to count requests with (default: bluesky_helpers.TELEMETRY)
+    """
+
+    def __init__(self, seconds=None, requests=None, telemetry=None):
+        if telemetry is None:
+            from bluesky_helpers import TELEMETRY as telemetry
+        self.seconds = seconds
+        self.requests = requests
+        self.telemetry = telemetry
+        self.started = time.monotonic()
+        self._calls_at_start = telemetry.total_calls()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def requests_used(self):
+        return self.telemetry.total_calls() - self._calls_at_start
+
+    def exhausted(self):
+        """True once either allowance is used up."""
+        return ((self.seconds is not None and self.elapsed() >= self.seconds) or
+                (self.requests is not None and self.requests_used() >= self.requests))
+
+    def remaining_seconds(self):
+        """Time left (None if there is no time limit), e.g. to hand to worker processes."""
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - self.elapsed())
+
+    def summary(self):
+        limits = []
+        if self.seconds is not None:
+            limits.append(f"{format_duration(self.elapsed())} of {format_duration(self.seconds)}")
+        if self.requests is not None:
+            limits.append(f"{self.requests_used()} of {self.requests} requests")
+        return f"Budget: {', '.join(limits) or 'unlimited'} used"
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def parse_duration(text):
+    """'90' / '90s' / '45m' / '2h' / '1h30m' -> seconds."""
+    text = text.strip().lower()
+    if text.replace('.', '', 1).isdigit():
+        return float(text)
+    total, number = 0.0, ''
+    for ch in text:
+        if ch.isdigit() or ch == '.':
+            number += ch
+        elif ch in 'hms' and number:
+            total += float(number) * {'h': 3600, 'm': 60, 's': 1}[ch]
+            number = ''
+        else:
+            raise ValueError(f"Can't parse duration {text!r}")
+    if number:
+        raise ValueError(f"Can't parse duration {text!r} (missing unit)")
+    return total
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate crawl cost and plan a time budget.")
+    parser.add_argument('--budget', type=parse_duration, help="Time budget, e.g. 45m or 2h")
+    parser.add_argument('--collector', choices=('feeds', 'feed_uris', 'replies', 'all'),
+                        default='all')
+    parser.add_argument('--senators', default='senators_bluesky.csv')
+    parser.add_argument('--follows-map', default='senator_follows_map.json')
+    parser.add_argument('--telemetry', nargs='*', default=list(TELEMETRY_FILES),
+                        help="Telemetry dumps of earlier runs")
+    parser.add_argument('--profiles', default=DEFAULT_PROFILE_FILE, help="Profile cache")
+    parser.add_argument('--max-in-flight', type=int, default=8)
+    parser.add_argument('--show', type=int, default=10, help="Deferred units to list")
+    args = parser.parse_args(argv)
+
+    from bluesky_crawl_plan import CrawlPlan
+    senators = [s['handle'] for s in load_senators(args.senators)]
+    plan = CrawlPlan(load_json(args.follows_map)) if os.path.exists(args.follows_map) else None
+    accounts = senators + (plan.authors if plan and args.collector != 'replies' else [])
+    estimator = CrawlEstimator.from_accounts(accounts, args.telemetry, args.profiles,
+                                             max_in_flight=args.max_in_flight)
+
+    estimates = []
+    if args.collector in ('feeds', 'all'):
+        estimates.append(estimator.follows(senators))
+        if plan:
+            estimates.append(estimator.author_feeds(plan.authors))
+    if args.collector in ('feed_uris', 'all') and plan:
+        # collect_senator_feed_uris fetches one author at a time
+        estimates.append(estimator.author_feeds(plan.authors, name='feed uris',
+                                                max_in_flight=1))
+    if args.collector in ('replies', 'all'):
+        estimates.append(estimator.replies(senators, replies_per_post=replies_per_post()))
+    if plan is None and args.collector != 'replies':
+        print(f"({args.follows_map} not found: author feeds can't be estimated until "
+              f"the follows are collected)")
+
+    for estimate in estimates:
+        print(estimate.summary())
+        if args.budget is not None:
+            selected, deferred = prioritize(estimate, args.budget)
+            print(f"  within {format_duration(args.budget)}: {len(selected)} of "
+                  f"{len(estimate.units)} units")
+            if deferred:
+                shown = ', '.join(str(u) for u in deferred[:args.show])
+                print(f"  deferred: {shown}{' ...' if len(deferred) > args.show else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Opt-in on-disk response cache for Bluesky API calls.
+
+ResponseCache stores successful make_request() responses in a SQLite file,
+keyed by endpoint plus normalized query parameters. Each endpoint has its
+own time-to-live: follow lists and profiles change slowly and are kept for
+a day, author feeds change constantly and are kept for a few minutes.
+
+Enable it from a collection script:
+
+    from bluesky_helpers import enable_cache
+    cache = enable_cache('bluesky_cache.sqlite')
+    ...collect as usual...
+    print(cache.stats())
+
+or for every script at once by setting BSKY_CACHE_FILE=bluesky_cache.sqlite.
+
+Inspect or clean the cache from the command line:
+
+    python bluesky_cache.py stats
+    python bluesky_cache.py list --endpoint app.bsky.graph.getFollows
+    python bluesky_cache.py purge --expired
+    python bluesky_cache.py purge --endpoint app.bsky.feed.getAuthorFeed
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_FILE = 'bluesky_cache.sqlite'
+
+# Time-to-live per endpoint, in seconds
+ENDPOINT_TTLS = {
+    'app.bsky.actor.getProfile': 24 * 3600,
+    'app.bsky.actor.getProfiles': 24 * 3600,
+    'app.bsky.graph.getFollows': 24 * 3600,
+    'app.bsky.graph.getFollowers': 24 * 3600,
+    'app.bsky.feed.getAuthorFeed': 10 * 60,
+    'app.bsky.feed.getPosts': 10 * 60,
+    'app.bsky.feed.getPostThread': 60 * 60,
+}
+
+# TTL for endpoints not listed above
+DEFAULT_TTL = 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    endpoint   TEXT NOT NULL,
+    params     TEXT NOT NULL,
+    body       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (endpoint, params)
+)
+"""
+
+
+def normalize_params(params):
+    """
+    Canonical string form of a params dict, used as part of the cache key.
+
+    Keys are sorted and values converted to strings, so {'limit': 100} and
+    {'limit': '100'} hit the same entry. None values are dropped and list
+    values (repeated parameters) are kept in order.
+    """
+    if not params:
+        return ''
+    items = sorted(
+        (str(k), [str(x) for x in v] if isinstance(v, (list, tuple)) else str(v))
+        for k, v in params.items() if v is not None)
+    return json.dumps(items, separators=(',', ':'))
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of API responses with per-endpoint TTLs.
+
+    Args:
+        path: SQLite file to use (created if missing)
+        ttls: Optional dict overriding ENDPOINT_TTLS entries
+        default_ttl: TTL for endpoints without an explicit entry
+
+    Attributes:
+        hits, misses, expired, writes: Counters for this process
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttls=None, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttls = dict(ENDPOINT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.writes = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def ttl_for(self, endpoint):
+        """Time-to-live in seconds for an endpoint."""
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, endpoint, params=None):
+        """
+        Look up a cached response.
+
+        Returns:
+            The cached response dict, or None on a miss or expired entry
+        """
+        key = normalize_params(params)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, fetched_at FROM responses WHERE endpoint = ? AND params = ?",
+                (endpoint, key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, fetched_at = row
+            if time.time() - fetched_at > self.ttl_for(endpoint):
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(body)
+
+    def set(self, endpoint, params, data):
+        """Store a successful response."""
+        key = normalize_params(params)
+        body = json.dumps(data, separators=(',', ':'))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (endpoint, key, body, time.time()))
+            self._db.commit()
+            self.writes += 1
+
+    def purge(self, endpoint=None, expired_only=False):
+        """
+        Delete cache entries.
+
+        Args:
+            endpoint: Only purge this endpoint (default: all endpoints)
+            expired_only: Only delete entries older than their TTL
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock:
+            endpoints = [endpoint] if endpoint else [
+                r[0] for r in self._db.execute("SELECT DISTINCT endpoint FROM responses")]
+            deleted = 0
+            for ep in endpoints:
+                if expired_only:
+                    cutoff = time.time() - self.ttl_for(ep)
+                    cur = self._db.execute(
+                        "DELETE FROM responses WHERE endpoint = ? AND fetched_at < ?",
+                        (ep, cutoff))
+                else:
+                    cur = self._db.execute(
+                        "DELETE FROM responses WHERE endpoint = ?", (ep,))
+                deleted += cur.rowcount
+            self._db.commit()
+        return deleted
+
+    def entries(self, endpoint=None, limit=50):
+        """
+        List cached entries (newest first).
+
+        Returns:
+            List of dicts with 'endpoint', 'params', 'age', 'expired', 'bytes'
+        """
+        query = "SELECT endpoint, params, fetched_at, length(body) FROM responses"
+        args = ()
+        if endpoint:
+            query += " WHERE endpoint = ?"
+            args = (endpoint,)
+        query += " ORDER BY fetched_at DESC LIMIT ?"
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(query, args + (limit,)).fetchall()
+        return [{
+            'endpoint': ep,
+            'params': params,
+            'age': now - fetched_at,
+            'expired': now - fetched_at > self.ttl_for(ep),
+            'bytes': size,
+        } for ep, params, fetched_at, size in rows]
+
+    def summary(self):
+        """Per-endpoint entry counts and sizes stored on disk."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT endpoint, fetched_at, length(body) FROM responses").fetchall()
+        summary = {}
+        for ep, fetched_at, size in rows:
+            s = summary.setdefault(ep, {'entries': 0, 'expired': 0, 'bytes': 0,
+                                        'ttl': self.ttl_for(ep)})
+            s['entries'] += 1
+            s['bytes'] += size
+            if now - fetched_at > s['ttl']:
+                s['expired'] += 1
+        return summary
+
+    def stats(self):
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'writes': self.writes,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or purge the Bluesky response cache.")
+    parser.add_argument('--file', default=DEFAULT_CACHE_FILE, help="SQLite cache file")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('stats', help="Entry counts and sizes per endpoint")
+
+    list_parser = sub.add_parser('list', help="Show the most recent entries")
+    list_parser.add_argument('--endpoint')
+    list_parser.add_argument('--limit', type=int, default=20)
+
+    purge_parser = sub.add_parser('purge', help="Delete entries")
+    purge_parser.add_argument('--endpoint')
+    purge_parser.add_argument('--expired', action='store_true',
+                              help="Only delete entries older than their TTL")
+
+    args = parser.parse_args(argv)
+    cache = ResponseCache(args.file)
+
+    if args.command == 'stats':
+        summary = cache.summary()
+        if not summary:
+            print("Cache is empty")
+        for ep, s in sorted(summary.items()):
+            print(f"{ep:32s} {s['entries']:7d} entries  {s['expired']:7d} expired  "
+                  f"{s['bytes'] / 1e6:8.2f} MB  ttl={s['ttl']}s")
+    elif args.command == 'list':
+        for e in cache.entries(args.endpoint, args.limit):
+            flag = ' (expired)' if e['expired'] else ''
+            print(f"{e['endpoint']} {e['params']} age={e['age']:.0f}s {e['bytes']}B{flag}")
+    elif args.command == 'purge':
+        deleted = cache.purge(args.endpoint, expired_only=args.expired)
+        print(f"Deleted {deleted} entries")
+
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
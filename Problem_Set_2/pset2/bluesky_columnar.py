@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+Columnar, partitioned on-disk store for collected posts and replies.
+
+The replies_<handle>.json files are pretty-printed nested JSON, and every
+analysis re-parses all of them in full. ColumnStore keeps the same data as
+two flat tables of NumPy columns:
+
+    posts    post_uri, post_text, post_createdAt, post_createdAt_us, replyCount,
+             replies_collected
+    replies  post_uri, replyCount (of the parent post), handle, displayName,
+             createdAt, createdAt_us, text, likeCount, followersCount,
+             followsCount, postsCount
+
+partitioned by senator and collection date:
+
+    reply_store/replies/senator=schumer.senate.gov/date=2026-10-17/part.npz
+                                                                  /_stats.json
+
+Each part.npz holds one array per column. Integer columns are int64
+(INT_NULL, the int64 minimum, marks a missing count); string columns are dictionary encoded as int32 codes
+(-1 for None) plus the UTF-8 dictionary, stored as one byte blob and its
+offsets. The *_us columns are the createdAt strings converted once, at
+write time, to int64 epoch microseconds (bluesky_timecol.py), so time
+windows and orderings are integer comparisons. Missing values (INT_NULL,
+TS_NULL) never match a filter. Loading only touches the columns that are
+asked for.
+
+    store = ColumnStore('reply_store')
+    cols = store.read('replies', columns=['displayName', 'createdAt'],
+                      filters=[('replyCount', 'between', (50, 200))])
+    cols['displayName']          # numpy object array
+
+Filters are (column, op, value) tuples, op one of ==, !=, <, <=, >, >=,
+between (inclusive) or in; time columns also accept datetimes or ISO
+strings as values, e.g. ('createdAt_us', '>=', '2026-10-10T00:00:00Z').
+They are pushed down as far as possible:
+'senator' and 'date' filters skip whole partitions, numeric filters skip
+partitions whose min/max (_stats.json) can't match, and string equality is
+evaluated on the dictionary codes without decoding the strings.
+
+Convert the existing JSON files once:
+
+    python bluesky_columnar.py convert            # replies_*.json -> reply_store/
+    python bluesky_columnar.py stats
+
+Dependencies: numpy
+"""
+
+import argparse
+import glob
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bluesky_timecol import TS_NULL, epoch_us_column, to_epoch_us
+
+DEFAULT_STORE = 'reply_store'
+
+# Missing integer values: outside any real count, so a filter can't match them
+# (partitions written before this used -1, which _int_column_of() maps back)
+INT_NULL = np.iinfo(np.int64).min
+
+# Column name -> 'int', 'str' or 'time', in storage order. A 'time' column
+# <name>_us is derived from the string column <name> when a partition is written
+TABLES = {
+    'posts': {
+        'post_uri': 'str',
+        'post_text': 'str',
+        'post_createdAt': 'str',
+        'post_createdAt_us': 'time',
+        'replyCount': 'int',
+        'replies_collected': 'int',
+    },
+    'replies': {
+        'post_uri': 'str',
+        'replyCount': 'int',
+        'handle': 'str',
+        'displayName': 'str',
+        'createdAt': 'str',
+        'createdAt_us': 'time',
+        'text': 'str',
+        'likeCount': 'int',
+        'followersCount': 'int',
+        'followsCount': 'int',
+        'postsCount': 'int',
+    },
+}
+
+# Virtual columns taken from the partition path
+PARTITION_COLUMNS = ('senator', 'date')
+
+OPS = ('==', '!=', '<', '<=', '>', '>=', 'between', 'in')
+
+
+# ============================================================================
+# Column encoding
+# ============================================================================
+
+def encode_strings(values):
+    """
+    Dictionary-encode a list of str/None.
+
+    Returns:
+        (codes, offsets, blob): int32 codes (-1 for None), int64 offsets into
+        the UTF-8 blob (len(dictionary) + 1 entries) and the blob as uint8
+    """
+    index = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+        else:
+            codes[i] = index.setdefault(value, len(index))
+    encoded = [s.encode('utf-8') for s in index]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return codes, offsets, blob
+
+
+def decode_dictionary(offsets, blob):
+    """The dictionary of a string column as a list of str."""
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def decode_strings(codes, dictionary):
+    """Object array of str/None from codes and a decoded dictionary."""
+    lookup = np.empty(len(dictionary) + 1, dtype=object)
+    lookup[:-1] = dictionary
+    lookup[-1] = None
+    # code -1 (None) indexes the last slot
+    return lookup[codes]
+
+
+def _int_column(values):
+    return np.array([INT_NULL if v is None else v for v in values], dtype=np.int64)
+
+
+def _int_column_of(npz, name):
+    """A stored int column, with -1 read as INT_NULL in partitions written before it."""
+    col = npz[name]
+    if '_int_null' not in npz.files:
+        col = np.where(col == -1, INT_NULL, col)
+    return col
+
+
+def _source_column(name):
+    # createdAt_us -> createdAt
+    return name[:-len('_us')]
+
+
+def _time_column(npz, name):
+    """A stored time column, or one derived on the fly for partitions written before it existed."""
+    if name in npz.files:
+        return npz[name]
+    source = _source_column(name)
+    dictionary = decode_dictionary(npz[f"{source}.offsets"], npz[f"{source}.blob"])
+    return epoch_us_column(decode_strings(npz[f"{source}.codes"], dictionary))
+
+
+def _time_filters(schema, filters):
+    # Time columns may be filtered with datetimes / ISO strings: compare as epoch µs
+    converted = []
+    for column, op, value in filters:
+        if schema.get(column) == 'time':
+            if op in ('between', 'in'):
+                value = type(value)(to_epoch_us(v) for v in value)
+            else:
+                value = to_epoch_us(value)
+        converted.append((column, op, value))
+    return converted
+
+
+# ============================================================================
+# Flattening the replies_<handle>.json structure
+# ============================================================================
+
+def flatten_replies(data):
+    """
+    Split a replies_<handle>.json list into post and reply columns.
+
+    Returns:
+        (posts, replies): dicts of column name -> list of values
+    """
+    posts = {name: [] for name, kind in TABLES['posts'].items() if kind != 'time'}
+    replies = {name: [] for name, kind in TABLES['replies'].items() if kind != 'time'}
+    for post in data:
+        for name in posts:
+            posts[name].append(post.get(name))
+        for reply in post.get('replies', []):
+            replies['post_uri'].append(post.get('post_uri'))
+            replies['replyCount'].append(post.get('replyCount'))
+            for name in replies:
+                if name not in ('post_uri', 'replyCount'):
+                    replies[name].append(reply.get(name))
+    return posts, replies
+
+
+def _today():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+# ============================================================================
+# Filters
+# ============================================================================
+
+def _check_filters(filters):
+    for column, op, value in filters:
+        if op not in OPS:
+            raise ValueError(f"Unknown filter op {op!r} (use one of {', '.join(OPS)})")
+        if op == 'between' and len(value) != 2:
+            raise ValueError("'between' needs a (low, high) pair")
+
+
+def _compare(values, op, value):
+    """Boolean mask for values <op> value (values may be an array or a scalar)."""
+    if op == '==':
+        return values == value
+    if op == '!=':
+        return values != value
+    if op == '<':
+        return values < value
+    if op == '<=':
+        return values <= value
+    if op == '>':
+        return values > value
+    if op == '>=':
+        return values >= value
+    if op == 'between':
+        low, high = value
+        return (values >= low) & (values <= high)
+    if op == 'in':
+        return np.isin(values, list(value))
+    raise ValueError(op)
+
+
+def _range_may_match(low, high, op, value):
+    """Whether any value in [low, high] can satisfy the filter."""
+    if op == '==':
+        return low <= value <= high
+    if op == '<':
+        return low < value
+    if op == '<=':
+        return low <= value
+    if op == '>':
+        return high > value
+    if op == '>=':
+        return high >= value
+    if op == 'between':
+        return high >= value[0] and low <= value[1]
+    if op == 'in':
+        return any(low <= v <= high for v in value)
+    return True  # '!=' can't prune on a range
+
+
+# ============================================================================
+# Store
+# ============================================================================
+
+class ColumnStore:
+    """
+    Partitioned columnar store of posts and replies.
+
+    Args:
+        root: Directory holding the 'posts' and 'replies' tables
+    """
+
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+
+    def _partition_dir(self, table, senator, date):
+        return os.path.join(self.root, table, f"senator={senator}", f"date={date}")
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write_table(self, table, senator, columns, date=None):
+        """
+        Write (or replace) one partition of a table.
+
+        Args:
+            table: 'posts' or 'replies'
+            senator: Senator handle
+            columns: Dict of column name -> list of values
+            date: Collection date 'YYYY-MM-DD' (default: today, UTC)
+
+        Returns:
+            Number of rows written
+        """
+        schema = TABLES[table]
+        date = date or _today()
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        arrays = {}
+        stats = {'rows': n_rows, 'columns': {}}
+        for name, kind in schema.items():
+            values = columns.get(name, [None] * n_rows)
+            if kind == 'time':
+                if name not in columns:
+                    values = epoch_us_column(columns.get(_source_column(name), values))
+                col = np.asarray(values, dtype=np.int64)
+                arrays[name] = col
+                present = col[col != TS_NULL]
+                if len(present):
+                    stats['columns'][name] = [int(present.min()), int(present.max())]
+            elif kind == 'int':
+                col = _int_column(values)
+                arrays[name] = col
+                present = col[col != INT_NULL]
+                if len(present):
+                    stats['columns'][name] = [int(present.min()), int(present.max())]
+            else:
+                codes, offsets, blob = encode_strings(values)
+                arrays[f"{name}.codes"] = codes
+                arrays[f"{name}.offsets"] = offsets
+                arrays[f"{name}.blob"] = blob
+
+        # Marks the partition as using INT_NULL (not -1) for missing ints
+        arrays['_int_null'] = np.array(INT_NULL, dtype=np.int64)
+
+        directory = self._partition_dir(table, senator, date)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'part.npz')
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        with open(os.path.join(directory, '_stats.json'), 'w') as f:
+            json.dump(stats, f)
+        return n_rows
+
+    def write_senator(self, senator, data, date=None):
+        """
+        Store one senator's replies_<handle>.json data (posts and replies).
+
+        Returns:
+            (posts written, replies written)
+        """
+        posts, replies = flatten_replies(data)
+        return (self.write_table('posts', senator, posts, date),
+                self.write_table('replies', senator, replies, date))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def partitions(self, table, filters=(), use_stats=True):
+        """
+        Partitions of a table that may contain rows matching filters.
+
+        Args:
+            table: 'posts' or 'replies'
+            filters: (column, op, value) filters; 'senator'/'date' filters
+                always prune, the others only when use_stats is set
+            use_stats: Also skip partitions that are empty or whose min/max
+                statistics rule the filters out
+
+        Returns:
+            List of (senator, date, directory), sorted
+        """
+        filters = _time_filters(TABLES[table], filters)
+        pattern = os.path.join(self.root, table, 'senator=*', 'date=*')
+        found = []
+        for directory in sorted(glob.glob(pattern)):
+            date = os.path.basename(directory)[len('date='):]
+            senator = os.path.basename(os.path.dirname(directory))[len('senator='):]
+            keys = {'senator': senator, 'date': date}
+            if not all(_compare(keys[c], op, v) for c, op, v in filters if c in keys):
+                continue
+            if not os.path.exists(os.path.join(directory, 'part.npz')):
+                continue
+            if use_stats and not self._stats_may_match(directory, filters):
+                continue
+            found.append((senator, date, directory))
+        return found
+
+    def _stats_may_match(self, directory, filters):
+        try:
+            with open(os.path.join(directory, '_stats.json')) as f:
+                stats = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return True
+        if stats.get('rows') == 0:
+            return False
+        for column, op, value in filters:
+            if column in stats['columns']:
+                low, high = stats['columns'][column]
+                if not _range_may_match(low, high, op, value):
+                    return False
+        return True
+
+    def read(self, table, columns=None, filters=(), latest_only=True):
+        """
+        Load columns of a table, keeping only rows that match every filter.
+
+        Args:
+            table: 'posts' or 'replies'
+            columns: Column names to return (default: all, plus 'senator'
+                and 'date'); only these and the filtered columns are read
+            filters: List of (column, op, value) tuples
+            latest_only: Only read each senator's most recent collection
+                date (unless a 'date' filter is given)
+
+        Returns:
+            Dict of column name -> numpy array (object arrays for strings)
+        """
+        schema = TABLES[table]
+        filters = list(filters)
+        _check_filters(filters)
+        filters = _time_filters(schema, filters)
+        if columns is None:
+            columns = list(schema) + list(PARTITION_COLUMNS)
+        for name in list(columns) + [c for c, _, _ in filters]:
+            if name not in schema and name not in PARTITION_COLUMNS:
+                raise KeyError(f"{table} has no column {name!r}")
+
+        parts = self.partitions(table, filters)
+        if latest_only and not any(c == 'date' for c, _, _ in filters):
+            latest = {}
+            for senator, date, directory in self.partitions(table, use_stats=False):
+                latest[senator] = max(latest.get(senator, ''), date)
+            parts = [p for p in parts if p[1] == latest[p[0]]]
+
+        chunks = {name: [] for name in columns}
+        for senator, date, directory in parts:
+            with np.load(os.path.join(directory, 'part.npz'), allow_pickle=False) as npz:
+                mask = None
+                for column, op, value in filters:
+                    if column in PARTITION_COLUMNS:
+                        continue
+                    m = self._filter_mask(npz, column, schema[column], op, value)
+                    mask = m if mask is None else mask & m
+                if mask is None:
+                    first = next(iter(schema))
+                    n_rows = len(npz[first if schema[first] == 'int' else f"{first}.codes"])
+                    mask = np.ones(n_rows, dtype=bool)
+                if not mask.any():
+                    continue
+                for name in columns:
+                    if name in PARTITION_COLUMNS:
+                        value = senator if name == 'senator' else date
+                        chunks[name].append(np.full(int(mask.sum()), value, dtype=object))
+                    elif schema[name] == 'int':
+                        chunks[name].append(_int_column_of(npz, name)[mask])
+                    elif schema[name] == 'time':
+                        chunks[name].append(_time_column(npz, name)[mask])
+                    else:
+                        dictionary = decode_dictionary(npz[f"{name}.offsets"], npz[f"{name}.blob"])
+                        chunks[name].append(decode_strings(npz[f"{name}.codes"][mask], dictionary))
+
+        result = {}
+        for name in columns:
+            if chunks[name]:
+                result[name] = np.concatenate(chunks[name])
+            else:
+                result[name] = np.empty(0, dtype=object if schema.get(name, 'str') == 'str'
+                                        else np.int64)
+        return result
+
+    def _filter_mask(self, npz, column, kind, op, value):
+        # Missing values are excluded explicitly, whatever the comparison
+        if kind == 'int':
+            col = _int_column_of(npz, column)
+            return _compare(col, op, value) & (col != INT_NULL)
+        if kind == 'time':
+            col = _time_column(npz, column)
+            return _compare(col, op, value) & (col != TS_NULL)
+        codes = npz[f"{column}.codes"]
+        dictionary = decode_dictionary(npz[f"{column}.offsets"], npz[f"{column}.blob"])
+        if op in ('==', '!=', 'in'):
+            # Compare on the codes: look the value(s) up in the dictionary once
+            index = {s: i for i, s in enumerate(dictionary)}
+            wanted = [value] if op != 'in' else list(value)
+            wanted_codes = [index[v] if v is not None else -1 for v in wanted
+                            if v is None or v in index]
+            mask = np.isin(codes, wanted_codes)
+            return ~mask if op == '!=' else mask
+        return _compare(decode_strings(codes, dictionary), op, value)
+
+    def iter_rows(self, table, columns=None, filters=(), latest_only=True):
+        """Same as read(), but yields one dict per row."""
+        data = self.read(table, columns, filters, latest_only)
+        names = list(data)
+        for values in zip(*(data[n].tolist() for n in names)):
+            yield dict(zip(names, values))
+
+    def load_replies(self, senator, date=None):
+        """
+        Rebuild one senator's data in the replies_<handle>.json structure.
+
+        Returns:
+            List of post dicts with a 'replies' list, or None if the senator
+            isn't in the store
+        """
+        filters = [('senator', '==', senator)]
+        if date:
+            filters.append(('date', '==', date))
+        if not self.partitions('posts', filters, use_stats=False):
+            return None
+        posts = list(self.iter_rows('posts', [c for c, kind in TABLES['posts'].items()
+                                              if kind != 'time'], filters))
+        by_uri = {post['post_uri']: post for post in posts}
+        for post in posts:
+            post['replies'] = []
+        reply_columns = [c for c, kind in TABLES['replies'].items()
+                         if c != 'replyCount' and kind != 'time']
+        for row in self.iter_rows('replies', reply_columns, filters):
+            reply = {k: v for k, v in row.items() if k != 'post_uri'}
+            for name in ('followersCount', 'followsCount', 'postsCount'):
+                if reply[name] == INT_NULL:
+                    del reply[name]
+            by_uri[row['post_uri']]['replies'].append(reply)
+        return posts
+
+    def summary(self):
+        """Row counts per table and partition."""
+        summary = {}
+        for table in TABLES:
+            for senator, date, directory in self.partitions(table):
+                with open(os.path.join(directory, '_stats.json')) as f:
+                    rows = json.load(f)['rows']
+                size = os.path.getsize(os.path.join(directory, 'part.npz'))
+                summary.setdefault(table, []).append(
+                    {'senator': senator, 'date': date, 'rows': rows, 'bytes': size})
+        return summary
+
+
+def convert_json_files(pattern='replies_*.json', store=None, date=None):
+    """
+    Load existing replies_<handle>.json files into a ColumnStore.
+
+    The senator handle is taken from the file name (dots were replaced by
+    underscores, so it is looked up in senators_bluesky.csv when available)
+    and the collection date from the file's modification time. Matching
+    files that aren't a list of posts (e.g. replies_watermarks.json) are
+    skipped.
+
+    Returns:
+        Dict of senator -> (posts, replies) written
+    """
+    from bluesky_helpers import load_json, load_senators
+    store = store or ColumnStore()
+    handles = {}
+    if os.path.exists('senators_bluesky.csv'):
+        handles = {s['handle'].replace('.', '_'): s['handle']
+                   for s in load_senators('senators_bluesky.csv')}
+
+    written = {}
+    for path in sorted(glob.glob(pattern)):
+        stem = os.path.basename(path)[len('replies_'):-len('.json')]
+        senator = handles.get(stem, stem)
+        file_date = date or datetime.fromtimestamp(
+            os.path.getmtime(path), timezone.utc).strftime('%Y-%m-%d')
+        data = load_json(path)
+        if not isinstance(data, list):
+            continue
+        written[senator] = store.write_senator(senator, data, file_date)
+    return written
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar store for collected replies.")
+    parser.add_argument('--store', default=DEFAULT_STORE, help="Store directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = sub.add_parser('convert', help="Import replies_*.json files")
+    convert_parser.add_argument('--pattern', default='replies_*.json')
+    convert_parser.add_argument('--date', help="Collection date (default: file mtime)")
+
+    sub.add_parser('stats', help="Rows and sizes per partition")
+
+    args = parser.parse_args(argv)
+    store = ColumnStore(args.store)
+
+    if args.command == 'convert':
+        written = convert_json_files(args.pattern, store, args.date)
+        for senator, (n_posts, n_replies) in written.items():
+            print(f"{senator:40s} {n_posts:6d} posts {n_replies:8d} replies")
+        print(f"Converted {len(written)} files into {args.store}/")
+    elif args.command == 'stats':
+        for table, parts in store.summary().items():
+            rows = sum(p['rows'] for p in parts)
+            size = sum(p['bytes'] for p in parts)
+            print(f"{table}: {len(parts)} partitions, {rows} rows, {size / 1e6:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Deduplicated crawl planning for per-senator feeds.
+
+Senators follow many of the same accounts (news outlets, other senators),
+so fetching get_author_feed() once per (senator, followed account) pair
+downloads popular authors dozens of times. CrawlPlan takes the follow map,
+computes the union of followed accounts, and lets a collector fetch each
+author exactly once and then fan the posts out to every senator that
+follows that author.
+
+    plan = CrawlPlan(load_json('senator_follows_map.json'))
+    print(plan.report())
+    author_posts = {a: fetch_24h(a) for a in plan.authors}
+    feeds = plan.fan_out(author_posts)   # senator -> [(author, post), ...]
+
+Run this file directly to see how many requests the plan saves:
+
+    python bluesky_crawl_plan.py senator_follows_map.json
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import json
+import sys
+
+
+class CrawlPlan:
+    """
+    Union of all followed accounts plus who follows each of them.
+
+    Args:
+        follows_map: Dict of senator handle -> list of followed handles
+            (the structure of senator_follows_map.json)
+
+    Attributes:
+        authors: Unique followed handles, most-followed first (ties broken
+            alphabetically), so an interrupted crawl has already covered
+            the accounts that matter to the most senators
+        followers: Dict of author handle -> list of senators following it
+    """
+
+    def __init__(self, follows_map):
+        self.follows_map = follows_map
+        self.followers = {}
+        for senator, followed in follows_map.items():
+            for author in dict.fromkeys(followed):  # ignore duplicate follows
+                self.followers.setdefault(author, []).append(senator)
+        self.authors = sorted(self.followers,
+                              key=lambda a: (-len(self.followers[a]), a))
+
+    @property
+    def naive_requests(self):
+        """Author fetches needed when every (senator, account) pair is fetched."""
+        return sum(len(f) for f in self.followers.values())
+
+    @property
+    def planned_requests(self):
+        """Author fetches needed when every account is fetched once."""
+        return len(self.authors)
+
+    @property
+    def saved_requests(self):
+        return self.naive_requests - self.planned_requests
+
+    def fan_out(self, author_posts):
+        """
+        Distribute each author's posts to every senator following them.
+
+        Args:
+            author_posts: Dict of author handle -> list of posts. Authors
+                missing from the dict (e.g. failed fetches) contribute nothing.
+
+        Returns:
+            Dict of senator -> list of (author, post) tuples, in the order of
+            that senator's follow list
+        """
+        feeds = {}
+        for senator, followed in self.follows_map.items():
+            feed = []
+            for author in dict.fromkeys(followed):
+                for post in author_posts.get(author, []):
+                    feed.append((author, post))
+            feeds[senator] = feed
+        return feeds
+
+    def report(self):
+        """One-line summary of the requests saved compared with the naive plan."""
+        naive = self.naive_requests
+        pct = 100 * self.saved_requests / naive if naive else 0.0
+        return (f"{len(self.follows_map)} senators, {naive} (senator, account) pairs -> "
+                f"{self.planned_requests} unique authors: "
+                f"{self.saved_requests} author fetches saved ({pct:.1f}%)")
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'senator_follows_map.json'
+    with open(path, 'r') as f:
+        plan = CrawlPlan(json.load(f))
+    print(plan.report())
+    print("\nMost shared authors:")
+    for author in plan.authors[:10]:
+        print(f"  {author}: followed by {len(plan.followers[author])} senators")
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Batch gender inference over whole columns of display names.
+
+infer_gender() handles one display name at a time: split it, strip the
+punctuation from every word character by character, skip titles, look
+the first name up and compare the female ratio with the threshold. The
+analysis calls it for every reply, and most display names and almost all
+first names repeat. infer_gender_batch() gives the same labels for a
+whole column at once:
+
+    labels = infer_gender_batch(display_names, name_data)   # array of 'F'/'M'/'U'
+    (labels == 'F').sum()
+
+It works on categories instead of rows:
+    1. Factorize the display names; each distinct one is tokenized once,
+       and the words of all of them are cleaned and lowercased together
+       with a few whole-string operations (first_names()).
+    2. Factorize the first names and join them with the name counts. For a
+       NameIndex (bluesky_names.py) this is a single np.searchsorted over
+       the memory-mapped name table.
+    3. Compute the ratio and threshold on the count arrays, then broadcast
+       the labels back through both factorizations.
+
+Values that aren't strings (None, NaN from pandas) are labelled 'U'. A
+pandas Series in gives a Series with the same index out.
+
+GenderCache memoizes the labels per display name, so a replier who shows
+up under many senators, or an analysis stage that classifies the same
+replies again, costs a dictionary lookup instead of another inference:
+
+    cache = GenderCache(name_data, 'gender_cache.sqlite')
+    labels = cache.labels(display_names)    # same labels as infer_gender_batch()
+    cache.stats()                           # lookups, hits, hit_rate
+
+It keeps the most recently used names in memory and all of them in a
+SQLite file, so later runs start warm. Entries are keyed by the display
+name with its whitespace collapsed (infer_gender() splits on whitespace,
+so that can't change a label) plus the threshold and a digest of the name
+counts, so changing either never returns stale labels.
+
+    python bluesky_gender.py bench --n 1000000     # against infer_gender()
+    python bluesky_gender.py cache                 # entries on disk
+    python bluesky_gender.py cache --clear
+
+Dependencies: numpy (the SQLite cache uses the standard library)
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from bluesky_helpers import NAME_TITLES, infer_gender, load_name_data
+
+
+def _factorize(values):
+    # (codes, uniques): values[i] == uniques[codes[i]]
+    positions = {v: i for i, v in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(positions.__getitem__, values), dtype=np.int64, count=len(values))
+    return codes, list(positions)
+
+
+# Separator candidates for joining words: control and private-use characters
+# are neither letters, whitespace inside a word, nor cased / case-ignorable,
+# so they don't change what str.lower() does to the words around them
+_SEPARATORS = (*range(0x01, 0x09), *range(0xE000, 0xF900))
+
+
+def first_names(display_names):
+    """
+    The first name infer_gender() would look up for each distinct display name.
+
+    Works a word position at a time over all names together: the first
+    words are joined with a separator that occurs in none of them, stripped
+    of non-letters with one regex substitution and lowercased with one
+    str.lower(). Names whose word was empty after cleaning or a title go
+    on to their next word in the following round.
+
+    Args:
+        display_names: Sequence of distinct display names
+
+    Returns:
+        List of lowercase first names, None where there is none
+    """
+    strings = [name if isinstance(name, str) else '' for name in display_names]
+    chars = set(''.join(strings))
+    non_letters = ''.join(re.escape(c) for c in sorted(chars) if not c.isalpha())
+    strip = re.compile(f'[{non_letters}]+').sub if non_letters else None
+    sep = next(chr(c) for c in _SEPARATORS if chr(c) not in chars)
+
+    # first word of every sep-separated name (\s is the same whitespace str.split() uses)
+    first_word = re.compile(f'(?:\\A|{sep})\\s*([^\\s{sep}]*)').findall
+
+    firsts = [None] * len(strings)
+    pending = range(len(strings))
+    rest = strings
+    while pending:
+        heads = first_word(sep.join(rest))
+        joined = sep.join(heads)
+        if strip is not None:
+            joined = strip('', joined)
+        cleaned = joined.lower().split(sep)
+        next_pending = []
+        next_rest = []
+        for k, word in enumerate(cleaned):
+            if word and word not in NAME_TITLES:
+                firsts[pending[k]] = word
+            elif heads[k]:
+                tail = rest[k].split(None, 1)
+                if len(tail) == 2:
+                    next_pending.append(pending[k])
+                    next_rest.append(tail[1])
+        pending = next_pending
+        rest = next_rest
+    return firsts
+
+
+def lookup_counts(names, name_data):
+    """
+    Female and male counts for each name (0, 0 where it's missing or None).
+
+    Args:
+        names: Sequence of distinct lowercase names (or None)
+        name_data: NameIndex or dict from load_name_data()
+
+    Returns:
+        (female, male) int64 arrays
+    """
+    female = np.zeros(len(names), dtype=np.int64)
+    male = np.zeros(len(names), dtype=np.int64)
+    if hasattr(name_data, 'arrays'):
+        table, table_female, table_male = name_data.arrays()
+        keys = [name.encode('utf-8') if name is not None else b'' for name in names]
+        # longer keys can't be in the table (and would be truncated to its width)
+        fits = np.array([0 < len(key) <= name_data.width for key in keys], dtype=bool)
+        query = np.array(keys, dtype=table.dtype) if keys else np.array([], dtype=table.dtype)
+        pos = np.minimum(np.searchsorted(table, query), max(len(table) - 1, 0))
+        found = fits & (table[pos] == query) if len(table) else np.zeros(len(keys), dtype=bool)
+        female[found] = table_female[pos[found]]
+        male[found] = table_male[pos[found]]
+    else:
+        for i, name in enumerate(names):
+            counts = name_data.get(name) if name is not None else None
+            if counts is not None:
+                female[i], male[i] = counts
+    return female, male
+
+
+def classify_counts(female, male, threshold=0.6):
+    """infer_gender()'s threshold rule on count arrays; returns an array of 'F'/'M'/'U'."""
+    total = female + male
+    known = total > 0
+    ratio = np.divide(female, total, out=np.zeros(len(total)), where=known)
+    labels = np.full(len(total), 'U', dtype='<U1')
+    is_female = known & (ratio >= threshold)
+    labels[is_female] = 'F'
+    labels[known & ~is_female & ((1 - ratio) >= threshold)] = 'M'
+    return labels
+
+
+def infer_gender_batch(names, name_data, threshold=0.6):
+    """
+    infer_gender() for a whole column of display names.
+
+    Args:
+        names: List, NumPy array or pandas Series of display names
+        name_data: NameIndex or dict from load_name_data()
+        threshold: Minimum proportion to classify (default 0.6 = 60%)
+
+    Returns:
+        NumPy array of 'F'/'M'/'U' (a Series with the same index for a
+        Series), identical to [infer_gender(n, name_data, threshold) for n in names]
+    """
+    values = names.tolist() if hasattr(names, 'tolist') else list(names)
+    display_codes, display_names = _factorize(values)
+    first_codes, firsts = _factorize(first_names(display_names))
+    female, male = lookup_counts(firsts, name_data)
+    labels = classify_counts(female, male, threshold)[first_codes][display_codes]
+
+    if type(names).__name__ == 'Series' and hasattr(names, 'index'):
+        import pandas as pd
+        return pd.Series(labels, index=names.index, name=names.name)
+    return labels
+
+
+# ============================================================================
+# Classification cache
+# ============================================================================
+
+DEFAULT_CACHE_FILE = 'gender_cache.sqlite'
+
+# Distinct display names kept in memory (least recently used are dropped first)
+LRU_SIZE = 500_000
+
+# Names per SELECT against the SQLite file (below SQLite's parameter limit)
+_SQL_BATCH = 500
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    model  TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    PRIMARY KEY (model, name)
+) WITHOUT ROWID
+"""
+
+
+def normalize_display_name(name):
+    """Cache key for a display name: whitespace collapsed, '' for non-strings."""
+    return ' '.join(name.split()) if isinstance(name, str) else ''
+
+
+def name_data_digest(name_data):
+    """
+    SHA-256 (hex) identifying a set of name counts.
+
+    Uses the source file hashes recorded in a NameIndex, otherwise hashes
+    the counts themselves.
+    """
+    digest = hashlib.sha256()
+    hashes = getattr(name_data, 'source_hashes', None)
+    if hashes and all(hashes):
+        for h in hashes:
+            digest.update(h)
+    else:
+        for name in sorted(name_data):
+            female, male = name_data[name]
+            digest.update(f"{name}\t{female}\t{male}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class GenderCache:
+    """
+    Memoized infer_gender_batch(): display name -> 'F'/'M'/'U'.
+
+    Args:
+        name_data: NameIndex or dict from load_name_data()
+        path: SQLite file for the persistent layer (created if missing), or
+              None to cache in memory only
+        threshold: Minimum proportion to classify (default 0.6 = 60%)
+        lru_size: Distinct display names kept in memory
+
+    Attributes:
+        lookups: Display names asked for in this process
+        memory_hits, disk_hits: Lookups answered from memory / the SQLite file
+        inferred: Distinct names that had to be classified
+        writes: Labels written to the SQLite file
+    """
+
+    def __init__(self, name_data, path=DEFAULT_CACHE_FILE, threshold=0.6, lru_size=LRU_SIZE):
+        self.name_data = name_data
+        self.path = path
+        self.threshold = threshold
+        self.lru_size = lru_size
+        # labels are only valid for this threshold and these name counts
+        self.model = f"{threshold!r}:{name_data_digest(name_data)}"
+
+        self.lookups = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.inferred = 0
+        self.writes = 0
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(CACHE_SCHEMA)
+            self._db.commit()
+
+    def _read(self, keys):
+        # name -> label for the keys found in the SQLite file
+        found = {}
+        for start in range(0, len(keys), _SQL_BATCH):
+            chunk = keys[start:start + _SQL_BATCH]
+            found.update(self._db.execute(
+                f"SELECT name, gender FROM labels WHERE model = ? "
+                f"AND name IN ({','.join('?' * len(chunk))})", (self.model, *chunk)))
+        return found
+
+    def _write(self, entries):
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?)",
+                                 [(self.model, name, label) for name, label in entries])
+        self.writes += len(entries)
+
+    def labels(self, names):
+        """
+        Labels for a whole column of display names.
+
+        Args:
+            names: List, NumPy array or pandas Series of display names
+
+        Returns:
+            NumPy array of 'F'/'M'/'U' (a Series with the same index for a
+            Series), identical to infer_gender_batch(names, name_data, threshold)
+        """
+        values = names.tolist() if hasattr(names, 'tolist') else list(names)
+        raw_codes, raw = _factorize(values)
+        key_codes, keys = _factorize([normalize_display_name(v) for v in raw])
+        codes = np.asarray(key_codes, dtype=np.int64)[raw_codes]
+
+        with self._lock:
+            found = [None] * len(keys)
+            missing = []
+            for i, key in enumerate(keys):
+                label = self._lru.get(key)
+                if label is None:
+                    missing.append(i)
+                else:
+                    self._lru.move_to_end(key)
+                    found[i] = label
+
+            from_disk = {}
+            if missing and self._db is not None:
+                from_disk = self._read([keys[i] for i in missing])
+            computed = [i for i in missing if keys[i] not in from_disk]
+            labels = infer_gender_batch([keys[i] for i in computed], self.name_data,
+                                        self.threshold).tolist() if computed else []
+            for i, label in zip(computed, labels):
+                found[i] = label
+            for i in missing:
+                if found[i] is None:
+                    found[i] = from_disk[keys[i]]
+                self._lru[keys[i]] = found[i]
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+            if computed and self._db is not None:
+                self._write([(keys[i], found[i]) for i in computed])
+
+            # repeats within this call are answered from memory as well
+            self.lookups += len(values)
+            self.disk_hits += len(from_disk)
+            self.inferred += len(computed)
+            self.memory_hits += len(values) - len(from_disk) - len(computed)
+
+        result = np.array(found, dtype='<U1')[codes] if keys else np.array([], dtype='<U1')
+        if type(names).__name__ == 'Series' and hasattr(names, 'index'):
+            import pandas as pd
+            return pd.Series(result, index=names.index, name=names.name)
+        return result
+
+    def label(self, display_name):
+        """infer_gender() for one display name, through the cache."""
+        return str(self.labels([display_name])[0])
+
+    def stats(self):
+        """Hit counters for this process."""
+        return {
+            'lookups': self.lookups,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'inferred': self.inferred,
+            'writes': self.writes,
+            'memory_entries': len(self._lru),
+            'hit_rate': 1 - self.inferred / self.lookups if self.lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def synthetic_display_names(n, first_pool, seed=0):
+    """
+    n display names in the shapes seen on Bluesky: plain and titled names,
+    handles, emoji, initials and empty names.
+    """
+    rng = random.Random(seed)
+    last = ['Smith', 'Garcia', 'Nguyen', "O'Brien", 'Lee', 'Okafor', 'Kowalski', 'Silva']
+    emoji = ['🌊', '🇺🇸', '✨', '🏳️‍🌈', '🌻', '']
+    shapes = [
+        lambda f: f"{f.title()} {rng.choice(last)}",
+        lambda f: f"{rng.choice(['Dr.', 'Mr.', 'Ms.', 'Rev', 'Sen.'])} {f.title()} {rng.choice(last)}",
+        lambda f: f"{rng.choice(emoji)} {f.title()} {rng.choice(emoji)}",
+        lambda f: f"{f}_{rng.choice(last).lower()}{rng.randint(1, 999)}",
+        lambda f: f"{f[0].upper()}. {rng.choice(last)}",
+        lambda f: f"{f.upper()}!!",
+        lambda f: '',
+        lambda f: f"{rng.choice(last)} Resister {rng.choice(emoji)}",
+    ]
+    weights = [30, 5, 15, 10, 5, 5, 10, 20]
+    return [rng.choices(shapes, weights)[0](rng.choice(first_pool)) for _ in range(n)]
+
+
+def benchmark(n, name_data, threshold=0.6, repeat=3):
+    """
+    Time infer_gender() in a loop against infer_gender_batch() and a warm
+    GenderCache on n synthetic names.
+    """
+    pool = [name for name in name_data if name.isascii()][:5000] or ['mary', 'john']
+    names = synthetic_display_names(n, pool)
+
+    start = time.perf_counter()
+    expected = [infer_gender(name, name_data, threshold) for name in names]
+    loop = time.perf_counter() - start
+
+    batch = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        labels = infer_gender_batch(names, name_data, threshold)
+        batch = min(batch, time.perf_counter() - start)
+
+    cache = GenderCache(name_data, path=None, threshold=threshold)
+    cache.labels(names)
+    start = time.perf_counter()
+    cached = cache.labels(names)
+    warm = time.perf_counter() - start
+    return {
+        'names': n,
+        'distinct': len(set(names)),
+        'loop': loop,
+        'batch': batch,
+        'cached': warm,
+        'identical': labels.tolist() == expected == cached.tolist(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch gender inference.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench_parser = sub.add_parser('bench', help="Compare with infer_gender() in a loop")
+    bench_parser.add_argument('--n', type=int, default=1_000_000)
+    bench_parser.add_argument('--threshold', type=float, default=0.6)
+    bench_parser.add_argument('--female', default='female_names.tsv.gz')
+    bench_parser.add_argument('--male', default='male_names.tsv.gz')
+    bench_parser.add_argument('--no-index', action='store_true',
+                              help="Use the parsed dict instead of the compiled name index")
+    cache_parser = sub.add_parser('cache', help="Show (or clear) the classification cache")
+    cache_parser.add_argument('--file', default=DEFAULT_CACHE_FILE, help="SQLite cache file")
+    cache_parser.add_argument('--clear', action='store_true', help="Delete every entry")
+
+    args = parser.parse_args(argv)
+    if args.command == 'cache':
+        db = sqlite3.connect(args.file)
+        db.execute(CACHE_SCHEMA)
+        if args.clear:
+            with db:
+                print(f"Deleted {db.execute('DELETE FROM labels').rowcount} entries")
+        rows = db.execute("SELECT model, COUNT(*) FROM labels GROUP BY model").fetchall()
+        if not rows:
+            print("Cache is empty")
+        for model, entries in rows:
+            threshold, digest = model.split(':', 1)
+            print(f"threshold {threshold}, name data {digest[:12]}: {entries} display names")
+        db.close()
+        return
+
+    name_data = load_name_data(args.female, args.male,
+                               **({'index_file': None} if args.no_index else {}))
+    r = benchmark(args.n, name_data, args.threshold)
+    print(f"{r['names']} display names ({r['distinct']} distinct), "
+          f"name data: {type(name_data).__name__}")
+    print(f"infer_gender loop:  {r['loop']:.2f}s")
+    print(f"infer_gender_batch: {r['batch']:.2f}s ({r['loop'] / r['batch']:.1f}x)")
+    print(f"warm GenderCache:   {r['cached']:.2f}s ({r['loop'] / r['cached']:.1f}x)")
+    print(f"identical labels: {r['identical']}")
+
+
+if __name__ == '__main__':
+    main()
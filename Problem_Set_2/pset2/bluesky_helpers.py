@@ -9,9 +9,12 @@ No authentication is required for read-only access to public data.
 
 IMPORTANT NOTES:
 -----------------------------
-1. Rate Limiting: The API allows ~3,000 requests per 5 minutes. Add sleep(0.1)
-   between requests to avoid being rate-limited. For large data collection,
-   consider using longer delays (0.15-0.2s) to be safe.
+1. Rate Limiting: The API allows ~3,000 requests per 5 minutes. make_request()
+   takes a token from RATE_LIMITER (a token bucket, see bluesky_ratelimit.py)
+   before every call and backs off automatically on HTTP 429, so you don't
+   need to sleep between requests. To run several collectors at once, set the
+   BSKY_RATE_LIMIT_FILE environment variable to the same path in each of them
+   so they share one budget (bluesky_shard.py does this for its workers).
 
 2. Error Handling: The API can return errors for deleted accounts, private
    profiles, or temporary issues. Your code should handle these gracefully
@@ -21,7 +24,12 @@ IMPORTANT NOTES:
    significant time (30-60+ minutes). Consider:
    - Running collection scripts in the background
    - Saving intermediate results to resume if interrupted
-   - Caching data to avoid re-collecting
+   - Caching data to avoid re-collecting (enable_cache() or the
+     BSKY_CACHE_FILE environment variable turn on an on-disk response cache)
+   - Using AsyncBlueskyClient (bluesky_async.py) to keep several requests
+     in flight at once
+   - Recording responses once (enable_recording()) and replaying them
+     (enable_replay()) while you work on the analysis code
 
 4. API Limits: The getPostThread endpoint returns at most ~200 replies per post,
    biased toward EARLIER replies. This is NOT a uniformly random sample -- keep
@@ -30,23 +38,245 @@ IMPORTANT NOTES:
 Dependencies: Only uses standard library (no pip install required)
 """
 
+import http.client
 import json
-import urllib.request
-import urllib.error
-import urllib.parse
+import numbers
+import os
+import threading
 import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
+import bluesky_jsonio as jsonio
+from bluesky_cache import ResponseCache
+from bluesky_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from bluesky_ratelimit import RateLimiter
+from bluesky_records import FollowEdge, replies_from_json
+from bluesky_replay import FixtureArchive, RecordingTransport, ReplayTransport
+from bluesky_retry import CircuitBreaker, RetryPolicy
+from bluesky_telemetry import Telemetry
+
 # Base URL for Bluesky public API
-API_BASE = "https://public.api.bsky.app/xrpc"
+# Set BSKY_API_BASE to point the collectors at another server, e.g. the local
+# stand-in from bluesky_mock_server.py for offline load tests
+API_BASE = os.environ.get('BSKY_API_BASE', "https://public.api.bsky.app/xrpc")
 
 # Default timeout for requests (seconds) - increase if you see timeout errors
 DEFAULT_TIMEOUT = 15
 
 # Rate limiting delay (seconds between requests)
-# Increase to 0.15-0.2 if you get rate limit errors during large collection
+# Only used by callers that still pace themselves; make_request() itself is
+# paced by RATE_LIMITER below
 RATE_LIMIT_DELAY = 0.1
 
+# Token bucket consulted by make_request() before every call.
+# Shared across processes when BSKY_RATE_LIMIT_FILE is set.
+RATE_LIMITER = RateLimiter(state_file=os.environ.get('BSKY_RATE_LIMIT_FILE'))
+
+
+def set_rate_limiter(limiter):
+    """
+    Replace the rate limiter used by make_request().
+
+    Args:
+        limiter: A RateLimiter instance, or None to disable rate limiting
+
+    Returns:
+        The previously installed limiter
+    """
+    global RATE_LIMITER
+    previous = RATE_LIMITER
+    RATE_LIMITER = limiter
+    return previous
+
+
+# Keep-alive connections reused by make_request() (see bluesky_pool.py).
+# HTTP_POOL.stats() / HTTP_POOL.connection_stats() report reuse counters.
+HTTP_POOL = ConnectionPool(maxsize=DEFAULT_POOL_SIZE)
+
+
+def set_pool_size(maxsize):
+    """
+    Replace HTTP_POOL with a fresh pool keeping up to maxsize idle connections.
+
+    Use a value at least as large as the number of concurrent requests
+    (e.g. AsyncBlueskyClient's max_in_flight) so connections are reused.
+
+    Returns:
+        The new ConnectionPool
+    """
+    global HTTP_POOL
+    pool = ConnectionPool(maxsize=maxsize)
+    if isinstance(HTTP_POOL, RecordingTransport):
+        # Keep recording, just over the bigger pool
+        HTTP_POOL.transport.close()
+        HTTP_POOL.transport = pool
+    elif isinstance(HTTP_POOL, ReplayTransport):
+        pool.close()  # replay never touches the network
+        return HTTP_POOL
+    else:
+        HTTP_POOL.close()
+        HTTP_POOL = pool
+    return pool
+
+
+# Optional on-disk response cache (see bluesky_cache.py). Off by default;
+# turn it on with enable_cache() or by setting BSKY_CACHE_FILE.
+RESPONSE_CACHE = (ResponseCache(os.environ['BSKY_CACHE_FILE'])
+                  if os.environ.get('BSKY_CACHE_FILE') else None)
+
+
+def enable_cache(path='bluesky_cache.sqlite', ttls=None):
+    """
+    Serve repeated make_request() calls from an SQLite cache.
+
+    Args:
+        path: Cache file (created if missing)
+        ttls: Optional dict of endpoint -> seconds overriding the defaults
+
+    Returns:
+        The ResponseCache, so you can print cache.stats() at the end of a run
+    """
+    global RESPONSE_CACHE
+    RESPONSE_CACHE = ResponseCache(path, ttls=ttls)
+    return RESPONSE_CACHE
+
+
+def disable_cache():
+    """Stop using the response cache (the file is left on disk)."""
+    global RESPONSE_CACHE
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.close()
+    RESPONSE_CACHE = None
+
+
+def enable_recording(path='bluesky_fixtures.jsonl'):
+    """
+    Record every API response make_request() receives to a fixture archive.
+
+    Args:
+        path: JSON-lines archive (appended to if it exists)
+
+    Returns:
+        The RecordingTransport now installed as HTTP_POOL
+    """
+    global HTTP_POOL
+    disable_fixtures()
+    HTTP_POOL = RecordingTransport(HTTP_POOL, FixtureArchive(path))
+    return HTTP_POOL
+
+
+def enable_replay(path='bluesky_fixtures.jsonl', strict=False, latency=0.0):
+    """
+    Answer make_request() from a fixture archive instead of the network.
+
+    Args:
+        path: Archive written by enable_recording()
+        strict: Raise FixtureMissing for requests that weren't recorded
+            (default: answer them with a 404, which make_request() treats
+            as "not found")
+        latency: Seconds to add per request, to simulate network delay
+
+    Returns:
+        The ReplayTransport now installed as HTTP_POOL
+
+    Tip: set_rate_limiter(None) as well when benchmarking, otherwise replayed
+    requests are still paced to the real API's budget.
+    """
+    global HTTP_POOL
+    disable_fixtures()
+    old = HTTP_POOL
+    HTTP_POOL = ReplayTransport(FixtureArchive(path), strict=strict, latency=latency)
+    old.close()
+    return HTTP_POOL
+
+
+def disable_fixtures():
+    """Stop recording/replaying and go back to a plain ConnectionPool."""
+    global HTTP_POOL
+    if isinstance(HTTP_POOL, RecordingTransport):
+        HTTP_POOL.archive.close()
+        HTTP_POOL = HTTP_POOL.transport
+    elif isinstance(HTTP_POOL, ReplayTransport):
+        HTTP_POOL.close()
+        HTTP_POOL = ConnectionPool(maxsize=DEFAULT_POOL_SIZE)
+
+
+# Record/replay fixtures for offline runs (see bluesky_replay.py)
+if os.environ.get('BSKY_REPLAY_FILE'):
+    enable_replay(os.environ['BSKY_REPLAY_FILE'])
+elif os.environ.get('BSKY_RECORD_FILE'):
+    enable_recording(os.environ['BSKY_RECORD_FILE'])
+
+
+# Retries for transient errors and a per-endpoint circuit breaker that pauses
+# the crawl while the API is down (see bluesky_retry.py).
+# RETRY_POLICY.stats() and CIRCUIT_BREAKER.stats() report the counters.
+RETRY_POLICY = RetryPolicy()
+CIRCUIT_BREAKER = CircuitBreaker()
+
+
+def set_retry_policy(policy=None, breaker=None):
+    """
+    Replace the retry policy and/or circuit breaker used by make_request().
+
+    Args:
+        policy: A RetryPolicy (RetryPolicy(max_retries=0) disables retries)
+        breaker: A CircuitBreaker
+    """
+    global RETRY_POLICY, CIRCUIT_BREAKER
+    if policy is not None:
+        RETRY_POLICY = policy
+    if breaker is not None:
+        CIRCUIT_BREAKER = breaker
+
+
+# Per-endpoint call counts, latency percentiles, bytes, decode time, status
+# histogram and waiting time (see bluesky_telemetry.py).
+# TELEMETRY.snapshot() / TELEMETRY.summary() / TELEMETRY.start_dump(path)
+TELEMETRY = Telemetry()
+
+# Outcome of each thread's most recent make_request() (see last_request_outcome())
+_LAST_OUTCOME = threading.local()
+
+
+def last_request_outcome():
+    """
+    Outcome of the calling thread's most recent make_request().
+
+    Lets a caller that got None tell a bad request (400, caused by its own
+    parameters) from an outage.
+
+    Returns:
+        The HTTP status (int), 'timeout', 'network', or None before any request
+    """
+    return getattr(_LAST_OUTCOME, 'value', None)
+
+
+def _after_fork_in_child():
+    """
+    Give a forked worker process (bluesky_shard.py) its own resources.
+
+    The parent's pooled sockets, prefetch threads and SQLite handle must not
+    be used from two processes, so the child starts with fresh ones (the
+    inherited sockets are left alone: they still belong to the parent).
+    """
+    global HTTP_POOL, RESPONSE_CACHE, _PREFETCH_POOL
+    if isinstance(HTTP_POOL, RecordingTransport):
+        HTTP_POOL.transport = ConnectionPool(maxsize=HTTP_POOL.transport.maxsize)
+    elif isinstance(HTTP_POOL, ConnectionPool):
+        HTTP_POOL = ConnectionPool(maxsize=HTTP_POOL.maxsize)
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE.path, ttls=RESPONSE_CACHE.ttls,
+                                       default_ttl=RESPONSE_CACHE.default_ttl)
+    _PREFETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bsky-prefetch')
+    TELEMETRY.after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
 
 def make_request(endpoint, params=None, timeout=DEFAULT_TIMEOUT):
     """
@@ -54,7 +284,8 @@ def make_request(endpoint, params=None, timeout=DEFAULT_TIMEOUT):
 
     Args:
         endpoint: API endpoint (e.g., 'app.bsky.actor.getProfile')
-        params: Dictionary of query parameters
+        params: Dictionary of query parameters (a list value is sent as a
+            repeated parameter, e.g. {'actors': ['a', 'b']})
         timeout: Request timeout in seconds
 
     Returns:
@@ -66,32 +297,99 @@ def make_request(endpoint, params=None, timeout=DEFAULT_TIMEOUT):
         - 429: Rate limited (slow down your requests)
         - 500/502/503: Server errors (retry after a delay)
 
-    Tip: For robust data collection, consider wrapping calls in a retry loop
-    with exponential backoff for transient errors.
+    429, 5xx responses, timeouts and dropped connections are retried with
+    exponential backoff (RETRY_POLICY); 400/404 are not. None is only
+    returned once the retries are used up. While an endpoint keeps failing,
+    CIRCUIT_BREAKER makes every caller wait instead of hammering the API.
+    Every attempt is recorded in TELEMETRY.
+
+    Every call first takes a token from RATE_LIMITER and reports the
+    response status/headers back to it, so callers don't need to sleep.
+    Requests are sent over keep-alive connections from HTTP_POOL (asking for
+    gzip, which the pool decompresses as the body streams in), and are
+    answered from RESPONSE_CACHE instead when caching is enabled.
     """
+    telemetry = TELEMETRY
+    cache = RESPONSE_CACHE
+    if cache is not None:
+        cached = cache.get(endpoint, params)
+        if cached is not None:
+            telemetry.record_cache_hit(endpoint)
+            _LAST_OUTCOME.value = 200
+            return cached
+
     url = f"{API_BASE}/{endpoint}"
 
     if params:
-        query_string = "&".join(f"{k}={urllib.parse.quote(str(v))}" for k, v in params.items())
+        query_string = "&".join(
+            f"{k}={urllib.parse.quote(str(item))}"
+            for k, v in params.items()
+            for item in (v if isinstance(v, (list, tuple)) else [v]))
         url = f"{url}?{query_string}"
 
-    try:
-        with urllib.request.urlopen(url, timeout=timeout) as response:
-            return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        # Don't print for common "not found" errors during bulk collection
-        if e.code not in [400, 404]:
-            print(f"HTTP Error {e.code}: {e.reason}")
-        return None
-    except urllib.error.URLError as e:
-        print(f"URL Error: {e.reason}")
-        return None
-    except json.JSONDecodeError:
-        print("Error: Invalid JSON response")
-        return None
-    except TimeoutError:
-        print(f"Timeout after {timeout}s")
-        return None
+    limiter = RATE_LIMITER
+    policy = RETRY_POLICY
+    breaker = CIRCUIT_BREAKER
+
+    for attempt in range(policy.max_retries + 1):
+        telemetry.record_wait(endpoint, 'circuit_open', breaker.before_call(endpoint))
+        if limiter is not None:
+            telemetry.record_wait(endpoint, 'rate_limited', limiter.acquire())
+
+        start = time.perf_counter()
+        body = b''
+        wire_bytes = 0
+        try:
+            status, headers, body, wire_bytes = HTTP_POOL.request(url, timeout=timeout)
+        except TimeoutError:
+            outcome, message = 'timeout', f"Timeout after {timeout}s"
+        except (OSError, http.client.HTTPException) as e:
+            outcome, message = 'network', f"URL Error: {e}"
+        else:
+            if limiter is not None:
+                limiter.update(status, headers)
+            outcome = status
+            message = f"HTTP Error {status}: {http.client.responses.get(status, '')}"
+        telemetry.record_request(endpoint, outcome, time.perf_counter() - start,
+                                 wire_bytes, len(body))
+        _LAST_OUTCOME.value = outcome
+
+        # Timeouts, dropped connections and 5xx mean the API is struggling;
+        # any other answer (including 404 or 429) means it is up
+        if outcome in ('timeout', 'network') or (isinstance(outcome, int) and outcome >= 500):
+            breaker.record_failure(endpoint)
+        else:
+            breaker.record_success(endpoint)
+
+        if isinstance(outcome, int) and outcome < 400:
+            start = time.perf_counter()
+            try:
+                # json.loads accepts the decompressed bytearray directly
+                data = json.loads(body)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                print("Error: Invalid JSON response")
+                return None
+            finally:
+                telemetry.record_decode(endpoint, time.perf_counter() - start)
+            if cache is not None:
+                cache.set(endpoint, params, data)
+            return data
+
+        if not policy.is_retryable(outcome):
+            # Don't print for common "not found" errors during bulk collection
+            if outcome not in [400, 404]:
+                print(message)
+            return None
+
+        if attempt < policy.max_retries:
+            policy.record_retry(endpoint)
+            delay = policy.delay(attempt)
+            telemetry.record_wait(endpoint, 'backoff', delay)
+            time.sleep(delay)
+
+    policy.record_give_up(endpoint)
+    print(f"{message} (gave up after {policy.max_retries} retries)")
+    return None
 
 
 # ============================================================================
@@ -120,6 +418,48 @@ def get_profile(handle):
     return make_request('app.bsky.actor.getProfile', {'actor': handle})
 
 
+# getProfiles accepts at most this many actors per request
+PROFILES_BATCH_SIZE = 25
+
+
+def get_profiles(handles):
+    """
+    Get up to 25 profiles in a single request.
+
+    Args:
+        handles: List of handles or DIDs (at most 25)
+
+    Returns:
+        Dictionary with a 'profiles' list, or None on error. Accounts that
+        don't exist are simply missing from the list.
+
+    Tip: ProfileHydrator (bluesky_profiles.py) batches any number of
+    lookups into getProfiles calls for you.
+    """
+    if len(handles) > PROFILES_BATCH_SIZE:
+        raise ValueError(f"getProfiles accepts at most {PROFILES_BATCH_SIZE} actors")
+    return make_request('app.bsky.actor.getProfiles', {'actors': list(handles)})
+
+
+POSTS_BATCH_SIZE = 25
+
+
+def get_posts(uris):
+    """
+    Get up to 25 posts (with their current like/reply counts) in one request.
+
+    Args:
+        uris: List of post URIs (at most 25)
+
+    Returns:
+        Dictionary with a 'posts' list, or None on error. Deleted posts are
+        simply missing from the list.
+    """
+    if len(uris) > POSTS_BATCH_SIZE:
+        raise ValueError(f"getPosts accepts at most {POSTS_BATCH_SIZE} uris")
+    return make_request('app.bsky.feed.getPosts', {'uris': list(uris)})
+
+
 def get_follows(handle, limit=100, cursor=None):
     """
     Get accounts that a user follows (single page).
@@ -142,40 +482,31 @@ def get_follows(handle, limit=100, cursor=None):
     return make_request('app.bsky.graph.getFollows', params)
 
 
-def get_all_follows(handle):
+def get_all_follows(handle, as_records=False):
     """
     Get ALL accounts that a user follows (handles pagination automatically).
 
     Args:
         handle: Bluesky handle
+        as_records: Return compact FollowEdge records (bluesky_records.py)
+            instead of the full API dicts
 
     Returns:
         List of all followed accounts (each is a dict with 'handle', 'did',
         'displayName', etc.)
 
+    Raises:
+        PaginationError: if a page request fails (rather than returning a
+            partial list)
+
     Each followed account dict contains useful fields:
         - 'handle': The account's handle (e.g., 'user.bsky.social')
         - 'did': The account's permanent identifier
         - 'displayName': The account's display name (may be empty)
     """
-    all_follows = []
-    cursor = None
-
-    while True:
-        result = get_follows(handle, limit=100, cursor=cursor)
-        if not result:
-            break
-
-        follows = result.get('follows', [])
-        all_follows.extend(follows)
-
-        cursor = result.get('cursor')
-        if not cursor:
-            break
-
-        time.sleep(RATE_LIMIT_DELAY)
-
-    return all_follows
+    if as_records:
+        return [FollowEdge.from_api(f, follower=handle) for f in iter_follows(handle)]
+    return list(iter_follows(handle))
 
 
 def get_author_feed(handle, limit=50, cursor=None):
@@ -195,6 +526,10 @@ def get_author_feed(handle, limit=50, cursor=None):
         - 'author': Dict with 'handle', 'displayName'
         - 'record': Dict with 'text', 'createdAt'
         - 'likeCount', 'replyCount', 'repostCount': Engagement metrics
+
+    Note:
+        This returns a single page. Use iter_author_feed(handle, since=...)
+        to read every post in a time window.
     """
     params = {'actor': handle, 'limit': min(limit, 100)}
     if cursor:
@@ -225,6 +560,209 @@ def get_post_thread(uri, depth=50):
     return make_request('app.bsky.feed.getPostThread', params)
 
 
+# ============================================================================
+# Pagination
+# Lazy iterators that follow the API's cursor for you, one page at a time.
+# ============================================================================
+
+# Background threads used to fetch the next page while the caller is still
+# working on the current one
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bsky-prefetch')
+
+PIN_REASON = 'app.bsky.feed.defs#reasonPin'
+REPOST_REASON = 'app.bsky.feed.defs#reasonRepost'
+
+
+class PaginationError(RuntimeError):
+    """
+    A page request of a paginated listing failed.
+
+    Raised instead of ending the iteration early, so that a truncated list
+    is never mistaken for a complete one.
+
+    Attributes:
+        endpoint: The endpoint being paginated
+        cursor: Cursor of the page that failed (None for the first page);
+            pass it back as cursor= to resume
+    """
+
+    def __init__(self, endpoint, cursor=None):
+        super().__init__(f"{endpoint} request failed (cursor={cursor!r})")
+        self.endpoint = endpoint
+        self.cursor = cursor
+
+
+def iter_pages(endpoint, params, items_key, cursor=None, keep_going=None, prefetch=True):
+    """
+    Iterate over the pages of a cursor-paginated endpoint.
+
+    Args:
+        endpoint: API endpoint (e.g., 'app.bsky.graph.getFollows')
+        params: Query parameters for every page (without 'cursor')
+        items_key: Key of the item list in each response (e.g., 'follows')
+        cursor: Cursor to start from (None = first page)
+        keep_going: Optional function(items) -> bool; return False to stop
+            after the current page (no further page is requested)
+        prefetch: Request the next page in the background while the caller
+            consumes the current one
+
+    Yields:
+        (items, next_cursor) for each page. next_cursor can be saved and
+        passed back as cursor= to resume later. Iteration stops at the last
+        page.
+
+    Raises:
+        PaginationError: if a page request fails (make_request returned None)
+    """
+    def fetch(page_cursor):
+        page_params = dict(params)
+        if page_cursor:
+            page_params['cursor'] = page_cursor
+        return make_request(endpoint, page_params)
+
+    page_cursor = cursor
+    page = fetch(page_cursor)
+    while True:
+        if page is None:
+            raise PaginationError(endpoint, page_cursor)
+        items = page.get(items_key, [])
+        next_cursor = page.get('cursor')
+        more = bool(next_cursor) and (keep_going is None or keep_going(items))
+
+        future = _PREFETCH_POOL.submit(fetch, next_cursor) if more and prefetch else None
+        yield items, next_cursor
+        if not more:
+            return
+        page_cursor = next_cursor
+        page = future.result() if future else fetch(next_cursor)
+
+
+def iter_follows(handle, cursor=None):
+    """
+    Lazily iterate over every account a user follows.
+
+    Args:
+        handle: Bluesky handle
+        cursor: Optional cursor to resume from
+
+    Yields:
+        Followed account dicts (same as get_all_follows() items)
+    """
+    for follows, _ in iter_pages('app.bsky.graph.getFollows',
+                                 {'actor': handle, 'limit': 100}, 'follows', cursor):
+        yield from follows
+
+
+def iter_followers(handle, cursor=None):
+    """
+    Lazily iterate over every account following a user.
+
+    Args:
+        handle: Bluesky handle
+        cursor: Optional cursor to resume from
+
+    Yields:
+        Follower account dicts with 'handle', 'did', 'displayName', etc.
+    """
+    for followers, _ in iter_pages('app.bsky.graph.getFollowers',
+                                   {'actor': handle, 'limit': 100}, 'followers', cursor):
+        yield from followers
+
+
+def _feed_time(value):
+    # Parsed feed timestamp, or None if missing/unparseable
+    try:
+        return parse_datetime(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def split_feed_window(items, since):
+    """
+    Keep the feed items created at or after since.
+
+    Author feeds are ordered by when each item was added, newest first, so
+    the first post older than since means every later item is older too.
+    Some items don't follow that order by their createdAt:
+      - pinned posts are skipped;
+      - reposts sit where they were reposted (reason.indexedAt), and the
+        reposted post can be much older. They are kept if the post itself is
+        inside the window, and only end the window if the repost is older;
+      - items whose timestamp can't be parsed are skipped.
+
+    Args:
+        items: List of feed items (dicts with a 'post' key)
+        since: timezone-aware datetime, or None for no limit
+
+    Returns:
+        (kept_items, reached_end) where reached_end is True if an item older
+        than since was found
+    """
+    if since is None:
+        return items, False
+    kept = []
+    for item in items:
+        reason = item.get('reason') or {}
+        if reason.get('$type') == PIN_REASON:
+            continue
+        created_at = _feed_time(item.get('post', {}).get('record', {}).get('createdAt'))
+        if reason.get('$type') == REPOST_REASON:
+            reposted_at = _feed_time(reason.get('indexedAt'))
+            if reposted_at is not None and reposted_at < since:
+                return kept, True
+            if created_at is not None and created_at >= since:
+                kept.append(item)
+            continue
+        if created_at is None:
+            continue
+        if created_at < since:
+            return kept, True
+        kept.append(item)
+    return kept, False
+
+
+def iter_author_feed_pages(handle, since=None, cursor=None, limit=100):
+    """
+    Iterate over an author's feed page by page, stopping at a time window.
+
+    Args:
+        handle: Bluesky handle
+        since: datetime (or ISO string); stop at the first post older than
+            this. Use hours_ago(24) for "the last 24 hours".
+        cursor: Optional cursor to resume from
+        limit: Posts per page (max 100)
+
+    Yields:
+        (items, next_cursor) with only the in-window feed items of each page
+    """
+    if isinstance(since, str):
+        since = parse_datetime(since)
+
+    def keep_going(items):
+        return not split_feed_window(items, since)[1]
+
+    params = {'actor': handle, 'limit': min(limit, 100)}
+    for items, next_cursor in iter_pages('app.bsky.feed.getAuthorFeed', params, 'feed',
+                                         cursor, keep_going=keep_going):
+        kept, _ = split_feed_window(items, since)
+        yield kept, next_cursor
+
+
+def iter_author_feed(handle, since=None, cursor=None, limit=100):
+    """
+    Lazily iterate over an author's posts, newest first.
+
+    Unlike get_author_feed(), this follows the cursor past the first page,
+    so busy accounts aren't truncated. With since= it stops as soon as the
+    posts fall outside the time window.
+
+    Yields:
+        Feed items (dicts with a 'post' key), see get_author_feed()
+    """
+    for items, _ in iter_author_feed_pages(handle, since, cursor, limit):
+        yield from items
+
+
 # ============================================================================
 # Utility Functions
 # ============================================================================
@@ -242,6 +780,44 @@ def parse_datetime(date_string):
     return datetime.fromisoformat(date_string.replace('Z', '+00:00'))
 
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_us(value, missing=None):
+    """
+    One timestamp as integer microseconds since the epoch (UTC).
+
+    Exact integer arithmetic, so mixed precisions and UTC offsets order
+    correctly. bluesky_timecol.epoch_us_column() converts whole columns.
+
+    Args:
+        value: ISO 8601 string, datetime (naive = UTC), or an int that is
+            already in microseconds
+        missing: Returned for None, empty or unparseable values
+
+    Returns:
+        int, or missing
+    """
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str) and value:
+        try:
+            value = parse_datetime(value)
+        except ValueError:
+            return missing
+    if not isinstance(value, datetime):
+        return missing
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def hours_ago(hours):
+    """Timezone-aware datetime for N hours before now (for since= arguments)."""
+    return datetime.now(timezone.utc) - timedelta(hours=hours)
+
+
 def is_within_hours(date_string, hours=24):
     """
     Check if a datetime string is within the last N hours.
@@ -252,6 +828,10 @@ def is_within_hours(date_string, hours=24):
 
     Returns:
         True if the datetime is within the specified window
+
+    This parses the string and reads the clock on every call; for many
+    posts at once convert createdAt with bluesky_timecol.epoch_us_column()
+    and use bluesky_timecol.within_hours() instead.
     """
     try:
         post_time = parse_datetime(date_string)
@@ -288,25 +868,37 @@ def load_senators(csv_file='senators_bluesky.csv'):
     return senators
 
 
-def save_json(data, filename):
+def save_json(data, filename, indent=None):
     """
     Save data to a JSON file.
 
     Useful for saving collected data so you don't need to re-collect.
-    Uses indent=2 for readable output.
+    Output is compact by default (these files are read by scripts); pass
+    indent=2 for a file meant for people. Names ending in .json.gz or
+    .json.zst are compressed. Records from bluesky_records.py are written
+    as plain JSON objects. Uses orjson when installed (bluesky_jsonio.py).
     """
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+    jsonio.dump(data, filename, indent=indent)
 
 
 def load_json(filename):
     """
-    Load data from a JSON file.
+    Load data from a JSON file (plain, .json.gz or .json.zst).
 
     Use this to reload previously collected data.
     """
-    with open(filename, 'r') as f:
-        return json.load(f)
+    return jsonio.load(filename)
+
+
+def load_replies(filename):
+    """
+    Load a replies_<handle>.json file with each reply as a compact Reply record.
+
+    Same structure as load_json() (a list of post dicts with a 'replies'
+    list), and the replies still support reply['handle'] / reply.get(...),
+    but they use a fraction of the memory of plain dicts.
+    """
+    return replies_from_json(load_json(filename))
 
 
 # ============================================================================
@@ -314,10 +906,44 @@ def load_json(filename):
 # You need to implement these functions for Part II.2 of the assignment.
 # ============================================================================
 
-def load_name_data(female_file='female_names.tsv.gz', male_file='male_names.tsv.gz'):
+# Titles/prefixes infer_gender() skips when looking for a first name
+NAME_TITLES = frozenset({'dr', 'mr', 'mrs', 'ms', 'prof', 'sen', 'rep', 'rev', 'jr', 'sr'})
+
+# Compiled name index used by load_name_data() (None = parse the TSV files every time)
+NAME_INDEX_FILE = 'names_index.bin'
+
+
+def load_name_data(female_file='female_names.tsv.gz', male_file='male_names.tsv.gz',
+                   index_file=NAME_INDEX_FILE):
     """
     Load SSA baby name data for gender inference.
 
+    Args:
+        female_file: Path to female names TSV (gzipped)
+        male_file: Path to male names TSV (gzipped)
+        index_file: Compiled name index (bluesky_names.py). It is built from
+            the TSV files on first use and rebuilt when their SHA-256
+            changes; later calls just memory-map it. None parses the TSV
+            files every time.
+
+    Returns:
+        A read-only mapping of lowercase name -> (female_count, male_count)
+        (a NameIndex, or a dict of [female_count, male_count] lists when
+        index_file is None or can't be written).
+    """
+    if index_file:
+        from bluesky_names import open_index
+        try:
+            return open_index(female_file, male_file, index_file)
+        except OSError:
+            pass  # e.g. a read-only directory: fall back to parsing
+    return read_name_counts(female_file, male_file)
+
+
+def read_name_counts(female_file='female_names.tsv.gz', male_file='male_names.tsv.gz'):
+    """
+    Parse the SSA baby name TSV files (what load_name_data() compiles once).
+
     Args:
         female_file: Path to female names TSV (gzipped)
         male_file: Path to male names TSV (gzipped)
@@ -428,7 +1054,7 @@ def infer_gender(display_name, name_data, threshold=0.6):
         return 'U'
 
     # Titles/prefixes to skip
-    titles = {'dr', 'mr', 'mrs', 'ms', 'prof', 'sen', 'rep', 'rev', 'jr', 'sr'}
+    titles = NAME_TITLES
 
     # Split name and skip titles
     parts = display_name.strip().split()
@@ -526,7 +1152,7 @@ if __name__ == '__main__':
     print("API helpers working correctly!")
     print("=" * 60)
     print("\nRemember:")
-    print("  - Add time.sleep(0.1) between API calls")
+    print("  - make_request() rate-limits itself (see RATE_LIMITER)")
     print("  - Handle errors gracefully (some accounts may be deleted)")
     print("  - Save intermediate results to avoid re-collecting")
     print("\nFor gender inference, you need to implement:")
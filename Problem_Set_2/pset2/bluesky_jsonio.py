@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+JSON codec behind save_json() / load_json(): fast backend, compression.
+
+The collected datasets are written once and parsed many times, and the
+standard library's encoder/decoder (plus indent=2 whitespace) becomes a
+visible share of the runtime for large feed dumps. This module picks the
+fastest available backend and handles compressed files transparently:
+
+    dump(data, 'feed_all.json.zst')            # compact, zstd-compressed
+    dump(data, 'summary.json', indent=2)       # readable
+    data = load('feed_all.json.zst')
+
+Backends:
+    orjson   used when installed (pip install orjson). Compact or indent=2
+             output; other indent widths use the standard library
+    json     standard library fallback, always available
+
+Both produce equivalent JSON for the data the collectors produce (strings,
+numbers, lists, dicts with string keys, records from bluesky_records.py),
+so files written by one load with the other. Objects orjson refuses
+(integers beyond 64 bits, non-string keys other than ints/floats/bools)
+fall back to the standard library for that call. use_backend('json')
+forces the standard library (e.g. to compare the two).
+
+Non-finite floats (NaN, Infinity) aren't valid JSON. orjson writes them as
+null, and the json backend does the same, so a file never depends on which
+backend wrote it. NaN / Infinity tokens in older files (written by plain
+json.dump) load as None with either backend. Strings holding a lone
+surrogate (which orjson refuses) are written as JSON escapes, as plain
+json.dump does.
+
+Compression is chosen by file extension:
+    .json.gz    gzip (standard library)
+    .json.zst   zstandard (compression.zstd on Python 3.14+, otherwise
+                pip install zstandard)
+    anything else: plain text
+
+Compare against the plain standard-library functions on your own data:
+
+    python bluesky_jsonio.py bench replies_schumer_senate_gov.json
+    python bluesky_jsonio.py bench --synthetic 200000
+
+Dependencies: Only uses standard library (no pip install required);
+orjson and zstandard are used when installed
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import math
+import os
+import tempfile
+import time
+
+from bluesky_records import to_jsonable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON = orjson
+
+# Compression levels: fast settings, since these files are rewritten often
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def backend():
+    """Name of the JSON backend in use ('orjson' or 'json')."""
+    return 'orjson' if orjson is not None else 'json'
+
+
+def use_backend(name):
+    """Switch to 'orjson' (if installed) or 'json'; returns the previous backend."""
+    global orjson
+    previous = backend()
+    if name == 'orjson' and _ORJSON is None:
+        raise ImportError("orjson is not installed (pip install orjson)")
+    orjson = _ORJSON if name == 'orjson' else None
+    return previous
+
+
+def compression_for(filename):
+    """'gzip', 'zstd' or None, from the file extension."""
+    if filename.endswith('.gz'):
+        return 'gzip'
+    if filename.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def _zstd():
+    # compression.zstd is in the standard library from Python 3.14
+    try:
+        from compression import zstd
+        return zstd.compress, zstd.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(".json.zst files need the zstandard package "
+                          "(pip install zstandard) or Python 3.14+") from None
+    return (lambda data, level=ZSTD_LEVEL: zstandard.ZstdCompressor(level=level).compress(data),
+            lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data))
+
+
+# ============================================================================
+# Encoding / decoding
+# ============================================================================
+
+def encode(data, indent=None):
+    """
+    Serialize data to UTF-8 JSON bytes.
+
+    Args:
+        data: JSON-compatible data (Records are written as plain objects)
+        indent: None for compact output, or the indent width
+
+    Returns:
+        bytes
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=to_jsonable, option=option)
+        except TypeError:
+            pass  # e.g. an int beyond 64 bits: let the standard library try
+    separators = (',', ':') if indent is None else None
+    try:
+        text = json.dumps(data, indent=indent, separators=separators, default=to_jsonable,
+                          ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        # NaN / Infinity somewhere: write them as null, like orjson
+        data = _finite(data)
+        text = json.dumps(data, indent=indent, separators=separators, ensure_ascii=False)
+    try:
+        return text.encode('utf-8')
+    except UnicodeEncodeError:
+        # A lone surrogate (e.g. half of an emoji cut off by truncation) has no
+        # UTF-8 form: write it as a \udcxx escape, as plain json.dump does
+        return json.dumps(data, indent=indent, separators=separators,
+                          default=to_jsonable).encode('ascii')
+
+
+def _finite(obj):
+    # A copy of obj with records as plain objects and non-finite floats as None
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    return _finite(to_jsonable(obj))
+
+
+def decode(raw):
+    """Parse JSON from bytes or str (NaN / Infinity tokens become None)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN written by plain json.dump: let the standard library try
+    return json.loads(raw, parse_constant=lambda name: None)
+
+
+# ============================================================================
+# Files
+# ============================================================================
+
+def read_bytes(filename):
+    """Raw (decompressed) bytes of a file, by its extension."""
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    kind = compression_for(filename)
+    if kind == 'gzip':
+        return gzip.decompress(raw)
+    if kind == 'zstd':
+        return _zstd()[1](raw)
+    return raw
+
+
+def write_bytes(raw, filename):
+    """Write bytes to a file, compressed according to its extension."""
+    kind = compression_for(filename)
+    if kind == 'gzip':
+        raw = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    elif kind == 'zstd':
+        raw = _zstd()[0](raw, ZSTD_LEVEL)
+    with open(filename, 'wb') as f:
+        f.write(raw)
+
+
+def dump(data, filename, indent=None):
+    """
+    Save data as JSON.
+
+    Args:
+        data: JSON-compatible data
+        filename: Target path; .gz / .zst are compressed
+        indent: None (default) for compact output, 2 for human-readable files
+    """
+    write_bytes(encode(data, indent), filename)
+
+
+def load(filename):
+    """Load JSON from a plain, .gz or .zst file."""
+    return decode(read_bytes(filename))
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _stdlib_save(data, filename):
+    # save_json() before this module
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=2, default=to_jsonable)
+
+
+def _stdlib_load(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def synthetic_replies(n_replies, replies_per_post=100):
+    """replies_<handle>.json-shaped data with n_replies replies, for benchmarking."""
+    posts = []
+    for i in range(0, n_replies, replies_per_post):
+        posts.append({
+            'post_uri': f"at://did:plc:bench/app.bsky.feed.post/{i:012d}",
+            'post_text': "Today I introduced legislation to lower costs for families. " * 2,
+            'post_createdAt': '2026-02-10T16:17:31.951Z',
+            'replyCount': replies_per_post,
+            'replies_collected': replies_per_post,
+            'replies': [{
+                'handle': f"user{i + j}.bsky.social",
+                'displayName': f"Replier Number {j} ✨",
+                'createdAt': f"2026-02-10T17:{j % 60:02d}:12.482Z",
+                'text': "Thank you for standing up for us! This matters. " * (1 + j % 3),
+                'likeCount': j % 7,
+                'followersCount': 120 + j,
+            } for j in range(min(replies_per_post, n_replies - i))],
+        })
+    return posts
+
+
+def _timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(data, repeat=3, formats=('.json', '.json.gz', '.json.zst')):
+    """
+    Time the old save_json/load_json against this codec on the same data.
+
+    Returns:
+        List of dicts with 'variant', 'save', 'load' (best of repeat, in
+        seconds) and 'bytes' on disk
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'baseline.json')
+        results.append({
+            'variant': 'stdlib json, indent=2 (old save_json/load_json)',
+            'save': _timed(lambda: _stdlib_save(data, path), repeat),
+            'load': _timed(lambda: _stdlib_load(path), repeat),
+            'bytes': os.path.getsize(path),
+        })
+        variants = [('json', '.json')] if _ORJSON is not None else []
+        variants += [(backend(), ext) for ext in formats]
+        previous = backend()
+        try:
+            for name, ext in variants:
+                use_backend(name)
+                path = os.path.join(tmp, name + ext)
+                try:
+                    dump(data, path)
+                except ImportError as e:
+                    print(f"skipping {ext}: {e}")
+                    continue
+                results.append({
+                    'variant': f"{name}, compact, {ext}",
+                    'save': _timed(lambda: dump(data, path), repeat),
+                    'load': _timed(lambda: load(path), repeat),
+                    'bytes': os.path.getsize(path),
+                })
+        finally:
+            use_backend(previous)
+    return results
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON codec for collected Bluesky data.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    bench_parser = sub.add_parser('bench', help="Compare against the standard-library functions")
+    bench_parser.add_argument('files', nargs='*', help="JSON files to combine as the test data "
+                                                      "(default: replies_*.json)")
+    bench_parser.add_argument('--synthetic', type=int, metavar='N',
+                              help="Use N synthetic replies instead of files")
+    bench_parser.add_argument('--repeat', type=int, default=3)
+
+    convert_parser = sub.add_parser('convert', help="Rewrite a JSON file in another format")
+    convert_parser.add_argument('source')
+    convert_parser.add_argument('target', help="e.g. feed_all.json.zst")
+    convert_parser.add_argument('--indent', type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        dump(load(args.source), args.target, indent=args.indent)
+        print(f"{args.source} ({os.path.getsize(args.source) / 1e6:.2f} MB) -> "
+              f"{args.target} ({os.path.getsize(args.target) / 1e6:.2f} MB)")
+    elif args.command == 'bench':
+        if args.synthetic:
+            data = synthetic_replies(args.synthetic)
+        else:
+            data = []
+            for path in args.files or sorted(glob.glob('replies_*.json')):
+                loaded = load(path)
+                if isinstance(loaded, list):
+                    data.extend(loaded)
+                elif args.files:
+                    data.append(loaded)
+        print(f"backend: {backend()}, {len(data)} top-level items, best of {args.repeat}")
+        print(f"{'variant':52s} {'save':>8s} {'load':>8s} {'MB':>8s}")
+        for r in benchmark(data, args.repeat):
+            print(f"{r['variant']:52s} {r['save']:8.3f} {r['load']:8.3f} {r['bytes'] / 1e6:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
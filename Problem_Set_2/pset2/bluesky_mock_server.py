@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Bluesky public API, for offline load tests.
+
+MockBlueskyServer is a small threaded HTTP/1.1 server implementing the
+endpoints the collectors use:
+
+    app.bsky.actor.getProfile      app.bsky.actor.getProfiles
+    app.bsky.graph.getFollows      app.bsky.feed.getAuthorFeed
+    app.bsky.feed.getPosts         app.bsky.feed.getPostThread
+
+Responses come from a recorded fixture archive (see bluesky_replay.py) when
+one is given and it has the request, and are otherwise generated by
+SyntheticBluesky: every handle gets a deterministic profile, follow list,
+post history and reply trees, so the real senators_bluesky.csv works
+unchanged and repeated runs see identical data.
+
+To make a load test realistic the server can add latency, cap page sizes
+(forcing more pagination) and inject HTTP 429 responses with Retry-After
+and ratelimit-* headers, exactly the things make_request() has to cope with.
+Larger responses are gzipped for clients that send Accept-Encoding: gzip.
+
+From Python:
+
+    import bluesky_helpers
+    from bluesky_mock_server import MockBlueskyServer
+
+    with MockBlueskyServer(latency=0.05, rate_limit_prob=0.01) as server:
+        bluesky_helpers.API_BASE = server.api_base
+        ...run a collector...
+        print(server.stats())
+
+From the command line (then run any collector in another terminal):
+
+    python bluesky_mock_server.py --port 8765 --latency 0.05 --page-size 25
+    BSKY_API_BASE=http://127.0.0.1:8765/xrpc python bluesky_part1.py
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bluesky_replay import FixtureArchive, fixture_key
+
+# The real API's budget, advertised in ratelimit-* headers
+RATE_LIMIT = 3000
+RATE_WINDOW = 300
+
+# Bodies smaller than this are sent uncompressed, like most real servers do
+GZIP_MIN_SIZE = 1024
+
+FIRST_NAMES = ['Mary', 'James', 'Linda', 'Robert', 'Susan', 'Michael', 'Karen',
+               'David', 'Emily', 'Daniel', 'Sarah', 'Thomas', 'Laura', 'Kevin',
+               'Alex', 'Jordan', 'Taylor', 'Sam']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Johnson', 'Patel', 'Brown', 'Nguyen',
+              'Miller', 'Davis', 'Lopez', 'Wilson', 'Clark']
+WORDS = ['senate', 'vote', 'today', 'bill', 'health', 'care', 'jobs', 'climate',
+         'budget', 'families', 'thank', 'you', 'we', 'must', 'act', 'now', 'the',
+         'for', 'our', 'community', 'rights', 'support', 'this', 'week']
+
+
+def _iso(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}Z"
+
+
+class SyntheticBluesky:
+    """
+    Deterministic synthetic accounts, follows, posts and threads.
+
+    Everything is derived from (seed, handle) or (seed, post uri), so any
+    handle can be looked up and the same request always gets the same answer.
+
+    Args:
+        seed: Change to get a different (but still deterministic) dataset
+        accounts: Size of the pool of followable accounts (user<N>.test)
+        follows: (min, max) accounts each handle follows
+        posts_per_day: Average posting rate
+        reposts_per_day: Average rate of reposts of other accounts' older
+            posts; they sit in the feed by repost time, out of createdAt order
+        days: How far back each author's history goes
+        max_replies: Upper bound on direct replies per post
+        now: Time the newest posts are relative to (default: startup time)
+    """
+
+    def __init__(self, seed=0, accounts=5000, follows=(20, 400), posts_per_day=4.0,
+                 days=14, max_replies=60, now=None, reposts_per_day=0.5):
+        self.seed = seed
+        self.accounts = accounts
+        self.follows_range = follows
+        self.posts_per_day = posts_per_day
+        self.reposts_per_day = reposts_per_day
+        self.days = days
+        self.max_replies = max_replies
+        self.now = now or datetime.now(timezone.utc).replace(microsecond=0)
+        self._handles = {}  # did -> handle, for resolving at:// uris
+        self._lock = threading.Lock()
+
+    def _rng(self, *parts):
+        return random.Random(':'.join(str(p) for p in (self.seed,) + parts))
+
+    def did(self, handle):
+        digest = hashlib.sha1(f"{self.seed}:{handle}".encode()).hexdigest()
+        did = f"did:plc:{digest[:24]}"
+        with self._lock:
+            self._handles[did] = handle
+        return did
+
+    def handle(self, actor):
+        """Resolve a handle or DID to a handle (unknown DIDs are kept as is)."""
+        if actor.startswith('did:'):
+            with self._lock:
+                return self._handles.get(actor, actor)
+        return actor.lower()
+
+    def profile_basic(self, handle):
+        rng = self._rng('profile', handle)
+        return {
+            'did': self.did(handle),
+            'handle': handle,
+            'displayName': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        }
+
+    def profile(self, actor):
+        handle = self.handle(actor)
+        rng = self._rng('counts', handle)
+        profile = self.profile_basic(handle)
+        profile.update({
+            'description': '',
+            'followersCount': int(rng.paretovariate(1.2) * 50),
+            'followsCount': self._follow_count(handle),
+            'postsCount': int(self.posts_per_day * self.days * rng.uniform(1, 20)),
+            'createdAt': _iso(self.now - timedelta(days=rng.randint(30, 700))),
+        })
+        return profile
+
+    def _follow_count(self, handle):
+        low, high = self.follows_range
+        return self._rng('nfollows', handle).randint(low, high)
+
+    def follows(self, actor):
+        """Everyone actor follows, as profile-basic dicts."""
+        handle = self.handle(actor)
+        rng = self._rng('follows', handle)
+        wanted = min(self._follow_count(handle), self.accounts)
+        chosen = []
+        seen = set()
+        while len(chosen) < wanted:
+            # Skewed towards low ids so popular accounts are followed by many
+            i = int(self.accounts * rng.random() ** 2)
+            if i not in seen:
+                seen.add(i)
+                chosen.append(i)
+        return [self.profile_basic(f"user{i}.test") for i in chosen]
+
+    def _text(self, rng):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 40)))
+
+    def feed(self, actor):
+        """
+        actor's posts and reposts, newest first (by the time they were
+        added), as getAuthorFeed items.
+        """
+        handle = self.handle(actor)
+        items = [(item['post']['indexedAt'], item) for item in self._own_posts(handle)]
+        rng = self._rng('reposts', handle)
+        rate = self.reposts_per_day / 86400
+        by = self.profile_basic(handle)
+        age = rng.expovariate(rate) if rate > 0 else float('inf')
+        while age < self.days * 86400:
+            reposted = self.now - timedelta(seconds=age)
+            # a post by someone else written at least a day before the repost
+            other = f"user{rng.randrange(self.accounts)}.test"
+            older = [item['post'] for item in self._own_posts(other)
+                     if item['post']['record']['createdAt'] < _iso(reposted - timedelta(days=1))]
+            if older:
+                items.append((_iso(reposted), {
+                    'post': rng.choice(older),
+                    'reason': {'$type': 'app.bsky.feed.defs#reasonRepost', 'by': by,
+                               'indexedAt': _iso(reposted)},
+                }))
+            age += rng.expovariate(rate)
+        items.sort(key=lambda pair: pair[0], reverse=True)
+        return [item for _, item in items]
+
+    def _own_posts(self, handle):
+        # handle's own posts, newest first, as getAuthorFeed items
+        handle = self.handle(handle)
+        author = self.profile_basic(handle)
+        rng = self._rng('feed', handle)
+        rate = self.posts_per_day / 86400
+        items = []
+        age = rng.expovariate(rate) if rate > 0 else float('inf')
+        i = 0
+        while age < self.days * 86400:
+            created = self.now - timedelta(seconds=age)
+            rkey = f"{handle.split('.')[0]}{i:05d}"
+            items.append({'post': {
+                'uri': f"at://{author['did']}/app.bsky.feed.post/{rkey}",
+                'cid': hashlib.sha1(rkey.encode()).hexdigest()[:32],
+                'author': author,
+                'record': {'$type': 'app.bsky.feed.post', 'text': self._text(rng),
+                           'createdAt': _iso(created)},
+                'replyCount': self._reply_count(f"at://{author['did']}/app.bsky.feed.post/{rkey}"),
+                'repostCount': rng.randint(0, 50),
+                'likeCount': rng.randint(0, 500),
+                'indexedAt': _iso(created),
+            }})
+            age += rng.expovariate(rate)
+            i += 1
+        return items
+
+    def post(self, uri):
+        """The post view for a uri from feed(), or None."""
+        parts = uri.split('/')
+        if not uri.startswith('at://') or len(parts) < 5:
+            return None
+        for item in self._own_posts(parts[2]):
+            if item['post']['uri'] == uri:
+                return item['post']
+        return None
+
+    def _reply_count(self, uri):
+        return int(self._rng('nreplies', uri).random() ** 3 * self.max_replies)
+
+    def _post(self, uri, handle, created, rng):
+        return {
+            'uri': uri,
+            'author': self.profile_basic(handle),
+            'record': {'$type': 'app.bsky.feed.post', 'text': self._text(rng),
+                       'createdAt': _iso(created)},
+            'replyCount': 0,
+            'likeCount': rng.randint(0, 20),
+        }
+
+    def thread(self, uri, depth=6):
+        """getPostThread response for uri (None for malformed uris)."""
+        parts = uri.split('/')
+        if not uri.startswith('at://') or len(parts) < 5:
+            return None
+        rng = self._rng('thread', uri)
+        root_handle = self.handle(parts[2])
+        root_created = self.now - timedelta(seconds=rng.uniform(0, self.days * 86400))
+        root = {'$type': 'app.bsky.feed.defs#threadViewPost',
+                'post': self._post(uri, root_handle, root_created, rng)}
+        root['post']['replyCount'] = self._reply_count(uri)
+
+        # Explicit stack so deep threads don't recurse
+        queue = [(root, root['post']['replyCount'], 1, root_created)]
+        while queue:
+            node, n_replies, level, parent_created = queue.pop()
+            if level > depth:
+                continue
+            node['replies'] = []
+            for k in range(n_replies):
+                reply_uri = f"{node['post']['uri']}-r{k}"
+                created = parent_created + timedelta(seconds=rng.expovariate(1 / 3600))
+                replier = f"user{int(self.accounts * rng.random() ** 2)}.test"
+                child = {'$type': 'app.bsky.feed.defs#threadViewPost',
+                         'post': self._post(reply_uri, replier, created, rng)}
+                node['replies'].append(child)
+                queue.append((child, int(rng.random() ** 4 * 4), level + 1, created))
+        return {'thread': root}
+
+
+class MockBlueskyServer:
+    """
+    Threaded local HTTP server answering Bluesky API requests.
+
+    Args:
+        host, port: Where to listen (port 0 picks a free port)
+        data: SyntheticBluesky instance (default: SyntheticBluesky())
+        fixtures: Optional fixture archive path served before synthetic data
+        latency: Seconds added to every response
+        jitter: Extra random latency, uniform in [0, jitter]
+        page_size: Maximum items per page, whatever 'limit' asks for
+        rate_limit_every: Answer every Nth request with 429 (0 = never)
+        rate_limit_prob: Probability of answering any request with 429
+        retry_after: Seconds advertised in Retry-After on injected 429s
+        compress: Gzip responses for clients that accept it
+        seed: Seed for jitter and 429 injection
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, data=None, fixtures=None, latency=0.0,
+                 jitter=0.0, page_size=100, rate_limit_every=0, rate_limit_prob=0.0,
+                 retry_after=1, compress=True, seed=0):
+        self.data = data or SyntheticBluesky(seed=seed)
+        self.fixtures = FixtureArchive(fixtures) if fixtures else None
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after = retry_after
+        self.compress = compress
+
+        self.requests = Counter()  # endpoint -> requests
+        self.statuses = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_count = 0
+
+        handler = type('Handler', (_Handler,), {'server_state': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_base(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/xrpc"
+
+    def start(self):
+        """Serve in a background thread; returns self."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                                        name='bsky-mock-server')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {'requests': dict(self.requests),
+                    'statuses': {str(k): v for k, v in self.statuses.items()}}
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+
+    def _admit(self, endpoint):
+        """Count the request; returns (throttled, ratelimit headers)."""
+        with self._lock:
+            self.requests[endpoint] += 1
+            now = time.time()
+            if now - self._window_start >= RATE_WINDOW:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            n = sum(self.requests.values())
+            throttled = ((self.rate_limit_every and n % self.rate_limit_every == 0) or
+                         (self.rate_limit_prob and self._rng.random() < self.rate_limit_prob))
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            # An injected 429 is a short burst limit: it resets after
+            # retry_after, not at the end of the window
+            reset = (int(now) + self.retry_after if throttled
+                     else int(self._window_start + RATE_WINDOW))
+            headers = {
+                'ratelimit-limit': str(RATE_LIMIT),
+                'ratelimit-remaining': str(0 if throttled else
+                                           max(RATE_LIMIT - self._window_count, 0)),
+                'ratelimit-reset': str(reset),
+                'ratelimit-policy': f"{RATE_LIMIT};w={RATE_WINDOW}",
+            }
+        if delay:
+            time.sleep(delay)
+        return bool(throttled), headers
+
+    def _page(self, items, params, key):
+        limit = min(int(params.get('limit', 50)), self.page_size)
+        start = int(params.get('cursor') or 0)
+        body = {key: items[start:start + limit]}
+        if start + limit < len(items):
+            body['cursor'] = str(start + limit)
+        return body
+
+    def handle(self, path):
+        """
+        Answer one GET request path.
+
+        Returns:
+            (status, headers dict, body bytes)
+        """
+        parts = urllib.parse.urlsplit(path)
+        endpoint = parts.path.rstrip('/').rsplit('/', 1)[-1]
+        throttled, headers = self._admit(endpoint)
+        headers['Content-Type'] = 'application/json'
+
+        if throttled:
+            headers['Retry-After'] = str(self.retry_after)
+            return 429, headers, json.dumps(
+                {'error': 'RateLimitExceeded', 'message': 'Rate Limit Exceeded'}).encode()
+
+        if self.fixtures is not None:
+            recorded = self.fixtures.lookup(fixture_key(path))
+            if recorded:
+                status, pairs, body, _ = recorded[-1]
+                headers.update((k, v) for k, v in pairs if k.lower() != 'connection')
+                return status, headers, body
+
+        multi = urllib.parse.parse_qs(parts.query)
+        params = {k: v[0] for k, v in multi.items()}
+        try:
+            body = self._synthetic(endpoint, params, multi)
+        except (KeyError, ValueError) as e:
+            return 400, headers, json.dumps(
+                {'error': 'InvalidRequest', 'message': str(e)}).encode()
+        if body is None:
+            return 404, headers, json.dumps(
+                {'error': 'NotFound', 'message': f"Unknown endpoint {endpoint}"}).encode()
+        return 200, headers, json.dumps(body, separators=(',', ':')).encode()
+
+    def _synthetic(self, endpoint, params, multi):
+        data = self.data
+        if endpoint == 'app.bsky.actor.getProfile':
+            return data.profile(params['actor'])
+        if endpoint == 'app.bsky.actor.getProfiles':
+            return {'profiles': [data.profile(a) for a in multi['actors'][:25]]}
+        if endpoint == 'app.bsky.graph.getFollows':
+            body = self._page(data.follows(params['actor']), params, 'follows')
+            body['subject'] = data.profile_basic(data.handle(params['actor']))
+            return body
+        if endpoint == 'app.bsky.feed.getAuthorFeed':
+            return self._page(data.feed(params['actor']), params, 'feed')
+        if endpoint == 'app.bsky.feed.getPosts':
+            posts = (data.post(uri) for uri in multi['uris'][:25])
+            return {'posts': [p for p in posts if p is not None]}
+        if endpoint == 'app.bsky.feed.getPostThread':
+            thread = data.thread(params['uri'], depth=int(params.get('depth', 6)))
+            if thread is None:
+                raise ValueError(f"Invalid uri: {params['uri']}")
+            return thread
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    server_state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        state = self.server_state
+        status, headers, body = state.handle(self.path)
+        with state._lock:
+            state.statuses[status] += 1
+        if (state.compress and len(body) >= GZIP_MIN_SIZE
+                and 'gzip' in self.headers.get('Accept-Encoding', '')):
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Bluesky API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', help="Fixture archive to serve (bluesky_replay.py)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--accounts', type=int, default=5000,
+                        help="Size of the synthetic account pool")
+    parser.add_argument('--reposts-per-day', type=float, default=0.5,
+                        help="Reposts of older posts per author per day")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds per response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency")
+    parser.add_argument('--page-size', type=int, default=100, help="Max items per page")
+    parser.add_argument('--rate-limit-every', type=int, default=0,
+                        help="Answer every Nth request with 429")
+    parser.add_argument('--rate-limit-prob', type=float, default=0.0,
+                        help="Probability of answering a request with 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--no-compress', action='store_true',
+                        help="Never gzip responses")
+    args = parser.parse_args(argv)
+
+    server = MockBlueskyServer(
+        host=args.host, port=args.port, fixtures=args.fixtures,
+        data=SyntheticBluesky(seed=args.seed, accounts=args.accounts,
+                              reposts_per_day=args.reposts_per_day),
+        latency=args.latency, jitter=args.jitter, page_size=args.page_size,
+        rate_limit_every=args.rate_limit_every, rate_limit_prob=args.rate_limit_prob,
+        retry_after=args.retry_after, compress=not args.no_compress, seed=args.seed)
+    print(f"Serving a mock Bluesky API at {server.api_base}")
+    print(f"  BSKY_API_BASE={server.api_base} python bluesky_part1.py")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Precompiled, memory-mapped index of the SSA baby-name counts.
+
+Parsing female_names.tsv.gz / male_names.tsv.gz (about 2 million
+name/count/year rows) takes seconds on every start of the gender
+analysis. compile_index() aggregates them once into a small binary file:
+
+    header    magic, byte order, name width, name count, SHA-256 of both sources
+    names     sorted lowercase names, UTF-8, NUL-padded to a fixed width
+    female    int32 count per name (all years summed)
+    male      int32 count per name
+
+NameIndex maps that file read-only and looks names up by binary search
+over the fixed-width name table (remembering the names it has looked up),
+so opening it takes milliseconds and the pages are shared between
+processes. It behaves like the dict that
+load_name_data() used to build:
+
+    names = open_index('female_names.tsv.gz', 'male_names.tsv.gz')
+    'mary' in names                 # True
+    female, male = names['jordan']
+    names.get('xxx_user_123')       # None
+
+open_index() recompiles the index whenever the SHA-256 of either source
+file differs from the one recorded in the header (hashing the two gzip
+files takes a few milliseconds), so replacing the data files is enough.
+
+    python bluesky_names.py build           # compile (or recompile) now
+    python bluesky_names.py info
+
+Dependencies: Only uses standard library (no pip install required);
+NameIndex.arrays() needs numpy
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+DEFAULT_INDEX_FILE = 'names_index.bin'
+
+MAGIC = b'BSKYNAM1'
+
+# magic, byte order of the count arrays ('<' or '>'), name width, name count,
+# SHA-256 of the female and male source files
+HEADER = struct.Struct('<8scxxxII32s32s')
+
+_BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+_INT32_MAX = 2 ** 31 - 1
+
+
+def file_hash(path):
+    """SHA-256 digest (bytes) of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _align(offset, size=4):
+    return (offset + size - 1) // size * size
+
+
+class _FixedWidthNames(Sequence):
+    # The sorted name table as a sequence of NUL-padded bytes, for bisect
+
+    def __init__(self, buf, offset, width, count):
+        self._buf = buf
+        self._offset = offset
+        self._width = width
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start = self._offset + i * self._width
+        return self._buf[start:start + self._width]
+
+
+class NameIndex(Mapping):
+    """
+    Read-only name -> (female_count, male_count) mapping over a compiled index.
+
+    Args:
+        path: Index file written by compile_index()
+
+    Raises:
+        ValueError: if the file is not a name index for this platform
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            raise ValueError(f"{path} is not a name index")
+        magic, order, width, count, female_hash, male_hash = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or order != _BYTE_ORDER:
+            raise ValueError(f"{path} is not a name index for this platform")
+        self.width = width
+        self.source_hashes = (female_hash, male_hash)
+        self._names = _FixedWidthNames(self._mm, HEADER.size, width, count)
+        counts = _align(HEADER.size + width * count)
+        if len(self._mm) != counts + 8 * count:
+            raise ValueError(f"{path} is truncated")
+        self._view = memoryview(self._mm)
+        self.female = self._view[counts:counts + 4 * count].cast('i')
+        self.male = self._view[counts + 4 * count:counts + 8 * count].cast('i')
+        self.offsets = {'names': HEADER.size, 'female': counts, 'male': counts + 4 * count}
+        # name -> position (or -1) of names looked up so far; display names
+        # repeat a lot, and `name in index` is usually followed by index[name]
+        self._positions = {}
+
+    def _find(self, name):
+        # Position of name in the table, or -1
+        i = self._positions.get(name)
+        if i is not None:
+            return i
+        key = name.encode('utf-8')
+        i = -1
+        if len(key) <= self.width:
+            key = key.ljust(self.width, b'\0')
+            j = bisect_left(self._names, key)
+            if j < len(self._names) and self._names[j] == key:
+                i = j
+        self._positions[name] = i
+        return i
+
+    def __getitem__(self, name):
+        i = self._find(name)
+        if i < 0:
+            raise KeyError(name)
+        return (self.female[i], self.male[i])
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self._find(name) >= 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        for key in self._names:
+            yield key.rstrip(b'\0').decode('utf-8')
+
+    def arrays(self):
+        """
+        The index as NumPy arrays (zero-copy views of the mapped file; needs numpy).
+
+        Returns:
+            (names, female, male): a sorted fixed-width bytes array ('S<width>')
+            and two int32 count arrays
+        """
+        import numpy as np
+        count = len(self._names)
+        names = np.frombuffer(self._mm, dtype=f'S{self.width}', count=count,
+                              offset=self.offsets['names'])
+        female = np.frombuffer(self._mm, dtype=np.int32, count=count,
+                               offset=self.offsets['female'])
+        male = np.frombuffer(self._mm, dtype=np.int32, count=count,
+                             offset=self.offsets['male'])
+        return names, female, male
+
+    def close(self):
+        self.female.release()
+        self.male.release()
+        self._view.release()
+        self._mm.close()
+
+
+def compile_index(counts, path=DEFAULT_INDEX_FILE, source_hashes=(b'', b'')):
+    """
+    Write a name index.
+
+    Args:
+        counts: Dict of lowercase name -> (female_count, male_count)
+        path: Index file to write (replaced atomically)
+        source_hashes: SHA-256 digests of the female and male source files
+
+    Returns:
+        path
+    """
+    keys = sorted(name.encode('utf-8') for name in counts)
+    width = max(map(len, keys), default=1)
+    female = array('i')
+    male = array('i')
+    for key in keys:
+        f, m = counts[key.decode('utf-8')]
+        female.append(min(f, _INT32_MAX))
+        male.append(min(m, _INT32_MAX))
+
+    header = HEADER.pack(MAGIC, _BYTE_ORDER, width, len(keys), *source_hashes)
+    names = b''.join(key.ljust(width, b'\0') for key in keys)
+    padding = b'\0' * (_align(len(header) + len(names)) - len(header) - len(names))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.names_index.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header + names + padding)
+            female.tofile(f)
+            male.tofile(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def open_index(female_file, male_file, path=DEFAULT_INDEX_FILE):
+    """
+    Open the name index for these source files, compiling it if needed.
+
+    The index is (re)built when it is missing, unreadable, or was compiled
+    from files with a different SHA-256.
+
+    Returns:
+        NameIndex
+    """
+    hashes = (file_hash(female_file), file_hash(male_file))
+    if os.path.exists(path):
+        try:
+            index = NameIndex(path)
+        except ValueError:
+            index = None
+        if index is not None and index.source_hashes == hashes:
+            return index
+        if index is not None:
+            index.close()
+
+    from bluesky_helpers import read_name_counts
+    compile_index(read_name_counts(female_file, male_file), path, hashes)
+    return NameIndex(path)
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compiled index of the SSA name counts.")
+    parser.add_argument('--female', default='female_names.tsv.gz')
+    parser.add_argument('--male', default='male_names.tsv.gz')
+    parser.add_argument('--index', default=DEFAULT_INDEX_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help="Compile the index from the TSV files")
+    sub.add_parser('info', help="Show the index and whether it is current")
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        from bluesky_helpers import read_name_counts
+        hashes = (file_hash(args.female), file_hash(args.male))
+        compile_index(read_name_counts(args.female, args.male), args.index, hashes)
+    index = NameIndex(args.index)
+    current = (os.path.exists(args.female) and os.path.exists(args.male)
+               and index.source_hashes == (file_hash(args.female), file_hash(args.male)))
+    print(f"{args.index}: {len(index)} names, width {index.width}, "
+          f"{os.path.getsize(args.index) / 1e6:.2f} MB, "
+          f"{'current' if current else 'STALE (sources changed or missing)'}")
+
+
+if __name__ == '__main__':
+    main()
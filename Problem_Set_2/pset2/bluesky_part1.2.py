@@ -2,9 +2,18 @@ import json
 import pandas as pd
 from bluesky_helpers import save_json
 
+# Read the follow lists from this SQLite datastore (bluesky_store.py) instead
+# of senator_follows_map.json; None to use the JSON file
+DATASTORE = None
+
 # 1. Load the follow data collected in Part I.1
-with open("senator_follows_map.json", "r") as f:
-    senator_follows = json.load(f)
+if DATASTORE:
+    from bluesky_store import DataStore
+    with DataStore(DATASTORE) as store:
+        senator_follows = store.follows_map()
+else:
+    with open("senator_follows_map.json", "r") as f:
+        senator_follows = json.load(f)
 
 # Get the list of all senator handles from the keys of your JSON
 all_senator_handles = set(senator_follows.keys())
@@ -113,6 +122,6 @@ def identify_extremes():
 if __name__ == "__main__":
     # Run the full pipeline
     results = generate_recommendations()
-    save_json(results, "senator_recommendations.json")
+    save_json(results, "senator_recommendations.json", indent=2)
     create_report_table(results)
     identify_extremes()
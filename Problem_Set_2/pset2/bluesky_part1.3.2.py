@@ -6,10 +6,18 @@ from scipy.cluster.hierarchy import linkage, leaves_list
 from scipy.spatial.distance import squareform
 from bluesky_helpers import load_senators
 
+# Read follows and feed URIs from this SQLite datastore (bluesky_store.py)
+# instead of the JSON files; None to use the JSON files
+DATASTORE = None
+
 # 1. Load your data
 
 
 def load_data():
+    if DATASTORE:
+        from bluesky_store import DataStore
+        with DataStore(DATASTORE) as store:
+            return store.follows_map(), store.feed_uris()
     with open("senator_follows_map.json", "r") as f:
         follows = json.load(f)
     with open("senator_post_uris_24h.json", "r") as f:
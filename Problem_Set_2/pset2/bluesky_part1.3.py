@@ -1,68 +1,140 @@
-import time
 import json
-from bluesky_helpers import get_author_feed, is_within_hours, save_json
+import os
+from bluesky_helpers import hours_ago, iter_author_feed_pages, parse_datetime, save_json
+from bluesky_checkpoint import CheckpointJournal
+from bluesky_crawl_plan import CrawlPlan
+from bluesky_budget import CrawlBudget
 
 # Load your existing follow map
 with open("senator_follows_map.json", "r") as f:
     senator_follows = json.load(f)
 
+# Each author's URIs (and the cursor of every page fetched so far) are
+# journaled here so an interrupted run resumes where it stopped
+CHECKPOINT_FILE = "feed_uris_checkpoint.jsonl"
 
-def collect_senator_feed_uris():
-    """Aggregates all post URIs seen by each senator in the last 24 hours."""
-    senator_feeds_content = {}
+# Stop starting new authors after this many seconds (None = no limit); the
+# most-followed authors come first and a rerun fetches the rest
+BUDGET_SECONDS = None
 
-    # We cache author feeds so we don't fetch the same person 50 times
-    # (Multiple senators likely follow the same popular accounts)
-    author_cache = {}
+# Instead of polling every author, keep the 24h window current from a
+# Jetstream-style post-event stream (bluesky_stream.py): an NDJSON file or
+# "tcp://host:port". senator_post_uris_24h.json is rewritten every
+# STREAM_SNAPSHOT_EVERY seconds while events arrive. None = poll as before.
+STREAM_SOURCE = None
+STREAM_FOLLOW = False  # keep tailing the file as another process appends to it
+STREAM_SNAPSHOT_EVERY = 60
+STREAM_STATE_FILE = "feed_stream_state.json"
 
-    for senator, followed_list in senator_follows.items():
-        print(f"Processing feed for: {senator}...")
-        all_uris = set()
+# Also store each senator's 24h URIs in this SQLite datastore (bluesky_store.py)
+# after polling; None to skip
+DATASTORE = None
 
-        for handle in followed_list:
-            if handle not in author_cache:
-                try:
-                    cursor = None
-                    uris = []
-                    stop = False
 
-                    while True:
-                        feed = get_author_feed(
-                            handle, limit=100, cursor=cursor)
-                        if not feed or 'feed' not in feed:
-                            break
+def pass_window_start(journal, hours=24):
+    """Start of this pass's window, journaled so a resumed pass keeps the same one."""
+    since = journal.get('window')
+    if since is None:
+        since = hours_ago(hours).isoformat()
+        journal.record(('window',), since)
+    return parse_datetime(since)
 
-                        for item in feed.get('feed', []):
-                            created_at = item['post']['record']['createdAt']
-                            if is_within_hours(created_at, 24):
-                                uris.append(item['post']['uri'])
-                            else:
-                                stop = True
-                                break
 
-                        if stop:
-                            break
+def fetch_author_uris(handle, journal, since):
+    """Collect an author's post URIs since the window start, resuming from a journaled cursor."""
+    entry = journal.entry('author', handle)
+    uris = list(entry['data']) if entry else []
+    cursor = entry['cursor'] if entry else None
 
-                        cursor = feed.get('cursor')
-                        if not cursor:
-                            break
+    # Pages stop as soon as posts fall outside the window
+    for items, cursor in iter_author_feed_pages(handle, since=since, cursor=cursor):
+        uris.extend(item['post']['uri'] for item in items)
 
-                        time.sleep(0.15)
+        # Page done: remember where to pick up if we get interrupted
+        if cursor:
+            journal.record(('author', handle), uris, cursor=cursor, complete=False)
 
-                    author_cache[handle] = uris
-                    time.sleep(0.15)
-                except Exception:
-                    author_cache[handle] = []
+    # No sleep needed: make_request() is rate-limited
+    journal.record(('author', handle), uris)
+    return uris
 
-            all_uris.update(author_cache[handle])
 
-        senator_feeds_content[senator] = list(all_uris)
+def collect_senator_feed_uris(checkpoint_file=CHECKPOINT_FILE, budget_seconds=BUDGET_SECONDS):
+    """Aggregates all post URIs seen by each senator in the last 24 hours."""
+    # Multiple senators follow the same popular accounts, so the plan
+    # fetches every followed author exactly once (most-followed first).
+    # The journal keeps the fetched URIs and survives restarts.
+    plan = CrawlPlan(senator_follows)
+    print(plan.report())
+    journal = CheckpointJournal(checkpoint_file)
+    # Every author in a pass (including one resumed part-way) shares one window
+    since = pass_window_start(journal)
+    budget = CrawlBudget(seconds=budget_seconds) if budget_seconds is not None else None
+
+    failed = 0
+    for i, handle in enumerate(plan.authors, 1):
+        if journal.is_complete('author', handle):
+            continue
+        if budget is not None and budget.exhausted():
+            break
+        if i % 100 == 0:
+            print(f"[{i}/{len(plan.authors)}] authors fetched...")
+        try:
+            fetch_author_uris(handle, journal, since)
+        except Exception:
+            # Not journaled as done (e.g. PaginationError): the next run retries it
+            # from the last page that came back
+            failed += 1
+    if failed:
+        print(f"{failed} author feeds failed; rerun to retry them")
+
+    author_uris = {handle: journal.get('author', handle) for handle in plan.authors
+                   if journal.is_complete('author', handle)}
+    left = len(plan.authors) - len(author_uris)
+    if budget is not None:
+        print(f"{budget.summary()}; {left} authors left for the next run")
+    senator_feeds_content = {}
+    for senator, posts in plan.fan_out(author_uris).items():
+        senator_feeds_content[senator] = list({uri for _, uri in posts})
 
     save_json(senator_feeds_content, "senator_post_uris_24h.json")
+    if DATASTORE:
+        from bluesky_store import DataStore
+        with DataStore(DATASTORE) as store:
+            for senator, uris in senator_feeds_content.items():
+                store.replace_feed(senator, uris)
+    # Every author is done: the next run starts a fresh pass with a new window
+    if not left:
+        journal.reset()
+    journal.close()
     return senator_feeds_content
 
 
+def stream_senator_feed_uris(source=STREAM_SOURCE, follow=STREAM_FOLLOW,
+                             every=STREAM_SNAPSHOT_EVERY, state_file=STREAM_STATE_FILE):
+    """Maintain senator_post_uris_24h.json from an event stream instead of polling."""
+    from bluesky_stream import RollingFeeds, consume, iter_events, resolve_dids
+
+    # Events identify authors by DID: look the followed handles up once (cached)
+    plan = CrawlPlan(senator_follows)
+    feeds = RollingFeeds(senator_follows, resolve_dids(plan.authors))
+    if state_file and os.path.exists(state_file):
+        feeds.load_state(state_file)
+    try:
+        consume(feeds, iter_events(source, follow=follow),
+                "senator_post_uris_24h.json", every=every, state_file=state_file)
+    except KeyboardInterrupt:
+        feeds.save_uris("senator_post_uris_24h.json")
+        if state_file:
+            feeds.save_state(state_file)
+    print(feeds.stats())
+    return feeds.uri_snapshot()
+
+
 if __name__ == "__main__":
     print("Starting data collection...")
-    collect_senator_feed_uris()
+    if STREAM_SOURCE:
+        stream_senator_feed_uris()
+    else:
+        collect_senator_feed_uris()
     print("Data collection complete!")
@@ -1,64 +1,221 @@
+import asyncio
 import pandas as pd
-import time
-import json
-from datetime import datetime, timezone, timedelta
-from bluesky_helpers import get_follows, get_author_feed, is_within_hours, save_json
+from functools import partial
+from bluesky_helpers import TELEMETRY, PaginationError, hours_ago, save_json, to_epoch_us
+from bluesky_async import AsyncBlueskyClient
+from bluesky_budget import CrawlBudget
+from bluesky_checkpoint import CheckpointJournal
+from bluesky_crawl_plan import CrawlPlan
+from bluesky_shard import merge_journals, remove_shard_files, run_sharded, shard_path
+from bluesky_telemetry import ProgressLine
 
 # 1. Load the Senator Data
 df = pd.read_csv('/Users/tadcarney/Desktop/s&ds_3350/pset2/senators_bluesky.csv')
 
-def collect_feeds():
-    all_follow_data = {}
+# How many API requests may be in flight at once
+MAX_IN_FLIGHT = 8
+
+# Every finished unit (a senator's follows, an author's 24h feed) is journaled
+# here so an interrupted run resumes where it stopped. Delete the file to start over.
+CHECKPOINT_FILE = "feeds_checkpoint.jsonl"
+
+# Per-endpoint request telemetry is appended here every 30s (None to disable)
+TELEMETRY_FILE = "feeds_telemetry.jsonl"
+
+# Worker processes for the author feeds (1 = fetch everything in this process).
+# Authors are split across the workers by a stable hash of the handle; the
+# workers share one request budget (bluesky_shard.py) and each journals to its
+# own feeds_checkpoint.shard<i>of<n>.jsonl, merged back into CHECKPOINT_FILE at the end
+WORKERS = 1
+
+# Stop starting new author fetches after this many seconds (None = no limit).
+# Authors go most-followed first; the rest are fetched by the next (resumed)
+# run. `python bluesky_budget.py --budget 45m` estimates what fits.
+BUDGET_SECONDS = None
+
+# Also upsert the follow lists and feeds into this SQLite datastore
+# (bluesky_store.py) for the analysis scripts to query; None to skip
+DATASTORE = None
+
+async def fetch_author_feed(client, journal, account, progress_line=None):
+    # Fetch one author's full 24h window (all pages, not just the first
+    # 50 posts) and journal it as soon as it finishes. A failed page raises
+    # PaginationError before anything is journaled, so the next run retries it
+    posts = []
+    async for item in client.iter_author_feed(account, since=hours_ago(24)):
+        post = item.get('post', {})
+        posts.append({
+            'text': post.get('record', {}).get('text'),
+            'createdAt': post.get('record', {}).get('createdAt'),
+            'uri': post.get('uri')
+        })
+    journal.record(('author', account), posts)
+    if progress_line is not None:
+        progress_line.update()
+
+async def fetch_author_feeds(accounts, journal, max_in_flight=MAX_IN_FLIGHT, progress_line=None,
+                             budget=None):
+    # max_in_flight workers take the authors in order (most-followed first), so
+    # when the budget runs out it's the least-followed authors that are left
+    remaining = iter(accounts)
+    failed = []
+    
+    async def worker(client):
+        for account in remaining:
+            if budget is not None and budget.exhausted():
+                return
+            try:
+                await fetch_author_feed(client, journal, account, progress_line)
+            except PaginationError:
+                failed.append(account)
+    
+    async with AsyncBlueskyClient(max_in_flight=max_in_flight) as client:
+        await asyncio.gather(*(worker(client) for _ in range(max_in_flight)))
+    if failed:
+        print(f"{len(failed)} author feeds failed; rerun to retry them")
+    return failed
+
+def fetch_author_shard(shard, n_shards, accounts, checkpoint_file=CHECKPOINT_FILE,
+                       max_in_flight=MAX_IN_FLIGHT, telemetry_file=TELEMETRY_FILE,
+                       budget_seconds=None):
+    # Runs in a worker process: fetch this shard's authors into the shard's own journal
+    budget = CrawlBudget(seconds=budget_seconds) if budget_seconds is not None else None
+    if telemetry_file:
+        TELEMETRY.start_dump(shard_path(telemetry_file, shard, n_shards), interval=30)
+    path = shard_path(checkpoint_file, shard, n_shards)
+    with CheckpointJournal(path) as journal:
+        todo = [account for account in accounts if not journal.is_complete('author', account)]
+        asyncio.run(fetch_author_feeds(todo, journal, max_in_flight, budget=budget))
+    if telemetry_file:
+        TELEMETRY.stop_dump()
+    print(f"[shard {shard + 1}/{n_shards}] {len(todo)} author feeds\n{TELEMETRY.summary()}")
+    return path
+
+async def fetch_follows(client, journal, senator_handle, senator_name, progress):
+    # One senator's complete follow list, journaled as soon as it finishes
+    if not journal.is_complete('follows', senator_handle):
+        try:
+            follows = await client.get_all_follows(senator_handle)
+        except PaginationError as e:
+            # Left out (and not journaled) so a truncated list is never used
+            print(f"Follows: {senator_name} ({senator_handle}) failed: {e}; rerun to retry")
+            return
+        journal.record(('follows', senator_handle), [f['handle'] for f in follows])
+    progress[0] += 1
+    print(f"[{progress[0]}/{len(df)}] Follows: {senator_name} ({senator_handle})")
+
+async def collect_follows(journal, max_in_flight=MAX_IN_FLIGHT):
+    # --- I.1.a: Retrieve Follows (with Pagination) ---
+    # Senators are paginated concurrently; the client's semaphore keeps at
+    # most max_in_flight requests open
+    progress = [0]
+    async with AsyncBlueskyClient(max_in_flight=max_in_flight) as client:
+        await asyncio.gather(*(fetch_follows(client, journal, row['handle'], row['name'], progress)
+                               for _, row in df.iterrows()))
+    
+    # Store follows for Part I.3 Jaccard Similarity (in CSV order)
+    return {handle: journal.get('follows', handle) for handle in df['handle']
+            if journal.is_complete('follows', handle)}
+
+def collect_author_feeds_sharded(plan, journal, workers, max_in_flight=MAX_IN_FLIGHT,
+                                 telemetry_file=TELEMETRY_FILE, budget=None):
+    checkpoint_file = journal.path
+    # Authors finished by an earlier run (in-process or with another worker count)
+    done = {key[1] for key in merge_journals(checkpoint_file, ('author',))}
+    todo = [account for account in plan.authors if account not in done]
+    print(f"Fetching {len(todo)} author feeds in {workers} processes "
+          f"({len(plan.authors) - len(todo)} already done)")
+    run_sharded(partial(fetch_author_shard, checkpoint_file=checkpoint_file,
+                        max_in_flight=max_in_flight, telemetry_file=telemetry_file,
+                        budget_seconds=budget.remaining_seconds() if budget else None),
+                todo, workers)
+    
+    # Fold the shard journals back into the main one (shards hold disjoint
+    # authors, so the merge doesn't depend on which worker finished first)
+    for key, posts in merge_journals(checkpoint_file, ('author',)).items():
+        if not journal.is_complete(*key):
+            journal.record(key, posts)
+    remove_shard_files(checkpoint_file)
+
+def collect_feeds(max_in_flight=MAX_IN_FLIGHT, checkpoint_file=CHECKPOINT_FILE,
+                  progress=True, telemetry_file=TELEMETRY_FILE, workers=WORKERS,
+                  budget_seconds=BUDGET_SECONDS):
+    budget = CrawlBudget(seconds=budget_seconds) if budget_seconds is not None else None
+    if telemetry_file:
+        TELEMETRY.start_dump(telemetry_file, interval=30)
+    journal = CheckpointJournal(checkpoint_file)
+    if len(journal):
+        print(f"Resuming from {checkpoint_file} ({len(journal)} units already done)")
+    
+    all_follow_data = asyncio.run(collect_follows(journal, max_in_flight))
+    
+    # Save global follow mapping
+    save_json(all_follow_data, "senator_follows_map.json")
+    if DATASTORE:
+        from bluesky_store import DataStore
+        with DataStore(DATASTORE) as store:
+            for senator, followed in all_follow_data.items():
+                store.replace_follows(senator, followed)
+    
+    # --- I.1.b: Fetch 24-hour Feeds ---
+    # Popular accounts are followed by many senators: fetch every
+    # followed author once and fan the posts out afterwards
+    plan = CrawlPlan(all_follow_data)
+    print(plan.report())
+    
+    if workers > 1:
+        collect_author_feeds_sharded(plan, journal, workers, max_in_flight, telemetry_file, budget)
+    else:
+        todo = [account for account in plan.authors
+                if not journal.is_complete('author', account)]
+        print(f"Fetching {len(todo)} author feeds ({len(plan.authors) - len(todo)} already done)")
+        progress_line = ProgressLine(len(todo), TELEMETRY, label="Author feeds") if progress else None
+        asyncio.run(fetch_author_feeds(todo, journal, max_in_flight, progress_line, budget))
+        if progress_line is not None:
+            progress_line.close()
+    
+    # Authors not reached within the budget are left out until a later run fetches them
+    author_posts = {account: journal.get('author', account) for account in plan.authors
+                    if journal.is_complete('author', account)}
+    left = len(plan.authors) - len(author_posts)
+    if budget is not None:
+        print(f"{budget.summary()}; {left} authors left for the next run")
+    feeds = plan.fan_out(author_posts)
+    store = None
+    if DATASTORE:
+        from bluesky_store import DataStore
+        store = DataStore(DATASTORE)
     
-    # Iterate through the DataFrame rows
     for index, row in df.iterrows():
         senator_handle = row['handle']
-        senator_name = row['name']
+        if senator_handle not in feeds:
+            continue  # follows failed to load; the next run collects this senator
         
-        print(f"[{index+1}/{len(df)}] Processing: {senator_name} ({senator_handle})")
+        # Append post + senator metadata for easier analysis later
+        senator_combined_feed = [{
+            'senator_handle': senator_handle,
+            'senator_party': row['party'], # Accessing columns from the CSV
+            'author': account,
+            **post
+        } for account, post in feeds[senator_handle]]
         
-        # --- I.1.a: Retrieve Follows (with Pagination) ---
-        followed_handles = []
-        cursor = None
-        while True:
-            result = get_follows(senator_handle, limit=100, cursor=cursor)
-            if not result: break
-            
-            followed_handles.extend([f['handle'] for f in result.get('follows', [])])
-            cursor = result.get('cursor')
-            if not cursor: break
-            time.sleep(0.1)
-        
-        # Store follows for Part I.3 Jaccard Similarity
-        all_follow_data[senator_handle] = followed_handles
-        
-        # --- I.1.b: Fetch 24-hour Feed ---
-        senator_combined_feed = []
-        for account in followed_handles:
-            feed_data = get_author_feed(account)
-            if feed_data and 'feed' in feed_data:
-                for item in feed_data['feed']:
-                    post = item.get('post', {})
-                    created_at = post.get('record', {}).get('createdAt')
-                    
-                    if created_at and is_within_hours(created_at, hours=24):
-                        # Append post + senator metadata for easier analysis later
-                        senator_combined_feed.append({
-                            'senator_handle': senator_handle,
-                            'senator_party': row['party'], # Accessing columns from the CSV
-                            'author': account,
-                            'text': post.get('record', {}).get('text'),
-                            'createdAt': created_at,
-                            'uri': post.get('uri')
-                        })
-            time.sleep(0.1)
-
         # Sort and Save individual feed
-        senator_combined_feed.sort(key=lambda x: x['createdAt'], reverse=True)
+        senator_combined_feed.sort(key=lambda p: to_epoch_us(p['createdAt'], 0), reverse=True)
         save_json(senator_combined_feed, f"feed_{senator_handle.replace('.', '_')}.json")
-        
-    # Save global follow mapping
-    save_json(all_follow_data, "senator_follows_map.json")
+        if store is not None:
+            store.replace_feed(senator_handle, senator_combined_feed)
+    
+    if store is not None:
+        store.close()
+    # Every senator's follows and every author's feed are done: the next run
+    # starts a fresh pass instead of reusing this one's windows
+    if not left and len(all_follow_data) == len(df):
+        journal.reset()
+        remove_shard_files(checkpoint_file)
+    journal.close()
+    if telemetry_file:
+        TELEMETRY.stop_dump()
+    print(TELEMETRY.summary())
 
 if __name__ == "__main__":
-    collect_feeds()
\ No newline at end of file
+    collect_feeds()
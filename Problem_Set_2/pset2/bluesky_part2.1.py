@@ -1,11 +1,21 @@
 #!/usr/bin/env python3
 
 
-import time
+import asyncio
+import os
+from functools import partial
 from bluesky_helpers import(
-    load_senators, get_author_feed, get_post_thread, 
-    is_within_hours, save_json
+    load_senators, hours_ago, parse_datetime, save_json, load_json, POSTS_BATCH_SIZE,
+    PaginationError, to_epoch_us
 )
+from bluesky_async import AsyncBlueskyClient
+from bluesky_budget import CrawlBudget
+from bluesky_checkpoint import CheckpointJournal
+from bluesky_profiles import ProfileHydrator
+from bluesky_records import Post, Reply, replies_from_json
+from bluesky_shard import remove_shard_files, run_sharded, shard_path
+from bluesky_threads import ThreadTableWriter, iter_thread_rows
+from bluesky_watermark import WatermarkStore
 
 ## what to do:
 ## collect relplies to senatos posts (at least 5 female and 5 male senators)
@@ -13,67 +23,280 @@ from bluesky_helpers import(
 ## for each post with replies, fetch the reply thread
 ## extract replier information (handle, display name, timestamp) and post metadata (reply count)
 ## save the data in jason for ecah senator
+## (the full nested reply tree of every thread also goes to thread_rows_<handle>.csv)
+## posts and replies are kept as compact Post / Reply records, not whole API dicts
+## reruns are incremental: only posts newer than last time are fetched, and only threads
+## whose replyCount changed are re-pulled and merged into the existing replies_<handle>.json
+
+## how many API requests may be in flight at once
+MAX_IN_FLIGHT = 8
+
+## every fetched post list / thread is journaled here so an interrupted run
+## resumes where it stopped (it is cleared once every senator is done)
+CHECKPOINT_FILE = 'replies_checkpoint.jsonl'
+
+## newest post seen + reply counts per senator, for incremental reruns
+## (set INCREMENTAL = False or delete the file to recollect the whole window).
+## not named replies_*.json: the analysis scripts read every file matching that as a senator's replies
+INCREMENTAL = True
+WATERMARK_FILE = 'reply_watermarks.json'
+OLD_WATERMARK_FILE = 'replies_watermarks.json'
+
+## 7 days = 168 hours
+WINDOW_HOURS = 168
+
+## worker processes (1 = everything in this process). senators are split across them by a
+## stable hash of the handle; they share one request budget (bluesky_shard.py), each writes
+## its own senators' files and journals/watermarks to *.shard<i>of<n>.* files merged at the end
+WORKERS = 1
+
+## stop starting new senators after this many seconds (None = no limit); the rest are
+## collected by the next run (`python bluesky_budget.py --collector replies` estimates the cost)
+BUDGET_SECONDS = None
+
+## add follower/follows/post counts to every replier (one getProfiles call per 25 repliers)
+ENRICH_REPLIERS = True
+
+## also write each senator's posts/replies to this columnar store (bluesky_columnar.py,
+## needs numpy) so the analysis can load just the columns it needs; None to skip
+COLUMN_STORE = None
+
+## also upsert each senator's posts/replies (and repliers' profile counts) into this
+## SQLite datastore (bluesky_store.py); None to skip. Shard workers can share the file
+DATASTORE = None
 
 
 ## load senators
 senators = load_senators('senators_bluesky.csv')
 
 
-## fetch posts for each senator in the sample
-for senator in senators:
-    posts = []
-    cursor = None
-    while True:
-        result = get_author_feed(senator['handle'], limit=100, cursor=cursor)
-        if not result or 'feed' not in result:
-            break
-        for item in result['feed']:
-            created_at = item['post']['record'].get('createdAt')
-            if is_within_hours(created_at, hours=168):  # 7 days = 168 hours
-                posts.append(item)
-            else:
-                break  # posts are chronological, so we can stop
-        cursor = result.get('cursor')
-        if not cursor:
-            break
-        ## break in API calls to avoid rate limits
-        time.sleep(0.1)
-
- #fetch reply threads for each post
-    senator_data = []
-    for item in posts:
-        post = item['post']
-        reply_count = post.get('replyCount', 0)
-        if reply_count == 0:
-            continue  # skip posts with no replies
-        
-        uri = post['uri']
-        thread = get_post_thread(uri)
-        time.sleep(0.1)
-        
-        if not thread or 'thread' not in thread:
-            continue
-        
-        # Extract replier info from the thread
-        replies = []
-        for reply in thread['thread'].get('replies', []):
-            reply_post = reply.get('post', {})
-            replies.append({
-                'handle': reply_post.get('author', {}).get('handle'),
-                'displayName': reply_post.get('author', {}).get('displayName'),
-                'createdAt': reply_post.get('record', {}).get('createdAt'),
-                'text': reply_post.get('record', {}).get('text'),
-                'likeCount': reply_post.get('likeCount', 0),
-            })
-        
-        senator_data.append({
-            'post_uri': uri,
-            'post_text': post['record'].get('text'),
-            'post_createdAt': post['record'].get('createdAt'),
-            'replyCount': reply_count,       # total replies (important!)
-            'replies_collected': len(replies), # how many we actually got
-            'replies': replies,
-        })
-
-    save_json(senator_data, f"replies_{senator['handle'].replace('.', '_')}.json")
+async def fetch_recent_posts(client, senator, journal, since, marks=None):
+    ## fetch posts for the senator (pagination has to stay sequential)
+    entry = journal.entry('posts', senator['handle'])
+    posts = [Post.from_dict(p) for p in entry['data']] if entry else []
+    cursor = entry['cursor'] if entry else None
+    # posts are chronological, so paging stops at the first post older than since
+    async for items, cursor in client.iter_author_feed_pages(
+            senator['handle'], since=since, cursor=cursor):
+        posts.extend(Post.from_api(item) for item in items)
+        if cursor:
+            journal.record(('posts', senator['handle']), posts, cursor=cursor, complete=False)
+        if marks is not None:
+            marks.set_cursor(senator['handle'], cursor)
+
+    journal.record(('posts', senator['handle']), posts)
+    return posts
+
+
+async def refresh_posts(client, senator, uris, journal):
+    ## current counts of posts collected on an earlier run (getPosts, 25 per request)
+    if journal.is_complete('counts', senator['handle']):
+        return [Post.from_dict(p) for p in journal.get('counts', senator['handle'])]
+    batches = [uris[i:i + POSTS_BATCH_SIZE] for i in range(0, len(uris), POSTS_BATCH_SIZE)]
+    results = await asyncio.gather(*(client.get_posts(batch) for batch in batches))
+    posts = [Post.from_api(p) for result in results if result for p in result.get('posts', [])]
+    ## only journal a complete set of counts; after a failed batch the next run asks again
+    if all(result is not None for result in results):
+        journal.record(('counts', senator['handle']), posts)
+    return posts
+
+
+async def fetch_post_replies(client, senator, post, journal, tree_writer):
+    uri = post['uri']
+    thread = await client.get_post_thread(uri)
+
+    if not thread or 'thread' not in thread:
+        ## not journaled: the senator stays unfinished and the next run retries the thread
+        return
+
+    # Keep every nested reply (depth=50 was already paid for), not just the top level
+    tree_writer.write_rows(iter_thread_rows(thread))
+    
+    # Extract replier info from the thread
+    # (handle, displayName, createdAt, text, likeCount of each direct reply)
+    replies = [Reply.from_api(reply) for reply in thread['thread'].get('replies', [])]
+    
+    journal.record(('thread', senator['handle'], uri), {
+        'post_uri': uri,
+        'post_text': post['text'],
+        'post_createdAt': post['createdAt'],
+        'replyCount': post.get('replyCount', 0),       # total replies (important!)
+        'replies_collected': len(replies), # how many we actually got
+        'replies': replies,
+    })
+
+
+def enrich_repliers(senator_data, hydrator):
+    ## look up every replier's profile in batches and copy the counts onto the replies
+    ## (replies merged from an earlier run already have them)
+    handles = {r['handle'] for post in senator_data for r in post['replies']
+               if r['handle'] and 'followersCount' not in r}
+    profiles = hydrator.hydrate(handles)
+    for post in senator_data:
+        for reply in post['replies']:
+            if reply['handle'] not in handles:
+                continue
+            profile = profiles.get(reply['handle'])
+            if not profile:
+                continue
+            reply['followersCount'] = profile.get('followersCount')
+            reply['followsCount'] = profile.get('followsCount')
+            reply['postsCount'] = profile.get('postsCount')
+            if not reply.get('displayName'):
+                reply['displayName'] = profile.get('displayName')
+
+
+async def collect_senator_replies(client, senator, journal, hydrator=None, marks=None):
+    handle = senator['handle']
+    filename = f"replies_{handle.replace('.', '_')}.json"
+    window_start = hours_ago(WINDOW_HOURS)
+
+    ## on a rerun, start from the existing dataset and the senator's high-water mark
+    previous = {}
+    known = {}
+    since = window_start
+    if marks is not None and os.path.exists(filename) and marks.since(handle):
+        previous = {post['post_uri']: post for post in load_json(filename)}
+        known = marks.known_posts(handle)
+        since = max(window_start, marks.since(handle))
+
+    if journal.is_complete('posts', handle):
+        new_posts = [Post.from_dict(p) for p in journal.get('posts', handle)]
+    else:
+        new_posts = await fetch_recent_posts(client, senator, journal, since, marks)
+
+    ## posts from earlier runs still in the window: refetch a thread only if its count moved
+    fresh = [post for post in new_posts if post['uri'] not in known]
+    refreshed = [post for post in new_posts if post['uri'] in known]
+    new_uris = {post['uri'] for post in new_posts}
+    stale = [uri for uri, (created_at, _) in known.items()
+             if uri not in new_uris and parse_datetime(created_at) >= window_start]
+    if stale:
+        refreshed += await refresh_posts(client, senator, stale, journal)
+    changed = [post for post in refreshed if post['replyCount'] != known[post['uri']][1]]
+    if previous:
+        print(f"{handle}: {len(fresh)} new posts, {len(changed)} of "
+              f"{len(refreshed)} earlier posts changed replyCount")
+
+    #fetch reply threads for each post (concurrently, the client bounds in-flight requests)
+    posts = [post for post in fresh + changed if post.get('replyCount', 0) > 0]
+    todo = [post for post in posts
+            if not journal.is_complete('thread', handle, post['uri'])]
+    with ThreadTableWriter(f"thread_rows_{handle.replace('.', '_')}.csv") as tree_writer:
+        await asyncio.gather(
+            *(fetch_post_replies(client, senator, post, journal, tree_writer) for post in todo))
+    failed = [post for post in todo if not journal.is_complete('thread', handle, post['uri'])]
+
+    ## merge: re-pulled threads replace their old version, new ones are added,
+    ## and posts that have aged out of the window are dropped
+    merged = dict(previous)
+    for post in posts:
+        post_data = journal.get('thread', handle, post['uri'])
+        if post_data is not None:
+            merged[post['uri']] = post_data
+    start_us = to_epoch_us(window_start)
+    in_window = [post for post in merged.values()
+                 if to_epoch_us(post.get('post_createdAt'), start_us) >= start_us]
+    senator_data = sorted(in_window, key=lambda p: to_epoch_us(p.get('post_createdAt'), 0),
+                          reverse=True)
+    replies_from_json(senator_data)
+
+    if hydrator is not None:
+        await asyncio.to_thread(enrich_repliers, senator_data, hydrator)
+
+    save_json(senator_data, filename)
+    if COLUMN_STORE:
+        from bluesky_columnar import ColumnStore
+        ColumnStore(COLUMN_STORE).write_senator(handle, senator_data)
+    if DATASTORE:
+        from bluesky_store import DataStore
+        with DataStore(DATASTORE) as store:
+            store.upsert_senator_replies(handle, senator_data)
+
+    if failed:
+        ## save what came back, but leave the watermarks and the senator unfinished
+        print(f"{handle}: {len(failed)} reply threads failed; rerun to retry them")
+        return False
+
+    if marks is not None:
+        ## the dataset now reflects these counts; the newest post is the new high-water mark
+        seen = new_posts + refreshed
+        marks.remember_posts(handle, [(p['uri'], p['createdAt'], p['replyCount']) for p in seen],
+                             window_start=window_start)
+        newest = max((p for p in new_posts if p['createdAt']),
+                     key=lambda p: p['createdAt'], default=None)
+        if newest is not None:
+            marks.advance(handle, newest['createdAt'], newest['uri'])
+        marks.set_cursor(handle, None)
+    journal.record(('senator', handle))
+    return True
+
+
+async def collect_all(senator_list, checkpoint_file, watermark_file=None, budget_seconds=None):
+    journal = CheckpointJournal(checkpoint_file)
+    marks = WatermarkStore(watermark_file) if watermark_file else None
+    ## shared across senators so repliers who reply to several senators are looked up once
+    hydrator = ProfileHydrator() if ENRICH_REPLIERS else None
+    budget = CrawlBudget(seconds=budget_seconds) if budget_seconds is not None else None
+    left = 0
+    async with AsyncBlueskyClient(max_in_flight=MAX_IN_FLIGHT) as client:
+        for senator in senator_list:
+            if journal.is_complete('senator', senator['handle']):
+                continue
+            if budget is not None and budget.exhausted():
+                left += 1
+                continue
+            try:
+                done = await collect_senator_replies(client, senator, journal, hydrator, marks)
+            except PaginationError as e:
+                ## the posts fetched so far are journaled with their cursor
+                print(f"{senator['handle']}: {e}; rerun to resume")
+                done = False
+            if not done:
+                left += 1
+    if budget is not None:
+        print(f"{budget.summary()}; {left} senators left for the next run")
+    ## every senator is done: the next run starts a fresh pass (incremental or not)
+    if not left:
+        journal.reset()
+    journal.close()
+    if hydrator is not None:
+        print(f"Replier profiles: {hydrator.stats()}")
+    return left
+
+
+def collect_shard(shard, n_shards, senator_list, budget_seconds=None):
+    ## runs in a worker process: its own journal, and a copy of the watermarks to update
+    watermark_file = None
+    if INCREMENTAL:
+        watermark_file = shard_path(WATERMARK_FILE, shard, n_shards)
+        if not os.path.exists(watermark_file) and os.path.exists(WATERMARK_FILE):
+            WatermarkStore(watermark_file).merge(WATERMARK_FILE)
+    left = asyncio.run(collect_all(senator_list, shard_path(CHECKPOINT_FILE, shard, n_shards),
+                                   watermark_file, budget_seconds))
+    print(f"[shard {shard + 1}/{n_shards}] {len(senator_list) - left} senators done")
+    return watermark_file, left
+
+
+def main():
+    if INCREMENTAL and os.path.exists(OLD_WATERMARK_FILE) and not os.path.exists(WATERMARK_FILE):
+        os.replace(OLD_WATERMARK_FILE, WATERMARK_FILE)
+    if WORKERS <= 1:
+        asyncio.run(collect_all(senators, CHECKPOINT_FILE, WATERMARK_FILE if INCREMENTAL else None,
+                                BUDGET_SECONDS))
+        return
+    results = run_sharded(partial(collect_shard, budget_seconds=BUDGET_SECONDS),
+                          senators, WORKERS, key=lambda s: s['handle'])
+    if INCREMENTAL:
+        ## each shard only moved its own senators' marks, so the merge order doesn't matter
+        marks = WatermarkStore(WATERMARK_FILE)
+        for watermark_file, _ in results:
+            marks.merge(watermark_file)
+        remove_shard_files(WATERMARK_FILE)
+    ## keep the shard journals while any senator is unfinished, so the next run resumes
+    if not any(left for _, left in results):
+        remove_shard_files(CHECKPOINT_FILE)
+
 
+if __name__ == '__main__':
+    main()
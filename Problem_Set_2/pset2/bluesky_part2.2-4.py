@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # %%
 from bluesky_helpers import (
-    load_name_data, infer_gender, load_json, load_senators, parse_datetime
+    load_name_data, load_json, load_senators
 )
 # for reading in json files
 import os
@@ -10,10 +10,37 @@ import matplotlib.pyplot as plt
 import numpy as np
 from scipy.stats import chi2_contingency
 
+from bluesky_gender import GenderCache
+from bluesky_timecol import epoch_us_column, group_rank, quantile_bins
+
+# Read posts/replies from this SQLite datastore (bluesky_store.py) instead of
+# the replies_<handle>.json files; None to use the JSON files
+DATASTORE = None
+store = None
+if DATASTORE:
+    from bluesky_store import DataStore
+    store = DataStore(DATASTORE)
+
+# Gender labels are memoized per display name (bluesky_gender.py): every stage
+# below reuses them, and this SQLite file keeps them for the next run; None to
+# keep them in memory for this run only
+GENDER_CACHE = 'gender_cache.sqlite'
+
+
+def load_senator_replies(handle):
+    """A senator's replies_<handle>.json data (from the datastore if set); None if missing."""
+    if store is not None:
+        return store.senator_replies(handle)
+    try:
+        return load_json(f"replies_{handle.replace('.', '_')}.json")
+    except FileNotFoundError:
+        return None
+
 
 # %%
 # 1. Load SSA name data
 name_data = load_name_data()
+gender_cache = GenderCache(name_data, GENDER_CACHE)
 
 # 2. Load senator info (so we know each senator's gender)
 senators = load_senators('senators_bluesky.csv')
@@ -22,30 +49,30 @@ senator_gender = {s['handle']: s['gender'] for s in senators}
 # 3. Load all reply JSON files and run gender inference
 results = {}  # senator_handle -> list of inferred genders
 
-reply_files = [f for f in os.listdir('.') if f.startswith(
-    'replies_') and f.endswith('.json')]
+if store is not None:
+    reply_data = (store.senator_replies(h) for h in store.reply_senators())
+else:
+    reply_files = [f for f in os.listdir('.') if f.startswith(
+        'replies_') and f.endswith('.json')]
+    # only senator files are lists of posts (skips e.g. an old replies_watermarks.json)
+    reply_data = (data for data in map(load_json, reply_files) if isinstance(data, list))
 
 total_repliers = 0
 classified_f = 0
 classified_m = 0
 classified_u = 0
 
-for filename in reply_files:
-    data = load_json(filename)
+for data in reply_data:
+    # classify each file's display names in one batch (same labels as infer_gender)
+    replies = [reply for post in data for reply in post['replies']]
+    genders = gender_cache.labels([reply.get('displayName', '') for reply in replies])
+    for reply, gender in zip(replies, genders.tolist()):
+        reply['inferred_gender'] = gender  # store it for later use
 
-    for post in data:
-        for reply in post['replies']:
-            display_name = reply.get('displayName', '')
-            gender = infer_gender(display_name, name_data)
-            reply['inferred_gender'] = gender  # store it for later use
-
-            total_repliers += 1
-            if gender == 'F':
-                classified_f += 1
-            elif gender == 'M':
-                classified_m += 1
-            else:
-                classified_u += 1
+    total_repliers += len(replies)
+    classified_f += int((genders == 'F').sum())
+    classified_m += int((genders == 'M').sum())
+    classified_u += int((genders == 'U').sum())
 
 # 4. Report classification results
 classified = classified_f + classified_m
@@ -72,24 +99,16 @@ counts = {
 
 for senator in senators:
     handle = senator['handle']
-    filename = f"replies_{handle.replace('.', '_')}.json"
-
-    try:
-        data = load_json(filename)
-    except FileNotFoundError:
+    data = load_senator_replies(handle)
+    if data is None:
         continue
 
     sen_gender = senator['gender']
 
-    for post in data:
-        for reply in post['replies']:
-            display_name = reply.get('displayName', '')
-            g = infer_gender(display_name, name_data)
-
-            if g == 'F':
-                counts[sen_gender]['female_repliers'] += 1
-            elif g == 'M':
-                counts[sen_gender]['male_repliers'] += 1
+    genders = gender_cache.labels([reply.get('displayName', '')
+                                   for post in data for reply in post['replies']])
+    counts[sen_gender]['female_repliers'] += int((genders == 'F').sum())
+    counts[sen_gender]['male_repliers'] += int((genders == 'M').sum())
 
 # Baseline
 p_female = classified_f / classified
@@ -214,10 +233,8 @@ high_reply_senators = {}  # track who gets 200+ replies
 
 for senator in senators:
     handle = senator['handle']
-    filename = f"replies_{handle.replace('.', '_')}.json"
-    try:
-        data = load_json(filename)
-    except FileNotFoundError:
+    data = load_senator_replies(handle)
+    if data is None:
         continue
 
     for post in data:
@@ -234,6 +251,22 @@ print(f"\nSenators with 200+ reply posts:")
 for handle, count in sorted(high_reply_senators.items(), key=lambda x: -x[1]):
     print(f"  {handle}: {count} post(s)")
 
+# Reply order within each post: createdAt is converted once to epoch
+# microseconds (comparing the strings misorders mixed offsets/precisions)
+qualifying_replies = [reply for post in qualifying_posts for reply in post['replies']]
+reply_post = np.repeat(np.arange(len(qualifying_posts)),
+                       [len(post['replies']) for post in qualifying_posts])
+reply_ts = epoch_us_column([reply.get('createdAt') for reply in qualifying_replies])
+reply_rank, reply_count = group_rank(reply_ts, reply_post)
+reply_genders = gender_cache.labels([reply.get('displayName', '')
+                                    for reply in qualifying_replies]).tolist()
+
+# every display name after the first pass should have come from the cache
+cache_stats = gender_cache.stats()
+print(f"\nGender cache: {cache_stats['lookups']} lookups, {cache_stats['inferred']} inferred, "
+      f"hit rate {cache_stats['hit_rate']:.1%} ({cache_stats['memory_hits']} memory, "
+      f"{cache_stats['disk_hits']} disk)")
+
 # %%
 # 2. Split replies into early 25% and late 25%, compare
 early_genders = {'F': 0, 'M': 0, 'U': 0}
@@ -243,30 +276,21 @@ late_lengths = []
 early_likes = []
 late_likes = []
 
-for post in qualifying_posts:
-    replies = post['replies']
+# first 25% and last 25% of each post's replies, by time
+early = np.flatnonzero(reply_rank < reply_count // 4)
+late = np.flatnonzero(reply_rank >= reply_count - reply_count // 4)
 
-    # Sort by timestamp
-    sorted_replies = sorted(replies, key=lambda r: r.get('createdAt', ''))
+for i in early:
+    reply = qualifying_replies[i]
+    early_genders[reply_genders[i]] += 1
+    early_lengths.append(len(reply.get('text', '')))
+    early_likes.append(reply.get('likeCount', 0))
 
-    n = len(sorted_replies)
-    cutoff_25 = n // 4  # first 25%
-    cutoff_75 = n - (n // 4)  # last 25%
-
-    early = sorted_replies[:cutoff_25]
-    late = sorted_replies[cutoff_75:]
-
-    for reply in early:
-        g = infer_gender(reply.get('displayName', ''), name_data)
-        early_genders[g] += 1
-        early_lengths.append(len(reply.get('text', '')))
-        early_likes.append(reply.get('likeCount', 0))
-
-    for reply in late:
-        g = infer_gender(reply.get('displayName', ''), name_data)
-        late_genders[g] += 1
-        late_lengths.append(len(reply.get('text', '')))
-        late_likes.append(reply.get('likeCount', 0))
+for i in late:
+    reply = qualifying_replies[i]
+    late_genders[reply_genders[i]] += 1
+    late_lengths.append(len(reply.get('text', '')))
+    late_likes.append(reply.get('likeCount', 0))
 
 # %%
 # 3. Report results
@@ -359,21 +383,13 @@ bin_gender_counts = [{'F': 0, 'M': 0, 'U': 0} for _ in range(n_bins)]
 bin_lengths = [[] for _ in range(n_bins)]
 bin_likes = [[] for _ in range(n_bins)]
 
-for post in qualifying_posts:
-    replies = post['replies']
-    sorted_replies = sorted(replies, key=lambda r: r.get('createdAt', ''))
-    n = len(sorted_replies)
-    if n == 0:
-        continue
-
-    for idx, reply in enumerate(sorted_replies):
-        frac = (idx + 0.5) / n
-        bin_index = min(int(frac * n_bins), n_bins - 1)
+# bin of each reply: (rank + 0.5) / n of the way through its post's replies
+reply_bins = quantile_bins(reply_ts, reply_post, n_bins)
 
-        g = infer_gender(reply.get('displayName', ''), name_data)
-        bin_gender_counts[bin_index][g] += 1
-        bin_lengths[bin_index].append(len(reply.get('text', '')))
-        bin_likes[bin_index].append(reply.get('likeCount', 0))
+for reply, bin_index, g in zip(qualifying_replies, reply_bins, reply_genders):
+    bin_gender_counts[bin_index][g] += 1
+    bin_lengths[bin_index].append(len(reply.get('text', '')))
+    bin_likes[bin_index].append(reply.get('likeCount', 0))
 
 # 1) Gender composition across bins (classified only)
 fig, ax = plt.subplots(figsize=(7, 4))
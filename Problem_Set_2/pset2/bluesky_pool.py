@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Keep-alive HTTP connection pool used by make_request().
+
+urllib.request.urlopen() opens a new TCP + TLS connection for every call.
+ConnectionPool keeps finished HTTP/1.1 connections open and hands them out
+again, so a long crawl against public.api.bsky.app only pays the handshake
+once per pooled connection instead of once per request.
+
+    pool = ConnectionPool(maxsize=10)
+    status, headers, body, wire_bytes = pool.request('https://public.api.bsky.app/xrpc/...')
+    print(pool.stats())
+
+Compression:
+    Requests ask for gzip/deflate (Accept-Encoding). Compressed responses are
+    decompressed chunk by chunk while they are read off the socket, so the
+    compressed body is never held in memory as a whole; request() returns
+    the decoded body plus the number of bytes that actually crossed the wire.
+
+Stale sockets:
+    The server may close an idle keep-alive connection at any time. If a
+    *reused* connection fails before a response arrives, the pool discards it
+    and retries the request on the next idle connection, or on a freshly
+    opened one. Failures on a fresh connection are raised to the caller.
+
+Counters:
+    Every connection tracks how many requests it served and how long its
+    handshake took. pool.stats() aggregates these so you can compare the
+    handshake time actually paid with the time saved by reusing connections.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import http.client
+import itertools
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import deque
+
+# Default number of idle connections kept open per host
+DEFAULT_POOL_SIZE = 10
+
+# Errors that mean a reused keep-alive socket was closed by the server.
+# Timeouts are OSErrors too but are never treated as stale.
+STALE_ERRORS = (OSError, http.client.HTTPException)
+
+# Encodings we ask the server for, and how many bytes to read at a time
+ACCEPT_ENCODING = 'gzip, deflate'
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ContentDecodingError(http.client.HTTPException):
+    """A compressed response body could not be decompressed."""
+
+
+class _DeflateDecoder:
+    """
+    'deflate' should be zlib-wrapped, but some servers send a raw deflate
+    stream; try the former and fall back to the latter on the first chunk.
+    """
+
+    def __init__(self):
+        self._obj = zlib.decompressobj()
+        self._first = True
+
+    def decompress(self, data):
+        if self._first:
+            self._first = False
+            try:
+                return self._obj.decompress(data)
+            except zlib.error:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._obj.decompress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+def _decoder(content_encoding):
+    """Incremental decompressor for a Content-Encoding, or None for identity."""
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _DeflateDecoder()
+    return None
+
+
+def read_body(response):
+    """
+    Read a response body, decompressing it as it streams in.
+
+    Returns:
+        (body, wire_bytes): the decoded body as a bytearray (json.loads
+        accepts it directly) and the number of bytes received
+    """
+    encoding = response.getheader('Content-Encoding')
+    decoder = _decoder(encoding)
+    body = bytearray()
+    wire_bytes = 0
+    try:
+        while True:
+            chunk = response.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            wire_bytes += len(chunk)
+            body += decoder.decompress(chunk) if decoder else chunk
+        if decoder:
+            body += decoder.flush()
+    except zlib.error as e:
+        raise ContentDecodingError(f"Bad {encoding} response body: {e}") from e
+    return body, wire_bytes
+
+
+class PooledConnection:
+    """
+    One keep-alive connection plus its reuse counters.
+
+    Attributes:
+        id: Sequential connection id (unique within the pool)
+        requests: Number of requests sent on this connection
+        handshake_time: Seconds spent in connect() (TCP + TLS)
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, scheme, host, port, timeout):
+        conn_class = (http.client.HTTPSConnection if scheme == 'https'
+                      else http.client.HTTPConnection)
+        self.id = next(self._ids)
+        self.conn = conn_class(host, port, timeout=timeout)
+        self.requests = 0
+        self.created = time.time()
+
+        start = time.perf_counter()
+        self.conn.connect()
+        self.handshake_time = time.perf_counter() - start
+
+    def close(self):
+        self.conn.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTP(S) connections.
+
+    Args:
+        maxsize: Maximum number of idle connections kept per host. More
+            connections may be opened when many threads request at once;
+            the extras are closed instead of being returned to the pool.
+    """
+
+    def __init__(self, maxsize=DEFAULT_POOL_SIZE, accept_encoding=ACCEPT_ENCODING):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.accept_encoding = accept_encoding
+        self._idle = {}  # (scheme, host, port) -> deque of PooledConnection
+        self._lock = threading.Lock()
+
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.stale_reconnects = 0
+        self.handshake_time = 0.0
+        self._closed_connections = []  # (id, requests) for retired connections
+
+    def _get(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                pooled = idle.pop()
+                self.connections_reused += 1
+                pooled.conn.timeout = timeout
+                if pooled.conn.sock is not None:
+                    pooled.conn.sock.settimeout(timeout)
+                return pooled
+
+        pooled = PooledConnection(*key, timeout=timeout)
+        with self._lock:
+            self.connections_opened += 1
+            self.handshake_time += pooled.handshake_time
+        return pooled
+
+    def _put(self, key, pooled):
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.maxsize:
+                idle.append(pooled)
+                return
+        self._retire(pooled)
+
+    def _retire(self, pooled):
+        pooled.close()
+        with self._lock:
+            self._closed_connections.append((pooled.id, pooled.requests))
+
+    def request(self, url, headers=None, timeout=None):
+        """
+        Send a GET request over a pooled connection.
+
+        Args:
+            url: Absolute http(s) URL including the query string
+            headers: Optional dict of request headers
+            timeout: Socket timeout in seconds
+
+        Returns:
+            (status, headers, body, wire_bytes) where headers is an
+            http.client.HTTPMessage, body is the decompressed response body
+            (a bytearray) and wire_bytes the size actually received
+
+        Raises:
+            OSError / http.client.HTTPException on network failures
+            (ContentDecodingError for a corrupt compressed body)
+        """
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        headers = dict(headers or {})
+        if self.accept_encoding:
+            headers.setdefault('Accept-Encoding', self.accept_encoding)
+
+        while True:
+            pooled = self._get(key, timeout)
+            reused = pooled.requests > 0
+            try:
+                pooled.requests += 1
+                pooled.conn.request('GET', path, headers=headers)
+                response = pooled.conn.getresponse()
+                body, wire_bytes = read_body(response)
+            except STALE_ERRORS as e:
+                self._retire(pooled)
+                if not reused or isinstance(e, (TimeoutError, ContentDecodingError)):
+                    raise
+                # Server closed the idle socket: reconnect and try once more
+                with self._lock:
+                    self.stale_reconnects += 1
+                continue
+            except BaseException:
+                self._retire(pooled)
+                raise
+
+            if response.will_close:
+                self._retire(pooled)
+            else:
+                self._put(key, pooled)
+            return response.status, response.headers, body, wire_bytes
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle = [p for conns in self._idle.values() for p in conns]
+            self._idle.clear()
+        for pooled in idle:
+            self._retire(pooled)
+
+    def connection_stats(self):
+        """
+        Per-connection reuse counters.
+
+        Returns:
+            List of dicts with 'id', 'requests' and 'open' for every
+            connection this pool has created
+        """
+        with self._lock:
+            rows = [{'id': p.id, 'requests': p.requests, 'open': True}
+                    for conns in self._idle.values() for p in conns]
+            rows += [{'id': cid, 'requests': n, 'open': False}
+                     for cid, n in self._closed_connections]
+        return sorted(rows, key=lambda r: r['id'])
+
+    def stats(self):
+        """
+        Aggregate pool counters.
+
+        'handshake_time_saved' estimates the connect time avoided by reuse:
+        reused requests times the average handshake actually paid.
+        """
+        with self._lock:
+            opened = self.connections_opened
+            avg_handshake = self.handshake_time / opened if opened else 0.0
+            return {
+                'pool_size': self.maxsize,
+                'connections_opened': opened,
+                'connections_reused': self.connections_reused,
+                'stale_reconnects': self.stale_reconnects,
+                'idle_connections': sum(len(c) for c in self._idle.values()),
+                'handshake_time': self.handshake_time,
+                'avg_handshake_time': avg_handshake,
+                'handshake_time_saved': self.connections_reused * avg_handshake,
+            }
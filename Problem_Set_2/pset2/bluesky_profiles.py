@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Batched profile hydration via app.bsky.actor.getProfiles.
+
+get_profile() costs one request per account. ProfileHydrator collects
+lookups from any number of callers (threads, async tasks, loops) and sends
+them as getProfiles requests of up to 25 actors, so enriching thousands of
+repliers costs about 1/25th of the requests.
+
+    hydrator = ProfileHydrator()
+    profiles = hydrator.hydrate(handles)        # handle -> profile or None
+
+    # or from many threads at once; lookups are coalesced into full batches
+    future = hydrator.submit('someone.bsky.social')
+    profile = future.result()
+
+Partial failures:
+    getProfiles silently omits accounts that don't exist; those resolve to
+    None. If a whole batch is rejected with 400 (e.g. one malformed handle),
+    the batch is split in half and retried until the bad actors are
+    isolated, so one broken handle doesn't cost the other 24 profiles. A
+    batch lost to a timeout, dropped connection or 5xx (already retried by
+    make_request) is not split: its lookups resolve to None, so an outage
+    costs one request per batch rather than dozens.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import threading
+from concurrent.futures import Future
+
+from bluesky_helpers import PROFILES_BATCH_SIZE, get_profiles, last_request_outcome
+
+# How long a partial batch waits for more lookups before it is sent anyway
+DEFAULT_MAX_WAIT = 0.05
+
+
+class ProfileHydrator:
+    """
+    Coalesces profile lookups into getProfiles batches.
+
+    Args:
+        batch_size: Actors per request (max 25)
+        max_wait: Seconds a partial batch from submit() waits for more
+            lookups before being sent
+
+    Attributes:
+        requests: getProfiles requests sent
+        found: Profiles returned
+        missing: Lookups that resolved to None
+        splits: Rejected (400) batches that were split to isolate bad actors
+        failed: Batches lost to timeouts, connection errors or 5xx
+    """
+
+    def __init__(self, batch_size=PROFILES_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        self.batch_size = min(batch_size, PROFILES_BATCH_SIZE)
+        self.max_wait = max_wait
+        self._futures = {}   # normalized actor -> Future (pending or done)
+        self._pending = []   # normalized actors waiting for a batch
+        self._timer = None
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.found = 0
+        self.missing = 0
+        self.splits = 0
+        self.failed = 0
+
+    @staticmethod
+    def _normalize(actor):
+        return actor if actor.startswith('did:') else actor.lower()
+
+    def submit(self, actor):
+        """
+        Queue a lookup and return a Future resolving to the profile (or None).
+
+        Repeated lookups of the same actor share one Future, so each account
+        is fetched at most once per hydrator.
+        """
+        key = self._normalize(actor)
+        batch = None
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+            future = self._futures[key] = Future()
+            self._pending.append(key)
+            if len(self._pending) >= self.batch_size:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run_batch(batch)
+        return future
+
+    def _take_batch(self):
+        # Caller holds the lock
+        batch = self._pending[:self.batch_size]
+        self._pending = self._pending[self.batch_size:]
+        if not self._pending and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        """Send every pending lookup now, in full batches where possible."""
+        while True:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._pending:
+                    return
+                batch = self._take_batch()
+            self._run_batch(batch)
+
+    def hydrate(self, actors):
+        """
+        Look up many actors at once.
+
+        Args:
+            actors: Iterable of handles or DIDs (duplicates are fine)
+
+        Returns:
+            Dict of actor -> profile dict, or None for accounts that could
+            not be found
+        """
+        futures = {actor: self.submit(actor) for actor in actors if actor}
+        self.flush()
+        return {actor: future.result() for actor, future in futures.items()}
+
+    def _run_batch(self, batch):
+        try:
+            profiles = self._fetch(batch)
+        except BaseException as e:
+            for key in batch:
+                self._futures[key].set_exception(e)
+            raise
+        with self._lock:
+            self.found += len(profiles)
+            self.missing += len(batch) - len(profiles)
+        for key in batch:
+            self._futures[key].set_result(profiles.get(key))
+
+    def _fetch(self, batch):
+        """Fetch a batch, splitting it when the API rejects the whole request."""
+        with self._lock:
+            self.requests += 1
+        result = get_profiles(batch)
+        if result is None:
+            if last_request_outcome() != 400:
+                # Not caused by the actors: splitting would only add requests
+                with self._lock:
+                    self.failed += 1
+                return {}
+            if len(batch) == 1:
+                return {}
+            with self._lock:
+                self.splits += 1
+            mid = len(batch) // 2
+            profiles = self._fetch(batch[:mid])
+            profiles.update(self._fetch(batch[mid:]))
+            return profiles
+
+        by_key = {}
+        for profile in result.get('profiles', []):
+            by_key[profile.get('did')] = profile
+            by_key[self._normalize(profile.get('handle', ''))] = profile
+        return {key: by_key[key] for key in batch if key in by_key}
+
+    def stats(self):
+        """Counters plus the requests saved versus one get_profile() per actor."""
+        lookups = self.found + self.missing
+        return {
+            'requests': self.requests,
+            'found': self.found,
+            'missing': self.missing,
+            'splits': self.splits,
+            'failed': self.failed,
+            'requests_saved': lookups - self.requests,
+        }
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Shared token-bucket rate limiter for the Bluesky public API.
+
+The public API allows ~3,000 requests per 5 minutes. Instead of sleeping a
+fixed amount after every call, make_request() asks a RateLimiter for a
+token before each request and reports every response back to it:
+
+    limiter = RateLimiter()            # 3,000 tokens, refilled over 300s
+    limiter.acquire()                  # blocks until a token is available
+    ...make the request...
+    limiter.update(status, headers)    # adapt to 429s / ratelimit-* headers
+
+Adapting to the server:
+    - HTTP 429 halves the refill rate, empties the bucket and pauses until
+      the Retry-After / ratelimit-reset time.
+    - 'ratelimit-remaining' caps the local token count so we never believe
+      we have more budget than the server says, and 'ratelimit-limit' /
+      'ratelimit-policy' resize the bucket to the advertised window.
+    - Every successful response grows the rate back towards the nominal
+      rate by a small step (additive increase, multiplicative decrease).
+
+Sharing:
+    One RateLimiter is safe to use from many threads. To share a budget
+    between *processes* (e.g. several collectors started at once), give each
+    process a limiter with the same state_file; the bucket state lives in
+    that file and is updated under an exclusive file lock. bluesky_helpers
+    does this automatically when BSKY_RATE_LIMIT_FILE is set.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process limiter
+    fcntl = None
+
+# Documented public API budget: ~3,000 requests per 5 minutes
+DEFAULT_MAX_REQUESTS = 3000
+DEFAULT_WINDOW = 300
+
+# Never slow down below this fraction of the nominal rate
+MIN_RATE_FRACTION = 0.05
+
+# Fraction of the nominal rate recovered after each successful response
+RECOVERY_STEP = 0.01
+
+
+class RateLimiter:
+    """
+    Token bucket sized to the API's rate-limit window.
+
+    Args:
+        max_requests: Requests allowed per window (bucket capacity)
+        window: Window length in seconds
+        state_file: Optional path used to share the bucket across processes
+
+    Attributes:
+        throttled: Number of 429 responses seen
+        wait_time: Total seconds this process spent waiting for tokens
+    """
+
+    def __init__(self, max_requests=DEFAULT_MAX_REQUESTS, window=DEFAULT_WINDOW,
+                 state_file=None):
+        self.capacity = float(max_requests)
+        self.nominal_rate = max_requests / window
+        self.rate = self.nominal_rate
+        self.tokens = self.capacity
+        self.updated = time.time()
+        self.paused_until = 0.0
+        self.state_file = state_file if fcntl is not None else None
+
+        self.throttled = 0
+        self.wait_time = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Shared state
+    # ------------------------------------------------------------------
+
+    def _get_state(self):
+        return {
+            'capacity': self.capacity,
+            'nominal_rate': self.nominal_rate,
+            'rate': self.rate,
+            'tokens': self.tokens,
+            'updated': self.updated,
+            'paused_until': self.paused_until,
+        }
+
+    def _set_state(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    @contextmanager
+    def _locked(self):
+        # Thread lock first, then (optionally) the cross-process file lock
+        with self._lock:
+            if self.state_file is None:
+                yield
+                return
+            with open(self.state_file, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    raw = f.read()
+                    if raw:
+                        try:
+                            self._set_state(json.loads(raw))
+                        except json.JSONDecodeError:
+                            pass  # corrupt/partial file: keep our own state
+                    yield
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(self._get_state(), f)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def acquire(self):
+        """
+        Block until a request may be sent, then consume one token.
+
+        Returns:
+            Seconds spent waiting (0.0 if a token was immediately available)
+        """
+        waited = 0.0
+        while True:
+            with self._locked():
+                now = time.time()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.wait_time += waited
+                    return waited
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            # Sleep outside the lock so other threads/processes can proceed
+            time.sleep(delay)
+            waited += delay
+
+    def update(self, status, headers=None):
+        """
+        Adapt the bucket to a response.
+
+        Args:
+            status: HTTP status code of the response
+            headers: Response headers (anything with .get(), may be None)
+        """
+        headers = headers if headers is not None else {}
+        with self._locked():
+            now = time.time()
+            self._refill(now)
+
+            self._apply_headers(headers, now)
+
+            if status == 429:
+                self.throttled += 1
+                self.rate = max(self.rate / 2,
+                                self.nominal_rate * MIN_RATE_FRACTION)
+                self.tokens = 0.0
+                self.paused_until = max(self.paused_until,
+                                        _retry_at(headers, now))
+            elif 200 <= status < 300:
+                self.rate = min(self.nominal_rate,
+                                self.rate + self.nominal_rate * RECOVERY_STEP)
+
+    def _apply_headers(self, headers, now):
+        limit = _int_header(headers, 'ratelimit-limit')
+        policy = headers.get('ratelimit-policy')  # e.g. '3000;w=300'
+        if limit and policy and ';w=' in policy:
+            window = _to_int(policy.split(';w=', 1)[1])
+            if window:
+                self.capacity = float(limit)
+                self.nominal_rate = limit / window
+                self.rate = min(self.rate, self.nominal_rate)
+
+        remaining = _int_header(headers, 'ratelimit-remaining')
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+            reset = _reset_at(headers, now)
+            if remaining <= 0 and reset is not None:
+                self.paused_until = max(self.paused_until, reset)
+
+    def stats(self):
+        """Return a snapshot of the limiter's current state and counters."""
+        with self._locked():
+            self._refill(time.time())
+            stats = self._get_state()
+        stats['throttled'] = self.throttled
+        stats['wait_time'] = self.wait_time
+        return stats
+
+
+# ============================================================================
+# Header parsing helpers
+# ============================================================================
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _int_header(headers, name):
+    return _to_int(headers.get(name))
+
+
+# ratelimit-reset values above this are epoch timestamps (what Bluesky sends),
+# smaller ones are seconds from now (as in the IETF RateLimit header draft)
+_EPOCH_RESET_MIN = 10 ** 9
+
+
+def _reset_at(headers, now):
+    """Epoch time of the ratelimit-reset header, or None if it is missing."""
+    reset = _int_header(headers, 'ratelimit-reset')
+    if reset is None or reset < 0:
+        return None
+    return float(reset) if reset >= _EPOCH_RESET_MIN else now + reset
+
+
+def _retry_at(headers, now):
+    """Epoch time after which a throttled client may retry."""
+    retry_after = _int_header(headers, 'retry-after')
+    if retry_after is not None:
+        return now + retry_after
+    reset = _reset_at(headers, now)
+    if reset is not None:
+        return reset
+    return now + 1.0
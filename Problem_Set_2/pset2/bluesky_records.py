@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Compact record types for posts, replies, follows and profiles.
+
+The API returns large nested dicts (embeds, labels, viewer state, facets,
+...) of which our analyses use a handful of fields. Keeping those dicts
+alive for tens of thousands of posts dominates memory. The classes here
+use __slots__ (no per-instance __dict__), keep only the fields we use and
+intern handles, which repeat across many records:
+
+    Post        uri, author, text, createdAt, replyCount, likeCount, repostCount
+    Reply       handle, displayName, createdAt, text, likeCount
+                (+ followersCount, followsCount, postsCount, inferred_gender
+                once filled in)
+    FollowEdge  follower, handle, did, displayName
+    Profile     did, handle, displayName, followersCount, followsCount, postsCount
+
+Build them straight from API responses with from_api(), or from our own
+saved JSON with from_dict():
+
+    posts = [Post.from_api(item) for item in feed['feed']]
+    follows = get_all_follows(handle, as_records=True)
+    data = load_replies('replies_schumer_senate_gov.json')
+
+Records behave like read-mostly dicts (record['text'], record.get(...),
+'key' in record, dict(record)), so analysis code written for the plain
+JSON keeps working. save_json() and CheckpointJournal write them as plain
+JSON objects.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import sys
+from collections.abc import Mapping
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record(Mapping):
+    """
+    Base class: a fixed set of fields stored in __slots__.
+
+    Subclasses list their fields in __slots__; fields named in _optional are
+    left out of to_dict()/iteration while they are None (e.g. counts that
+    are only present after enrichment), so saved JSON looks the same as
+    before.
+    """
+
+    __slots__ = ()
+    _optional = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in self._optional:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __iter__(self):
+        for key in self.__slots__:
+            if key in self._optional and getattr(self, key) is None:
+                continue
+            yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        fields = ', '.join(f"{k}={getattr(self, k)!r}" for k in self)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self):
+        """Plain dict of the (non-empty) fields, for JSON."""
+        return {key: getattr(self, key) for key in self}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a record from to_dict() output (unknown keys are ignored)."""
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+
+class Post(Record):
+    """A post from getAuthorFeed (or the post view of a thread)."""
+
+    __slots__ = ('uri', 'author', 'text', 'createdAt', 'replyCount', 'likeCount',
+                 'repostCount')
+
+    def __init__(self, uri, author=None, text=None, createdAt=None, replyCount=0,
+                 likeCount=0, repostCount=0):
+        self.uri = uri
+        self.author = _intern(author)
+        self.text = text
+        self.createdAt = createdAt
+        self.replyCount = replyCount
+        self.likeCount = likeCount
+        self.repostCount = repostCount
+
+    @classmethod
+    def from_api(cls, item):
+        """
+        Args:
+            item: A getAuthorFeed item ({'post': ...}) or a post view
+        """
+        post = item.get('post', item)
+        record = post.get('record') or {}
+        return cls(post.get('uri'), (post.get('author') or {}).get('handle'),
+                   record.get('text'), record.get('createdAt'),
+                   post.get('replyCount', 0), post.get('likeCount', 0),
+                   post.get('repostCount', 0))
+
+
+class Reply(Record):
+    """One reply to a senator's post, as saved in replies_<handle>.json."""
+
+    __slots__ = ('handle', 'displayName', 'createdAt', 'text', 'likeCount',
+                 'followersCount', 'followsCount', 'postsCount', 'inferred_gender')
+    _optional = ('followersCount', 'followsCount', 'postsCount', 'inferred_gender')
+
+    def __init__(self, handle, displayName=None, createdAt=None, text=None, likeCount=0,
+                 followersCount=None, followsCount=None, postsCount=None,
+                 inferred_gender=None):
+        self.handle = _intern(handle)
+        self.displayName = displayName
+        self.createdAt = createdAt
+        self.text = text
+        self.likeCount = likeCount
+        self.followersCount = followersCount
+        self.followsCount = followsCount
+        self.postsCount = postsCount
+        self.inferred_gender = inferred_gender
+
+    @classmethod
+    def from_api(cls, node):
+        """
+        Args:
+            node: A reply node from getPostThread ({'post': ...}) or a post view
+        """
+        post = node.get('post', node)
+        author = post.get('author') or {}
+        record = post.get('record') or {}
+        return cls(author.get('handle'), author.get('displayName'),
+                   record.get('createdAt'), record.get('text'), post.get('likeCount', 0))
+
+
+class FollowEdge(Record):
+    """follower -> followed account, from getFollows."""
+
+    __slots__ = ('follower', 'handle', 'did', 'displayName')
+    _optional = ('follower',)
+
+    def __init__(self, handle, did=None, displayName=None, follower=None):
+        self.follower = _intern(follower)
+        self.handle = _intern(handle)
+        self.did = _intern(did)
+        self.displayName = displayName
+
+    @classmethod
+    def from_api(cls, follow, follower=None):
+        """
+        Args:
+            follow: An item of getFollows' 'follows' list
+            follower: Handle of the account doing the following
+        """
+        return cls(follow.get('handle'), follow.get('did'), follow.get('displayName'),
+                   follower)
+
+
+class Profile(Record):
+    """The parts of getProfile / getProfiles we use."""
+
+    __slots__ = ('did', 'handle', 'displayName', 'followersCount', 'followsCount',
+                 'postsCount')
+
+    def __init__(self, did, handle=None, displayName=None, followersCount=None,
+                 followsCount=None, postsCount=None):
+        self.did = _intern(did)
+        self.handle = _intern(handle)
+        self.displayName = displayName
+        self.followersCount = followersCount
+        self.followsCount = followsCount
+        self.postsCount = postsCount
+
+    @classmethod
+    def from_api(cls, profile):
+        return cls(profile.get('did'), profile.get('handle'), profile.get('displayName'),
+                   profile.get('followersCount'), profile.get('followsCount'),
+                   profile.get('postsCount'))
+
+
+def to_jsonable(obj):
+    """json.dump(default=...) hook that writes records as plain objects."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def replies_from_json(data):
+    """
+    Convert the replies in a loaded replies_<handle>.json to Reply records.
+
+    Args:
+        data: List of post dicts, each with a 'replies' list (modified in place)
+
+    Returns:
+        data
+    """
+    for post in data:
+        post['replies'] = [Reply.from_dict(r) for r in post.get('replies', [])]
+    return data
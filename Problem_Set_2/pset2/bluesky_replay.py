@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Record/replay transport for make_request().
+
+Benchmarks and regression checks of the collectors shouldn't depend on
+public.api.bsky.app. These transports stand in for HTTP_POOL (they have the
+same request(url, headers, timeout) -> (status, headers, body, wire_bytes)
+method):
+
+RecordingTransport
+    Sends requests over a real ConnectionPool and appends every response
+    (status, headers, decompressed body) to a fixture archive.
+
+ReplayTransport
+    Answers requests from a fixture archive without touching the network.
+    Requests are matched on endpoint + query parameters (parameter order
+    doesn't matter). If the same request was recorded several times, the
+    recordings are served in order and the last one is repeated.
+
+Record a run once, then replay it as often as you like:
+
+    from bluesky_helpers import enable_recording, enable_replay
+    enable_recording('fixtures.jsonl')      # hits the API, saves responses
+    ...collect...
+    enable_replay('fixtures.jsonl')         # offline from here on
+    ...collect again, same results...
+
+or set BSKY_RECORD_FILE / BSKY_REPLAY_FILE before starting a script.
+
+The archive is plain JSON lines, one response per line:
+
+    {"endpoint": ..., "query": ..., "status": 200, "headers": [[k, v], ...],
+     "body": "...", "wire_bytes": 1234}
+
+so it can be trimmed or edited by hand, and bluesky_mock_server.py can serve
+it over HTTP. Bodies are stored decompressed; wire_bytes keeps the size that
+was actually transferred, so replayed runs report the same bandwidth in
+TELEMETRY.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+DEFAULT_FIXTURE_FILE = 'bluesky_fixtures.jsonl'
+
+# Body returned for unrecorded requests when replay isn't strict
+MISSING_BODY = b'{"error":"NotFound","message":"No recorded response for this request"}'
+
+# Headers describing the transfer rather than the (decompressed) body we store
+TRANSFER_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding'})
+
+
+class FixtureMissing(LookupError):
+    """Raised by a strict ReplayTransport for a request that wasn't recorded."""
+
+
+def fixture_key(url):
+    """
+    (endpoint, query) key identifying a request in an archive.
+
+    The endpoint is the last path segment (e.g. 'app.bsky.graph.getFollows')
+    so recordings don't depend on API_BASE, and the query parameters are
+    sorted so {'actor': a, 'limit': 100} and {'limit': 100, 'actor': a} match.
+    """
+    parts = urllib.parse.urlsplit(url)
+    endpoint = parts.path.rstrip('/').rsplit('/', 1)[-1]
+    query = sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    return endpoint, urllib.parse.urlencode(query)
+
+
+def _headers_message(pairs):
+    message = http.client.HTTPMessage()
+    for name, value in pairs:
+        message[name] = value
+    return message
+
+
+class FixtureArchive:
+    """
+    JSON-lines file of recorded responses, indexed by fixture_key().
+
+    Args:
+        path: Archive file; existing recordings are loaded, new ones appended
+    """
+
+    def __init__(self, path=DEFAULT_FIXTURE_FILE):
+        self.path = path
+        self._responses = defaultdict(list)  # key -> [(status, headers, body, wire_bytes)]
+        self._lock = threading.Lock()
+        self._file = None
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partial line from an interrupted recording
+                    key = (entry['endpoint'], entry['query'])
+                    body = entry['body'].encode('utf-8')
+                    self._responses[key].append((entry['status'], entry['headers'], body,
+                                                 entry.get('wire_bytes', len(body))))
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(r) for r in self._responses.values())
+
+    def keys(self):
+        with self._lock:
+            return list(self._responses)
+
+    def lookup(self, key):
+        """All recorded (status, header pairs, body, wire_bytes) for a key, oldest first."""
+        with self._lock:
+            return list(self._responses.get(key, ()))
+
+    def add(self, url, status, headers, body, wire_bytes=None):
+        """Append one response to the archive (in memory and on disk)."""
+        key = fixture_key(url)
+        body = bytes(body)
+        wire_bytes = len(body) if wire_bytes is None else wire_bytes
+        pairs = [[k, v] for k, v in (headers.items() if headers is not None else [])
+                 if k.lower() not in TRANSFER_HEADERS]
+        entry = {'endpoint': key[0], 'query': key[1], 'status': status,
+                 'headers': pairs, 'body': body.decode('utf-8', errors='replace'),
+                 'wire_bytes': wire_bytes, 'recorded_at': time.time()}
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._responses[key].append((status, pairs, body, wire_bytes))
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingTransport:
+    """
+    Wraps a transport (normally a ConnectionPool) and records its responses.
+
+    Network errors are not recorded; they propagate to make_request() as usual.
+    """
+
+    def __init__(self, transport, archive):
+        self.transport = transport
+        self.archive = archive
+        self.recorded = 0
+
+    def request(self, url, headers=None, timeout=None):
+        status, response_headers, body, wire_bytes = self.transport.request(
+            url, headers=headers, timeout=timeout)
+        self.archive.add(url, status, response_headers, body, wire_bytes)
+        self.recorded += 1
+        return status, response_headers, body, wire_bytes
+
+    def stats(self):
+        return {'recorded': self.recorded, 'archive_size': len(self.archive)}
+
+    def close(self):
+        self.transport.close()
+        self.archive.close()
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses instead of talking to the network.
+
+    Args:
+        archive: FixtureArchive to serve from
+        strict: Raise FixtureMissing for unrecorded requests instead of
+            answering them with a 404
+        latency: Seconds to sleep per request, to simulate a slow network
+    """
+
+    def __init__(self, archive, strict=False, latency=0.0):
+        self.archive = archive
+        self.strict = strict
+        self.latency = latency
+        self.hits = 0
+        self.misses = 0
+        self._served = defaultdict(int)  # key -> times served
+        self._lock = threading.Lock()
+
+    def request(self, url, headers=None, timeout=None):
+        key = fixture_key(url)
+        responses = self.archive.lookup(key)
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            if not responses:
+                self.misses += 1
+            else:
+                self.hits += 1
+                index = min(self._served[key], len(responses) - 1)
+                self._served[key] += 1
+
+        if not responses:
+            if self.strict:
+                raise FixtureMissing(f"No recorded response for {key[0]}?{key[1]}")
+            return (404, _headers_message([('Content-Type', 'application/json')]),
+                    MISSING_BODY, len(MISSING_BODY))
+
+        status, pairs, body, wire_bytes = responses[index]
+        return status, _headers_message(pairs), body, wire_bytes
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'archive_size': len(self.archive)}
+
+    def close(self):
+        self.archive.close()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Retry policy and circuit breaker used by make_request().
+
+Transient failures (HTTP 429 / 5xx, timeouts, dropped connections) used to
+make make_request() return None immediately, so paginating callers stopped
+early and silently produced truncated follow lists. Now:
+
+RetryPolicy
+    Retries transient failures with exponential backoff plus random jitter
+    (0.5s, 1s, 2s, ... capped at max_delay). Client errors such as 400 and
+    404 are never retried. Counts retries and give-ups per endpoint.
+
+CircuitBreaker
+    Tracks consecutive transient failures per endpoint. After
+    failure_threshold in a row the circuit "opens" and every caller of that
+    endpoint waits (the crawl pauses) for reset_timeout seconds. Then one
+    probe request is let through: success closes the circuit, failure opens
+    it again. Rate limiting (429) is left to the RateLimiter and does not
+    count as the API being down.
+
+    policy = RetryPolicy(max_retries=4)
+    print(policy.stats())            # {'app.bsky.graph.getFollows': {...}}
+    print(CIRCUIT_BREAKER.stats())   # trips and paused seconds per endpoint
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+
+# Statuses worth retrying: rate limited or server-side trouble
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter for transient errors.
+
+    Args:
+        max_retries: Retries after the first attempt (0 disables retrying)
+        base_delay: Delay before the first retry, in seconds
+        max_delay: Upper bound for any single delay
+        retry_statuses: HTTP statuses that are retried
+        retry_timeouts: Retry requests that timed out
+        retry_network_errors: Retry connection resets/refusals etc.
+
+    Attributes:
+        retries: Dict of endpoint -> retries performed
+        give_ups: Dict of endpoint -> requests that failed after all retries
+    """
+
+    def __init__(self, max_retries=4, base_delay=0.5, max_delay=30.0,
+                 retry_statuses=RETRY_STATUSES, retry_timeouts=True,
+                 retry_network_errors=True):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_timeouts = retry_timeouts
+        self.retry_network_errors = retry_network_errors
+
+        self.retries = defaultdict(int)
+        self.give_ups = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def is_retryable(self, outcome):
+        """
+        Whether a failed attempt should be retried.
+
+        Args:
+            outcome: An HTTP status code, 'timeout' or 'network'
+        """
+        if outcome == 'timeout':
+            return self.retry_timeouts
+        if outcome == 'network':
+            return self.retry_network_errors
+        return outcome in self.retry_statuses
+
+    def delay(self, attempt):
+        """Seconds to wait before retry number attempt (0-based), with jitter."""
+        capped = min(self.max_delay, self.base_delay * 2 ** attempt)
+        # "Equal jitter": at least half the backoff, randomised so parallel
+        # workers don't retry in lockstep
+        return capped / 2 + random.uniform(0, capped / 2)
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self.retries[endpoint] += 1
+
+    def record_give_up(self, endpoint):
+        with self._lock:
+            self.give_ups[endpoint] += 1
+
+    def stats(self):
+        """Per-endpoint retry and give-up counters."""
+        with self._lock:
+            endpoints = set(self.retries) | set(self.give_ups)
+            return {ep: {'retries': self.retries[ep], 'give_ups': self.give_ups[ep]}
+                    for ep in sorted(endpoints)}
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = 'closed'  # 'closed', 'open' or 'half_open'
+        self.failures = 0
+        self.opened_until = 0.0
+        self.trips = 0
+        self.paused = 0.0
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker that pauses callers while an endpoint is down.
+
+    Args:
+        failure_threshold: Consecutive transient failures that open the circuit
+        reset_timeout: Seconds to pause before letting a probe request through
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits = defaultdict(_Circuit)
+        self._cond = threading.Condition()
+
+    def before_call(self, endpoint):
+        """
+        Block while the endpoint's circuit is open.
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        with self._cond:
+            circuit = self._circuits[endpoint]
+            if circuit.state == 'closed':
+                return 0.0
+            while True:
+                if circuit.state == 'closed':
+                    break
+                now = time.monotonic()
+                if circuit.state == 'open' and now >= circuit.opened_until:
+                    circuit.state = 'half_open'  # this caller is the probe
+                    break
+                # Open (still cooling down) or a probe is in flight: wait
+                timeout = (circuit.opened_until - now if circuit.state == 'open'
+                           else self.reset_timeout)
+                self._cond.wait(timeout=max(timeout, 0.01))
+            waited = time.monotonic() - start
+            circuit.paused += waited
+        return waited
+
+    def record_success(self, endpoint):
+        with self._cond:
+            circuit = self._circuits[endpoint]
+            circuit.state = 'closed'
+            circuit.failures = 0
+            self._cond.notify_all()
+
+    def record_failure(self, endpoint):
+        with self._cond:
+            circuit = self._circuits[endpoint]
+            circuit.failures += 1
+            if circuit.state == 'half_open' or circuit.failures >= self.failure_threshold:
+                if circuit.state != 'open':
+                    circuit.trips += 1
+                    print(f"API looks down ({circuit.failures} failures on {endpoint}): "
+                          f"pausing {self.reset_timeout:g}s")
+                circuit.state = 'open'
+                circuit.opened_until = time.monotonic() + self.reset_timeout
+            self._cond.notify_all()
+
+    def stats(self):
+        """Per-endpoint state, trips and total seconds callers were paused."""
+        with self._cond:
+            return {ep: {'state': c.state, 'trips': c.trips, 'paused': c.paused}
+                    for ep, c in sorted(self._circuits.items())}
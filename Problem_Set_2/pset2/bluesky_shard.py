@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Run a collector across several worker processes with one shared rate budget.
+
+A single process spends much of a large crawl decoding JSON and building
+records, all under the GIL. run_sharded() splits the work units (authors,
+senators, ...) into N disjoint shards, forks one worker per shard and
+gives every worker a RateLimiter on the same state file, so together they
+still respect the API's ~3,000 requests / 5 minutes:
+
+    def fetch_shard(shard, n_shards, authors):
+        journal = CheckpointJournal(shard_path('feeds_checkpoint.jsonl', shard, n_shards))
+        ...fetch authors, journal each one...
+        return journal.path
+
+    paths = run_sharded(fetch_shard, plan.authors, workers=4)
+    # then merge the shard files (see merge_journals)
+
+Sharding is deterministic: a unit always lands in shard
+crc32(key) % n_shards, whatever order the units come in, so a rerun with
+the same worker count gives every worker the same units (and its own
+journal to resume from). Each worker writes only its own shard files;
+merging them afterwards in a fixed order makes the combined result
+independent of which worker finished first.
+
+Workers are started with fork(), so the worker function may be defined in
+the calling script. bluesky_helpers gives a forked child its own HTTP
+connections, prefetch threads, cache handle and telemetry. On platforms
+without fork() (Windows) run_sharded() runs the whole job in-process.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import multiprocessing
+import os
+import zlib
+
+# Bucket state shared by the workers when the parent has no shared limiter
+DEFAULT_BUDGET_FILE = 'bluesky_rate_budget.json'
+
+
+def shard_of(key, n_shards):
+    """Stable shard index (0..n_shards-1) for a string key."""
+    return zlib.crc32(str(key).encode('utf-8')) % n_shards
+
+
+def partition(items, n_shards, key=None):
+    """
+    Split items into n_shards lists by shard_of(key(item)).
+
+    Args:
+        items: Work units
+        n_shards: Number of shards
+        key: Function item -> string (default: the item itself)
+
+    Returns:
+        List of n_shards lists; items keep their relative order
+    """
+    shards = [[] for _ in range(n_shards)]
+    for item in items:
+        shards[shard_of(key(item) if key else item, n_shards)].append(item)
+    return shards
+
+
+def shard_path(path, shard, n_shards):
+    """
+    Per-shard variant of a file name.
+
+    shard_path('feeds_checkpoint.jsonl', 0, 4) -> 'feeds_checkpoint.shard0of4.jsonl'
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard}of{n_shards}{ext}"
+
+
+def shard_files(path):
+    """Existing shard files of path (from any worker count), sorted by name."""
+    root, ext = os.path.splitext(path)
+    directory = os.path.dirname(root) or '.'
+    prefix = os.path.basename(root) + '.shard'
+    found = [os.path.join(os.path.dirname(root), name) for name in os.listdir(directory)
+             if name.startswith(prefix) and name.endswith(ext)
+             and 'of' in name[len(prefix):len(name) - len(ext)]]
+    return sorted(found)
+
+
+def can_fork():
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _init_worker(budget_file):
+    # Runs in each forked worker before its first task
+    import bluesky_helpers
+    from bluesky_ratelimit import RateLimiter
+    if bluesky_helpers.RATE_LIMITER is not None:
+        bluesky_helpers.set_rate_limiter(RateLimiter(state_file=budget_file))
+
+
+def _run_shard(worker, shard, n_shards, items):
+    return worker(shard, n_shards, items)
+
+
+def run_sharded(worker, items, workers, key=None, budget_file=None):
+    """
+    Run worker(shard, n_shards, shard_items) on every shard in parallel.
+
+    Args:
+        worker: Function (shard index, number of shards, list of items) ->
+            picklable result (e.g. the path of the shard file it wrote)
+        items: Work units to split
+        workers: Number of worker processes (1 runs in-process)
+        key: Function item -> string used for sharding (default: the item)
+        budget_file: State file of the shared rate budget. Defaults to the
+            parent's RATE_LIMITER.state_file (BSKY_RATE_LIMIT_FILE) or
+            DEFAULT_BUDGET_FILE
+
+    Returns:
+        List of the workers' results, in shard order
+    """
+    items = list(items)
+    if workers <= 1 or not can_fork():
+        return [worker(0, 1, items)]
+
+    import bluesky_helpers
+    if budget_file is None:
+        limiter = bluesky_helpers.RATE_LIMITER
+        budget_file = (limiter.state_file if limiter is not None and limiter.state_file
+                       else DEFAULT_BUDGET_FILE)
+
+    shards = partition(items, workers, key)
+    context = multiprocessing.get_context('fork')
+    with context.Pool(workers, initializer=_init_worker, initargs=(budget_file,)) as pool:
+        results = pool.starmap(_run_shard, [(worker, i, workers, shard)
+                                            for i, shard in enumerate(shards)])
+    return results
+
+
+def merge_journals(path, prefix):
+    """
+    Combine the entries under prefix from a journal and all its shard journals.
+
+    Args:
+        path: The main CheckpointJournal file (e.g. 'feeds_checkpoint.jsonl')
+        prefix: Key prefix to collect, e.g. ('author',)
+
+    Returns:
+        Dict of key -> data for every complete entry. Shards are read in
+        sorted file order after the main journal; shards hold disjoint
+        units, so the result doesn't depend on worker timing.
+    """
+    from bluesky_checkpoint import CheckpointJournal
+    merged = {}
+    for journal_path in [path] + shard_files(path):
+        if not os.path.exists(journal_path):
+            continue
+        with CheckpointJournal(journal_path) as journal:
+            for k in journal.keys(*prefix):
+                if journal.is_complete(*k):
+                    merged[k] = journal.get(*k)
+    return merged
+
+
+def remove_shard_files(path):
+    """Delete the shard files of path once they have been merged."""
+    for shard_file in shard_files(path):
+        os.remove(shard_file)
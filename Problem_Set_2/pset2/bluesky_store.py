@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+One indexed SQLite datastore for everything the collectors produce.
+
+The collected data is otherwise spread over senator_follows_map.json,
+senator_post_uris_24h.json, feed_<handle>.json and replies_<handle>.json,
+each with its own layout, and every analysis script re-parses the whole
+files it needs. DataStore keeps the same data in indexed tables:
+
+    profiles    handle, did, displayName, followersCount, followsCount,
+                postsCount, updated_at
+    follows     follower, followed, collected_at       (one row per edge)
+    posts       uri, author, text, createdAt, created_us, replyCount,
+                likeCount, repostCount, replies_collected, updated_at
+    feed_items  senator, uri, author, collected_at     (a senator's 24h feed)
+    senator_posts  senator, uri, position, collected_at  (posts in replies_<handle>.json)
+    replies     post_uri, position, handle, displayName, createdAt,
+                created_us, text, likeCount, followersCount, followsCount,
+                postsCount, inferred_gender
+
+plus a snapshots table recording whose follow list, feed or replies were
+collected and when (so an account that follows nobody still shows up). A post is
+stored once even when it appears in several senators' data (reposts);
+senator_posts links it to each of them. created_us is createdAt as
+integer epoch microseconds (UTC), so time ranges and orderings don't
+depend on how the strings were formatted.
+
+Collectors upsert as they go (set DATASTORE in bluesky_part1.py,
+bluesky_part1.3.py or bluesky_part2.1.py), and the analysis scripts read
+only what they need:
+
+    store = DataStore('bluesky_data.sqlite')
+    follows = store.follows_map()                 # like senator_follows_map.json
+    uris = store.feed_uris()                      # like senator_post_uris_24h.json
+    data = store.senator_replies('schumer.senate.gov')   # like replies_<handle>.json
+    for row in store.iter_replies(columns=['displayName'], reply_count=(50, 200)):
+        ...
+
+Snapshots replace, history accumulates: a senator's follow list and 24h
+feed are replaced on every ingest (unfollows and posts that left the
+window disappear), while posts and replies are upserted by URI and kept
+across runs, so senator_replies() returns every post collected so far.
+
+The database runs in WAL mode: a collector can keep writing while an
+analysis reads a consistent snapshot, and several collector processes
+(bluesky_shard.py workers) can write to the same file; writers wait for
+each other for up to BUSY_TIMEOUT seconds.
+
+Import the existing JSON files once:
+
+    python bluesky_store.py import
+    python bluesky_store.py stats
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from bluesky_helpers import load_json, to_epoch_us
+
+DEFAULT_STORE_FILE = 'bluesky_data.sqlite'
+
+# Seconds a writer waits for another process's transaction to finish
+BUSY_TIMEOUT = 30
+
+# Rows iter_replies() reads from SQLite at a time
+FETCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    handle         TEXT PRIMARY KEY,
+    did            TEXT,
+    displayName    TEXT,
+    followersCount INTEGER,
+    followsCount   INTEGER,
+    postsCount     INTEGER,
+    updated_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_did ON profiles (did);
+
+CREATE TABLE IF NOT EXISTS follows (
+    follower     TEXT NOT NULL,
+    followed     TEXT NOT NULL,
+    collected_at REAL NOT NULL,
+    UNIQUE (follower, followed)
+);
+CREATE INDEX IF NOT EXISTS follows_followed ON follows (followed);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    kind         TEXT NOT NULL,
+    owner        TEXT NOT NULL,
+    collected_at REAL NOT NULL,
+    PRIMARY KEY (kind, owner)
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+    uri               TEXT PRIMARY KEY,
+    author            TEXT,
+    text              TEXT,
+    createdAt         TEXT,
+    created_us        INTEGER,
+    replyCount        INTEGER,
+    likeCount         INTEGER,
+    repostCount       INTEGER,
+    replies_collected INTEGER,
+    updated_at        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_author_time ON posts (author, created_us);
+CREATE INDEX IF NOT EXISTS posts_reply_count ON posts (replyCount);
+
+CREATE TABLE IF NOT EXISTS feed_items (
+    senator      TEXT NOT NULL,
+    uri          TEXT NOT NULL,
+    author       TEXT,
+    collected_at REAL NOT NULL,
+    UNIQUE (senator, uri)
+);
+
+CREATE TABLE IF NOT EXISTS senator_posts (
+    senator      TEXT NOT NULL,
+    uri          TEXT NOT NULL,
+    position     INTEGER NOT NULL,
+    collected_at REAL NOT NULL,
+    PRIMARY KEY (senator, uri)
+);
+
+CREATE TABLE IF NOT EXISTS replies (
+    post_uri        TEXT NOT NULL,
+    position        INTEGER NOT NULL,
+    handle          TEXT,
+    displayName     TEXT,
+    createdAt       TEXT,
+    created_us      INTEGER,
+    text            TEXT,
+    likeCount       INTEGER,
+    followersCount  INTEGER,
+    followsCount    INTEGER,
+    postsCount      INTEGER,
+    inferred_gender TEXT,
+    PRIMARY KEY (post_uri, position)
+);
+CREATE INDEX IF NOT EXISTS replies_handle ON replies (handle);
+"""
+
+TABLES = ('profiles', 'follows', 'posts', 'feed_items', 'senator_posts', 'replies',
+          'snapshots')
+
+# Reply fields in replies_<handle>.json; the optional ones are left out of a
+# reply while they are NULL, as in the JSON files
+REPLY_FIELDS = ('handle', 'displayName', 'createdAt', 'text', 'likeCount')
+OPTIONAL_REPLY_FIELDS = ('followersCount', 'followsCount', 'postsCount', 'inferred_gender')
+PROFILE_COUNTS = ('followersCount', 'followsCount', 'postsCount')
+
+def _placeholders(values):
+    return ', '.join('?' for _ in values)
+
+
+class DataStore:
+    """
+    SQLite datastore for profiles, follow edges, posts, feeds and replies.
+
+    Args:
+        path: Database file (created on first use)
+
+    A DataStore may be shared between threads; open a new one in every
+    process (a connection must not cross a fork()).
+    """
+
+    def __init__(self, path=DEFAULT_STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._db:
+            self._db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Ingest (each call is one transaction)
+    # ------------------------------------------------------------------
+
+    def upsert_profiles(self, profiles):
+        """
+        Insert or update profiles.
+
+        Args:
+            profiles: Iterable of profile dicts / Profile records (getProfiles
+                output); they need a 'handle'. Fields that are missing or
+                None keep their stored value.
+
+        Returns:
+            Number of profiles written
+        """
+        now = time.time()
+        rows = [(p.get('handle'), p.get('did'), p.get('displayName'),
+                 p.get('followersCount'), p.get('followsCount'), p.get('postsCount'), now)
+                for p in profiles if p and p.get('handle')]
+        with self._lock, self._db:
+            self._db.executemany(
+                """INSERT INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (handle) DO UPDATE SET
+                       did = coalesce(excluded.did, did),
+                       displayName = coalesce(excluded.displayName, displayName),
+                       followersCount = coalesce(excluded.followersCount, followersCount),
+                       followsCount = coalesce(excluded.followsCount, followsCount),
+                       postsCount = coalesce(excluded.postsCount, postsCount),
+                       updated_at = excluded.updated_at""", rows)
+        return len(rows)
+
+    def _snapshot(self, kind, owner, now):
+        self._db.execute(
+            "INSERT INTO snapshots VALUES (?, ?, ?) "
+            "ON CONFLICT (kind, owner) DO UPDATE SET collected_at = excluded.collected_at",
+            (kind, owner, now))
+
+    def _owners(self, kind, owners):
+        # Owners of a kind of snapshot in first-collected order, optionally filtered
+        query = "SELECT owner FROM snapshots WHERE kind = ?"
+        args = (kind,)
+        if owners is not None:
+            owners = list(owners)
+            query += f" AND owner IN ({_placeholders(owners)})"
+            args += tuple(owners)
+        return [r[0] for r in self._select(query + " ORDER BY rowid", args)]
+
+    def replace_follows(self, follower, followed):
+        """
+        Store an account's current follow list.
+
+        Edges that are no longer in the list are deleted; the remaining
+        ones keep their insertion order (the order follows_map() returns).
+
+        Returns:
+            Number of edges stored
+        """
+        followed = list(dict.fromkeys(followed))
+        now = time.time()
+        with self._lock, self._db:
+            self._snapshot('follows', follower, now)
+            self._db.execute(
+                "DELETE FROM follows WHERE follower = ? AND followed NOT IN "
+                "(SELECT value FROM json_each(?))", (follower, json.dumps(followed)))
+            self._db.executemany(
+                "INSERT INTO follows VALUES (?, ?, ?) "
+                "ON CONFLICT (follower, followed) DO UPDATE SET collected_at = excluded.collected_at",
+                [(follower, handle, now) for handle in followed])
+        return len(followed)
+
+    def _upsert_posts(self, rows, now):
+        # rows: (uri, author, text, createdAt, replyCount, likeCount, repostCount,
+        # replies_collected); None keeps the stored value
+        self._db.executemany(
+            """INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (uri) DO UPDATE SET
+                   author = coalesce(excluded.author, author),
+                   text = coalesce(excluded.text, text),
+                   createdAt = coalesce(excluded.createdAt, createdAt),
+                   created_us = coalesce(excluded.created_us, created_us),
+                   replyCount = coalesce(excluded.replyCount, replyCount),
+                   likeCount = coalesce(excluded.likeCount, likeCount),
+                   repostCount = coalesce(excluded.repostCount, repostCount),
+                   replies_collected = coalesce(excluded.replies_collected, replies_collected),
+                   updated_at = excluded.updated_at""",
+            [(uri, author, text, created, to_epoch_us(created), replies, likes, reposts,
+              collected, now)
+             for uri, author, text, created, replies, likes, reposts, collected in rows])
+
+    def upsert_posts(self, posts, author=None):
+        """
+        Insert or update posts.
+
+        Args:
+            posts: Iterable of post dicts / Post records with 'uri' and any of
+                author, text, createdAt, replyCount, likeCount, repostCount
+            author: Author handle for posts that don't carry one
+
+        Returns:
+            Number of posts written
+        """
+        rows = [(p['uri'], p.get('author') or author, p.get('text'), p.get('createdAt'),
+                 p.get('replyCount'), p.get('likeCount'), p.get('repostCount'), None)
+                for p in posts if p.get('uri')]
+        with self._lock, self._db:
+            self._upsert_posts(rows, time.time())
+        return len(rows)
+
+    def replace_feed(self, senator, items):
+        """
+        Store the posts a senator's feed currently holds (e.g. the last 24h).
+
+        Args:
+            senator: Senator handle
+            items: Iterable of post URIs, or of feed_<handle>.json entries
+                (dicts with 'uri' and optionally author, text, createdAt),
+                which are upserted into posts as well
+
+        Returns:
+            Number of feed items stored
+        """
+        now = time.time()
+        feed = {}
+        posts = []
+        for item in items:
+            if isinstance(item, str):
+                feed.setdefault(item, None)
+            elif item.get('uri'):
+                feed[item['uri']] = item.get('author')
+                posts.append((item['uri'], item.get('author'), item.get('text'),
+                              item.get('createdAt'), None, None, None, None))
+        with self._lock, self._db:
+            self._upsert_posts(posts, now)
+            self._snapshot('feed', senator, now)
+            self._db.execute(
+                "DELETE FROM feed_items WHERE senator = ? AND uri NOT IN "
+                "(SELECT value FROM json_each(?))", (senator, json.dumps(list(feed))))
+            self._db.executemany(
+                """INSERT INTO feed_items VALUES (?, ?, ?, ?)
+                   ON CONFLICT (senator, uri) DO UPDATE SET
+                       author = coalesce(excluded.author, author),
+                       collected_at = excluded.collected_at""",
+                [(senator, uri, author, now) for uri, author in feed.items()])
+        return len(feed)
+
+    def upsert_senator_replies(self, senator, data):
+        """
+        Store a senator's posts and their replies (replies_<handle>.json data).
+
+        Each post's stored replies are replaced by the ones in data (a
+        collection run always writes a post's full reply list); posts that
+        aren't in data are kept. Repliers' profile counts, where present,
+        go into profiles.
+
+        Args:
+            senator: Senator handle
+            data: List of post dicts with post_uri, post_text, post_createdAt,
+                replyCount, replies_collected and replies
+
+        Returns:
+            (posts, replies) written
+        """
+        now = time.time()
+        posts = []
+        replies = []
+        profiles = {}
+        for post in data:
+            uri = post['post_uri']
+            # the author isn't recorded (a senator's feed may include reposts)
+            posts.append((uri, None, post.get('post_text'), post.get('post_createdAt'),
+                          post.get('replyCount'), None, None, post.get('replies_collected')))
+            for position, reply in enumerate(post.get('replies', [])):
+                created = reply.get('createdAt')
+                replies.append((uri, position, reply.get('handle'), reply.get('displayName'),
+                                created, to_epoch_us(created), reply.get('text'),
+                                reply.get('likeCount'))
+                               + tuple(reply.get(k) for k in OPTIONAL_REPLY_FIELDS))
+                if reply.get('handle') and reply.get('followersCount') is not None:
+                    profiles[reply['handle']] = (
+                        reply['handle'], None, reply.get('displayName'),
+                        *(reply.get(k) for k in PROFILE_COUNTS), now)
+        uris = [post['post_uri'] for post in data]
+        with self._lock, self._db:
+            self._upsert_posts(posts, now)
+            self._snapshot('replies', senator, now)
+            self._db.executemany(
+                "INSERT INTO senator_posts VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (senator, uri) DO UPDATE SET "
+                "position = excluded.position, collected_at = excluded.collected_at",
+                [(senator, uri, position, now) for position, uri in enumerate(uris)])
+            self._db.execute(
+                "DELETE FROM replies WHERE post_uri IN (SELECT value FROM json_each(?))",
+                (json.dumps(uris),))
+            self._db.executemany(
+                "INSERT INTO replies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", replies)
+            self._db.executemany(
+                """INSERT INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (handle) DO UPDATE SET
+                       displayName = coalesce(excluded.displayName, displayName),
+                       followersCount = excluded.followersCount,
+                       followsCount = excluded.followsCount,
+                       postsCount = excluded.postsCount,
+                       updated_at = excluded.updated_at""", list(profiles.values()))
+        return len(posts), len(replies)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _select(self, query, args=()):
+        with self._lock:
+            return self._db.execute(query, args).fetchall()
+
+    def query(self, sql, args=()):
+        """Run a read-only SQL query; rows as dicts."""
+        return [dict(row) for row in self._select(sql, args)]
+
+    def follows_map(self, followers=None):
+        """
+        follower -> list of followed handles, like senator_follows_map.json.
+
+        Args:
+            followers: Only these followers (default: every follower stored)
+        """
+        follows = {follower: [] for follower in self._owners('follows', followers)}
+        query = "SELECT follower, followed FROM follows"
+        args = ()
+        if followers is not None:
+            query += f" WHERE follower IN ({_placeholders(follows)})"
+            args = tuple(follows)
+        for follower, followed in self._select(query + " ORDER BY rowid", args):
+            follows[follower].append(followed)
+        return follows
+
+    def followers_of(self, handle):
+        """Accounts stored as following handle (uses the followed index)."""
+        return [r[0] for r in self._select(
+            "SELECT follower FROM follows WHERE followed = ? ORDER BY follower", (handle,))]
+
+    def feed_uris(self, senators=None):
+        """senator -> list of post URIs in their feed, like senator_post_uris_24h.json."""
+        feeds = {senator: [] for senator in self._owners('feed', senators)}
+        query = "SELECT senator, uri FROM feed_items"
+        args = ()
+        if senators is not None:
+            query += f" WHERE senator IN ({_placeholders(feeds)})"
+            args = tuple(feeds)
+        for senator, uri in self._select(query + " ORDER BY rowid", args):
+            feeds[senator].append(uri)
+        return feeds
+
+    def profile(self, handle):
+        """A stored profile as a dict, or None."""
+        rows = self.query("SELECT * FROM profiles WHERE handle = ?", (handle,))
+        return rows[0] if rows else None
+
+    def reply_senators(self):
+        """Senators with collected replies, sorted."""
+        return sorted(self._owners('replies', None))
+
+    def senator_replies(self, senator):
+        """
+        A senator's posts with their replies, in the replies_<handle>.json layout.
+
+        Returns:
+            List of post dicts in the order of the latest ingest, followed by
+            posts only earlier runs collected; None if nothing was collected
+            for the senator
+        """
+        posts = self._select(
+            "SELECT p.uri, p.text, p.createdAt, p.replyCount, p.replies_collected "
+            "FROM senator_posts s JOIN posts p ON p.uri = s.uri WHERE s.senator = ? "
+            "ORDER BY s.collected_at DESC, s.position", (senator,))
+        if not posts:
+            return [] if self._owners('replies', [senator]) else None
+        data = []
+        by_uri = {}
+        for uri, text, created, reply_count, collected in posts:
+            post = {'post_uri': uri, 'post_text': text, 'post_createdAt': created,
+                    'replyCount': reply_count, 'replies_collected': collected, 'replies': []}
+            data.append(post)
+            by_uri[uri] = post
+        columns = REPLY_FIELDS + OPTIONAL_REPLY_FIELDS
+        rows = self._select(
+            f"SELECT r.post_uri, {', '.join('r.' + c for c in columns)} FROM replies r "
+            f"JOIN senator_posts s ON s.uri = r.post_uri WHERE s.senator = ? "
+            f"ORDER BY r.post_uri, r.position", (senator,))
+        for row in rows:
+            reply = {k: row[k] for k in REPLY_FIELDS}
+            reply.update((k, row[k]) for k in OPTIONAL_REPLY_FIELDS if row[k] is not None)
+            by_uri[row['post_uri']]['replies'].append(reply)
+        return data
+
+    def iter_replies(self, columns=None, senator=None, reply_count=None, since=None):
+        """
+        Stream reply rows without building per-post structures.
+
+        Args:
+            columns: Reply columns to return (default: all), plus any of
+                'senator', 'post_createdAt', 'post_created_us', 'replyCount'
+            senator: Only this senator's posts (handle or list of handles)
+            reply_count: Only posts whose replyCount is in (low, high), inclusive
+            since: Only replies created at or after this datetime / ISO string
+
+        Yields:
+            Dicts, ordered by senator, post and position within the post. A post
+            in several senators' data is returned once per senator, as
+            reading every replies_<handle>.json would.
+        """
+        post_columns = {'senator': 's.senator', 'post_createdAt': 'p.createdAt',
+                        'post_created_us': 'p.created_us', 'replyCount': 'p.replyCount'}
+        columns = list(columns) if columns else ['post_uri', 'position', *REPLY_FIELDS,
+                                                   'created_us', *OPTIONAL_REPLY_FIELDS]
+        select = ', '.join(f"{post_columns[c]} AS {c}" if c in post_columns else f"r.{c}"
+                           for c in columns)
+        where = []
+        args = []
+        if senator is not None:
+            senators = [senator] if isinstance(senator, str) else list(senator)
+            where.append(f"s.senator IN ({_placeholders(senators)})")
+            args.extend(senators)
+        if reply_count is not None:
+            where.append("p.replyCount BETWEEN ? AND ?")
+            args.extend(reply_count)
+        if since is not None:
+            where.append("r.created_us >= ?")
+            args.append(to_epoch_us(since))
+        query = (f"SELECT {select} FROM replies r "
+                 f"JOIN senator_posts s ON s.uri = r.post_uri "
+                 f"JOIN posts p ON p.uri = r.post_uri "
+                 + (f"WHERE {' AND '.join(where)} " if where else "")
+                 + "ORDER BY s.senator, r.post_uri, r.position")
+        with self._lock:
+            cursor = self._db.execute(query, tuple(args))
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+    def stats(self):
+        """Row count per table and the size of the database files."""
+        counts = {table: self._select(f"SELECT count(*) FROM {table}")[0][0]
+                  for table in TABLES}
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ('', '-wal')
+                   if os.path.exists(self.path + suffix))
+        return {'rows': counts, 'bytes': size}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ============================================================================
+# Importing the JSON files
+# ============================================================================
+
+def _handles_by_stem():
+    # File names replace the dots of a handle with underscores
+    if not os.path.exists('senators_bluesky.csv'):
+        return {}
+    from bluesky_helpers import load_senators
+    return {s['handle'].replace('.', '_'): s['handle']
+            for s in load_senators('senators_bluesky.csv')}
+
+
+def _json_files(directory, prefix):
+    # (path, stem) of prefix*.json files, plain or compressed (bluesky_jsonio.py)
+    found = []
+    for ext in ('.json', '.json.gz', '.json.zst'):
+        for path in glob.glob(os.path.join(directory, f'{prefix}*{ext}')):
+            found.append((path, os.path.basename(path)[len(prefix):-len(ext)]))
+    return sorted(found)
+
+
+def import_json_files(store, directory='.'):
+    """
+    Load the collected JSON files from directory into a DataStore.
+
+    Reads senator_follows_map.json, feed_*.json, senator_post_uris_24h.json
+    (after the feed files, so feed_uris() matches it) and replies_*.json,
+    plain or compressed. Missing files are skipped, and so are files
+    matching feed_* / replies_* that aren't a senator's list of posts (e.g.
+    feed_stream_state.json). Senator handles are recovered from the file
+    names through senators_bluesky.csv when available.
+
+    Returns:
+        Dict of file name -> rows written
+    """
+    handles = _handles_by_stem()
+    written = {}
+
+    path = os.path.join(directory, 'senator_follows_map.json')
+    if os.path.exists(path):
+        follows = load_json(path)
+        written[os.path.basename(path)] = sum(
+            store.replace_follows(senator, followed) for senator, followed in follows.items())
+
+    for path, stem in _json_files(directory, 'feed_'):
+        items = load_json(path)
+        if not isinstance(items, list):
+            continue
+        senator = items[0]['senator_handle'] if items else handles.get(stem, stem)
+        written[os.path.basename(path)] = store.replace_feed(senator, items)
+
+    path = os.path.join(directory, 'senator_post_uris_24h.json')
+    if os.path.exists(path):
+        written[os.path.basename(path)] = sum(
+            store.replace_feed(senator, uris) for senator, uris in load_json(path).items())
+
+    for path, stem in _json_files(directory, 'replies_'):
+        data = load_json(path)
+        if not isinstance(data, list):
+            continue
+        written[os.path.basename(path)] = store.upsert_senator_replies(
+            handles.get(stem, stem), data)
+    return written
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQLite datastore for collected Bluesky data.")
+    parser.add_argument('--file', default=DEFAULT_STORE_FILE, help="Database file")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = sub.add_parser('import', help="Import the collected JSON files")
+    import_parser.add_argument('--dir', default='.', help="Directory with the JSON files")
+
+    sub.add_parser('stats', help="Rows per table")
+
+    args = parser.parse_args(argv)
+    with DataStore(args.file) as store:
+        if args.command == 'import':
+            for name, rows in import_json_files(store, args.dir).items():
+                print(f"{name:45s} {rows}")
+        elif args.command == 'stats':
+            stats = store.stats()
+            for table, rows in stats['rows'].items():
+                print(f"{table:12s} {rows:9d} rows")
+            print(f"{args.file}: {stats['bytes'] / 1e6:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
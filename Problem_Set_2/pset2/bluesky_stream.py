@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Rolling 24h senator feeds maintained from a post-event stream.
+
+bluesky_part1.py and bluesky_part1.3.py rebuild "what each senator saw in
+the last 24 hours" by re-polling every followed author. With an event
+stream the window can instead be kept up to date as posts arrive:
+
+    feeds = RollingFeeds(load_json('senator_follows_map.json'),
+                         dids=resolve_dids(plan.authors))
+    for event in iter_events('events.ndjson'):      # or 'tcp://127.0.0.1:8766'
+        feeds.apply(event)
+    feeds.save_uris('senator_post_uris_24h.json')    # any time, no polling
+
+Events are Jetstream-style NDJSON, one JSON object per line:
+
+    {"did": "did:plc:...", "time_us": 1725911162329308, "kind": "commit",
+     "commit": {"operation": "create", "collection": "app.bsky.feed.post",
+                "rkey": "3l3qo2vutsw2b",
+                "record": {"text": "...", "createdAt": "2024-09-09T19:46:02.102Z"}}}
+
+'delete' commits remove a post, and 'identity' events
+({"kind": "identity", "identity": {"did": ..., "handle": ...}}) keep the
+DID -> handle mapping current. Other collections and kinds are ignored.
+
+The window follows stream time (the largest time_us seen), so replaying a
+recorded file gives exactly the feeds a live consumer had at that point.
+Posts are evicted through a heap ordered by createdAt: every event pops the
+posts that have fallen out of the window, so each post is pushed and popped
+once. Deleted posts stay in the heap and are skipped when they come up.
+
+Sources (iter_events):
+    path.ndjson          a recorded stream, read once
+    path.ndjson + follow=True   tail the file as another process appends
+    tcp://host:port      line-delimited JSON over a socket; serve_events()
+                         (or `python bluesky_stream.py serve`) is a local
+                         stand-in that replays a file over TCP
+
+The real Jetstream speaks WebSocket (wss://jetstream2.us-east.bsky.network/
+subscribe?wantedCollections=app.bsky.feed.post&cursor=<time_us>); piping it
+to a file or socket (e.g. with websocat) feeds straight into iter_events.
+Starting it with cursor = now - 24h backfills the window.
+
+Command line:
+
+    python bluesky_stream.py run --source events.ndjson --every 60
+    python bluesky_stream.py serve events.ndjson --port 8766 --speed 60
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import argparse
+import heapq
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+
+import bluesky_jsonio as jsonio
+from bluesky_crawl_plan import CrawlPlan
+from bluesky_helpers import PROFILES_BATCH_SIZE, get_profiles, load_json, save_json, to_epoch_us
+
+POST_COLLECTION = 'app.bsky.feed.post'
+
+# Length of the rolling window
+DEFAULT_WINDOW_HOURS = 24
+
+# handle -> DID of the followed authors, so events (which carry DIDs) can be matched
+DEFAULT_DID_FILE = 'author_dids.json'
+
+DEFAULT_STREAM_PORT = 8766
+
+_US = 1_000_000
+
+
+def _iso(time_us):
+    return datetime.fromtimestamp(time_us / _US, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+# ============================================================================
+# Handle <-> DID
+# ============================================================================
+
+def resolve_dids(handles, path=DEFAULT_DID_FILE):
+    """
+    DIDs of the given handles, looked up with getProfiles and cached in path.
+
+    Args:
+        handles: Handles to resolve (e.g. CrawlPlan.authors)
+        path: JSON cache of handle -> DID (None to skip caching)
+
+    Returns:
+        Dict of handle -> DID for every handle that resolved
+    """
+    dids = load_json(path) if path and os.path.exists(path) else {}
+    missing = [h for h in dict.fromkeys(handles) if h not in dids]
+    for i in range(0, len(missing), PROFILES_BATCH_SIZE):
+        result = get_profiles(missing[i:i + PROFILES_BATCH_SIZE])
+        for profile in (result or {}).get('profiles', []):
+            dids[profile['handle']] = profile['did']
+    if path and missing:
+        save_json(dids, path)
+    return dids
+
+
+# ============================================================================
+# Rolling window
+# ============================================================================
+
+class RollingFeeds:
+    """
+    Each senator's feed over the last window_hours, updated event by event.
+
+    Args:
+        follows_map: Dict of senator handle -> followed handles
+            (senator_follows_map.json)
+        dids: Dict of handle -> DID for the followed authors; authors
+            without a DID are only matched once an identity event names them
+        window_hours: Window length
+
+    Attributes:
+        now_us: Stream time (largest time_us seen so far)
+        cursor: time_us of the last applied event; pass it back to the
+            stream to resume without gaps
+        counts: Events seen per outcome ('added', 'deleted', 'evicted',
+            'expired' (already outside the window on arrival), 'ignored')
+    """
+
+    def __init__(self, follows_map, dids=None, window_hours=DEFAULT_WINDOW_HOURS):
+        plan = CrawlPlan(follows_map)
+        self.senators = list(follows_map)
+        self.window_us = int(window_hours * 3600 * _US)
+        self._followers = plan.followers                 # author handle -> senators
+        self._handle_of = {}                             # DID -> handle
+        for handle, did in (dids or {}).items():
+            if handle in self._followers:
+                self._handle_of[did] = handle
+        self._posts = {}                                 # uri -> post dict
+        self._heap = []                                  # (createdAt µs, uri)
+        self._senator_uris = {s: set() for s in self.senators}
+        self._lock = threading.Lock()
+        self.now_us = 0
+        self.cursor = None
+        self.counts = dict.fromkeys(('added', 'deleted', 'evicted', 'expired', 'ignored'), 0)
+
+    def __len__(self):
+        return len(self._posts)
+
+    @property
+    def window_start_us(self):
+        return self.now_us - self.window_us
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def apply(self, event):
+        """
+        Apply one stream event (a decoded NDJSON line).
+
+        Returns:
+            The outcome: 'added', 'deleted', 'expired' or 'ignored'
+        """
+        with self._lock:
+            time_us = event.get('time_us')
+            if time_us:
+                self.now_us = max(self.now_us, time_us)
+                self.cursor = time_us
+            outcome = self._apply(event)
+            self.counts[outcome] += 1
+            self._evict()
+            return outcome
+
+    def _apply(self, event):
+        kind = event.get('kind')
+        if kind == 'identity':
+            identity = event.get('identity') or {}
+            did, handle = identity.get('did'), identity.get('handle')
+            if did and handle in self._followers:
+                self._handle_of[did] = handle
+            return 'ignored'
+        commit = event.get('commit') or {}
+        if kind != 'commit' or commit.get('collection') != POST_COLLECTION:
+            return 'ignored'
+        author = self._handle_of.get(event.get('did'))
+        if author is None:
+            return 'ignored'
+        uri = f"at://{event['did']}/{POST_COLLECTION}/{commit.get('rkey')}"
+
+        if commit.get('operation') == 'delete':
+            if self._drop(uri):
+                return 'deleted'
+            return 'ignored'
+        if commit.get('operation') != 'create' or uri in self._posts:
+            return 'ignored'
+
+        record = commit.get('record') or {}
+        created_us = to_epoch_us(record.get('createdAt'))
+        if created_us is None:
+            return 'ignored'
+        if created_us < self.window_start_us:
+            return 'expired'
+        self._posts[uri] = {'author': author, 'text': record.get('text'),
+                            'createdAt': record.get('createdAt'), 'uri': uri,
+                            '_created_us': created_us}
+        heapq.heappush(self._heap, (created_us, uri))
+        for senator in self._followers[author]:
+            self._senator_uris[senator].add(uri)
+        return 'added'
+
+    def _drop(self, uri):
+        post = self._posts.pop(uri, None)
+        if post is None:
+            return False
+        for senator in self._followers[post['author']]:
+            self._senator_uris[senator].discard(uri)
+        return True
+
+    def _evict(self):
+        start = self.window_start_us
+        heap = self._heap
+        while heap and heap[0][0] < start:
+            created_us, uri = heapq.heappop(heap)
+            post = self._posts.get(uri)
+            # Skip entries whose post was deleted (or re-added) since
+            if post is not None and post['_created_us'] == created_us:
+                self._drop(uri)
+                self.counts['evicted'] += 1
+
+    def advance(self, now_us=None):
+        """
+        Move the window forward without an event (e.g. to the wall clock
+        during a quiet stream) and evict what fell out of it.
+        """
+        with self._lock:
+            now_us = int(time.time() * _US) if now_us is None else now_us
+            self.now_us = max(self.now_us, now_us)
+            self._evict()
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def feed(self, senator, senator_party=None):
+        """
+        A senator's current feed, newest first, in the feed_<handle>.json format.
+        """
+        with self._lock:
+            posts = [self._posts[uri] for uri in self._senator_uris.get(senator, ())]
+        posts.sort(key=lambda p: (p['_created_us'], p['uri']), reverse=True)
+        return [{'senator_handle': senator, 'senator_party': senator_party,
+                 'author': p['author'], 'text': p['text'], 'createdAt': p['createdAt'],
+                 'uri': p['uri']} for p in posts]
+
+    def uri_snapshot(self):
+        """senator -> post URIs currently in the window (senator_post_uris_24h.json)."""
+        with self._lock:
+            return {senator: sorted(uris) for senator, uris in self._senator_uris.items()}
+
+    def save_uris(self, path='senator_post_uris_24h.json'):
+        snapshot = self.uri_snapshot()
+        _save_atomic(snapshot, path)
+        return snapshot
+
+    def save_feeds(self, parties=None, pattern='feed_{}.json'):
+        """
+        Write every senator's feed_<handle>.json.
+
+        Args:
+            parties: Optional dict of senator handle -> party
+            pattern: File name pattern, formatted with the handle ('.' -> '_')
+        """
+        for senator in self.senators:
+            feed = self.feed(senator, (parties or {}).get(senator))
+            _save_atomic(feed, pattern.format(senator.replace('.', '_')))
+
+    def stats(self):
+        with self._lock:
+            return {'posts': len(self._posts), 'heap': len(self._heap),
+                    'window_start': _iso(self.window_start_us) if self.now_us else None,
+                    'cursor': self.cursor, **self.counts}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save_state(self, path):
+        """Write the window and cursor so a restarted consumer can resume."""
+        with self._lock:
+            state = {'now_us': self.now_us, 'cursor': self.cursor,
+                     'handles': self._handle_of,
+                     'posts': sorted(self._posts.values(), key=lambda p: p['_created_us'])}
+        _save_atomic(state, path)
+
+    def load_state(self, path):
+        """Restore a window written by save_state() (posts of unfollowed authors are dropped)."""
+        state = load_json(path)
+        with self._lock:
+            for did, handle in state.get('handles', {}).items():
+                if handle in self._followers:
+                    self._handle_of[did] = handle
+            self.now_us = max(self.now_us, state.get('now_us') or 0)
+            self.cursor = state.get('cursor')
+            for post in state.get('posts', []):
+                if post['author'] in self._followers and post['uri'] not in self._posts:
+                    self._posts[post['uri']] = post
+                    heapq.heappush(self._heap, (post['_created_us'], post['uri']))
+                    for senator in self._followers[post['author']]:
+                        self._senator_uris[senator].add(post['uri'])
+            self._evict()
+
+
+def _save_atomic(data, path):
+    # Same encoding as save_json(), swapped in whole so readers never see half a file
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(jsonio.encode(data, indent=2))
+    os.replace(tmp, path)
+
+
+# ============================================================================
+# Event sources
+# ============================================================================
+
+def _decode_lines(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue  # partial line at the end of a file being written
+
+
+def _follow_file(f, poll_interval):
+    partial = ''
+    while True:
+        line = f.readline()
+        if not line:
+            time.sleep(poll_interval)
+            continue
+        # An incomplete last line is held back until the writer finishes it
+        partial += line
+        if partial.endswith('\n'):
+            yield partial
+            partial = ''
+
+
+def iter_events(source, follow=False, poll_interval=0.5):
+    """
+    Decoded events from an NDJSON file or a tcp://host:port stream.
+
+    Args:
+        source: File path, or 'tcp://host:port'
+        follow: For files, keep waiting for appended lines (like tail -f)
+        poll_interval: Seconds between checks for new lines when following
+
+    Yields:
+        Event dicts; malformed lines are skipped
+    """
+    if source.startswith('tcp://'):
+        host, port = source[len('tcp://'):].rsplit(':', 1)
+        with socket.create_connection((host, int(port))) as sock:
+            with sock.makefile('r', encoding='utf-8') as f:
+                yield from _decode_lines(f)
+        return
+    with open(source, 'r', encoding='utf-8') as f:
+        yield from _decode_lines(_follow_file(f, poll_interval) if follow else f)
+
+
+def consume(feeds, events, uris_file=None, every=None, state_file=None, max_events=None):
+    """
+    Apply events to feeds, writing snapshots every `every` seconds (wall clock).
+
+    Args:
+        feeds: RollingFeeds
+        events: Iterable of events (e.g. iter_events(...))
+        uris_file: senator_post_uris_24h.json path to refresh (None to skip)
+        every: Seconds between snapshots while consuming (None: only at the end)
+        state_file: Also save the window here with every snapshot
+        max_events: Stop after this many events
+
+    Returns:
+        Number of events applied
+    """
+    def snapshot():
+        if uris_file:
+            feeds.save_uris(uris_file)
+        if state_file:
+            feeds.save_state(state_file)
+
+    n = 0
+    last = time.monotonic()
+    for event in events:
+        feeds.apply(event)
+        n += 1
+        if every is not None and time.monotonic() - last >= every:
+            snapshot()
+            last = time.monotonic()
+        if max_events is not None and n >= max_events:
+            break
+    snapshot()
+    return n
+
+
+# ============================================================================
+# Local stream stand-in
+# ============================================================================
+
+def serve_events(path, host='127.0.0.1', port=DEFAULT_STREAM_PORT, speed=None):
+    """
+    Replay an NDJSON event file to every client that connects over TCP.
+
+    Args:
+        path: Event file
+        host, port: Address to listen on (port 0 picks a free port)
+        speed: None sends as fast as possible; otherwise events are paced by
+            their time_us, speed times faster than real time
+
+    Returns:
+        The started server (call .shutdown() to stop it);
+        server.server_address has the actual port
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            previous = None
+            with open(path, 'rb') as f:
+                for line in f:
+                    if speed:
+                        try:
+                            time_us = json.loads(line).get('time_us')
+                        except json.JSONDecodeError:
+                            time_us = None
+                        if time_us and previous:
+                            time.sleep(max(0.0, (time_us - previous) / _US / speed))
+                        previous = time_us or previous
+                    try:
+                        self.wfile.write(line if line.endswith(b'\n') else line + b'\n')
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+
+    server = socketserver.ThreadingTCPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name='bsky-stream-server').start()
+    return server
+
+
+def post_event(did, rkey, created_at, text='', time_us=None, operation='create'):
+    """A Jetstream-style commit event for a post (handy for recording test streams)."""
+    commit = {'operation': operation, 'collection': POST_COLLECTION, 'rkey': rkey}
+    if operation == 'create':
+        commit['record'] = {'$type': POST_COLLECTION, 'text': text, 'createdAt': created_at}
+    return {'did': did, 'time_us': time_us or to_epoch_us(created_at), 'kind': 'commit',
+            'commit': commit}
+
+
+# ============================================================================
+# Command line interface
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling 24h senator feeds from an event stream.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help="Consume a stream and keep the feeds current")
+    run_parser.add_argument('--source', required=True, help="NDJSON file or tcp://host:port")
+    run_parser.add_argument('--follow', action='store_true', help="Tail the file")
+    run_parser.add_argument('--follows-map', default='senator_follows_map.json')
+    run_parser.add_argument('--dids', default=DEFAULT_DID_FILE,
+                            help="handle -> DID cache (missing DIDs are looked up)")
+    run_parser.add_argument('--out', default='senator_post_uris_24h.json')
+    run_parser.add_argument('--state', help="Save/resume the window from this file")
+    run_parser.add_argument('--every', type=float, default=60.0,
+                            help="Seconds between snapshots")
+    run_parser.add_argument('--hours', type=float, default=DEFAULT_WINDOW_HOURS)
+    run_parser.add_argument('--feeds', action='store_true',
+                            help="Also write feed_<handle>.json at the end")
+
+    serve_parser = sub.add_parser('serve', help="Replay an NDJSON file over TCP")
+    serve_parser.add_argument('file')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_STREAM_PORT)
+    serve_parser.add_argument('--speed', type=float, help="Pace events at N x real time")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        server = serve_events(args.file, args.host, args.port, args.speed)
+        print(f"Serving {args.file} on tcp://{args.host}:{server.server_address[1]}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    follows_map = load_json(args.follows_map)
+    dids = resolve_dids(CrawlPlan(follows_map).authors, args.dids)
+    feeds = RollingFeeds(follows_map, dids, window_hours=args.hours)
+    if args.state and os.path.exists(args.state):
+        feeds.load_state(args.state)
+        print(f"Resumed window at cursor {feeds.cursor}")
+    try:
+        consume(feeds, iter_events(args.source, follow=args.follow), args.out,
+                every=args.every, state_file=args.state)
+    except KeyboardInterrupt:
+        # Stopping a followed stream is the normal way out: keep the last window
+        feeds.save_uris(args.out)
+        if args.state:
+            feeds.save_state(args.state)
+    if args.feeds:
+        feeds.save_feeds()
+    print(f"Window written to {args.out}: {feeds.stats()}")
+
+
+if __name__ == '__main__':
+    main()
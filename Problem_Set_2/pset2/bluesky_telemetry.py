@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint request telemetry for the Bluesky collectors.
+
+make_request() reports every call to the TELEMETRY registry in
+bluesky_helpers, so after (or during) a crawl you can see where the time
+went:
+
+    from bluesky_helpers import TELEMETRY
+    TELEMETRY.snapshot()                      # all endpoints
+    TELEMETRY.snapshot('app.bsky.feed.getAuthorFeed')
+
+Each endpoint records:
+    - calls, and latency percentiles (p50/p95/p99) of the HTTP round trip
+    - bytes received on the wire, bytes after decompression (so the saving
+      from gzip on large getPostThread responses shows up as
+      'compression_ratio') and time spent decoding JSON
+    - a histogram of outcomes (HTTP status, 'timeout', 'network', 'cache')
+    - seconds spent waiting on the rate limiter, the circuit breaker and
+      retry backoff
+
+TELEMETRY.start_dump('telemetry.jsonl', interval=30) appends a snapshot as
+one JSON line every 30 seconds (and once more on stop_dump()), which is
+handy for comparing runs. ProgressLine prints a live
+"done/total, requests/sec, ETA" line for long loops such as collect_feeds.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import json
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of an already sorted sequence, or None if empty."""
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class EndpointStats:
+    """Counters for one endpoint."""
+
+    def __init__(self):
+        self.calls = 0
+        self.latencies = array('d')
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.decode_time = 0.0
+        self.statuses = Counter()
+        self.waits = Counter()  # reason -> seconds
+
+    def snapshot(self):
+        lat = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'latency_p50': percentile(lat, 50),
+            'latency_p95': percentile(lat, 95),
+            'latency_p99': percentile(lat, 99),
+            'latency_total': sum(lat),
+            'bytes_received': self.bytes_received,
+            'bytes_decoded': self.bytes_decoded,
+            'compression_ratio': (self.bytes_decoded / self.bytes_received
+                                  if self.bytes_received else None),
+            'decode_time': self.decode_time,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items(), key=str)},
+            'wait_time': dict(self.waits),
+        }
+
+
+class Telemetry:
+    """
+    Thread-safe, in-process registry of per-endpoint request statistics.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self._dump_stop = None
+
+    def _stats(self, endpoint):
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = EndpointStats()
+        return stats
+
+    # ------------------------------------------------------------------
+    # Recording (called from make_request)
+    # ------------------------------------------------------------------
+
+    def record_request(self, endpoint, outcome, latency, nbytes=0, decoded_bytes=None):
+        """
+        Record one HTTP attempt.
+
+        Args:
+            endpoint: API endpoint
+            outcome: HTTP status code, 'timeout' or 'network'
+            latency: Seconds for the round trip
+            nbytes: Response body size on the wire, in bytes
+            decoded_bytes: Body size after decompression (default: nbytes)
+        """
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats.calls += 1
+            stats.latencies.append(latency)
+            stats.bytes_received += nbytes
+            stats.bytes_decoded += nbytes if decoded_bytes is None else decoded_bytes
+            stats.statuses[outcome] += 1
+
+    def record_cache_hit(self, endpoint):
+        with self._lock:
+            self._stats(endpoint).statuses['cache'] += 1
+
+    def record_decode(self, endpoint, seconds):
+        with self._lock:
+            self._stats(endpoint).decode_time += seconds
+
+    def record_wait(self, endpoint, reason, seconds):
+        """Record time a request spent waiting ('rate_limited', 'circuit_open', 'backoff')."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._stats(endpoint).waits[reason] += seconds
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def endpoints(self):
+        with self._lock:
+            return sorted(self._endpoints)
+
+    def total_calls(self):
+        with self._lock:
+            return sum(s.calls for s in self._endpoints.values())
+
+    def snapshot(self, endpoint=None):
+        """
+        Current statistics.
+
+        Args:
+            endpoint: Only this endpoint (default: dict of all endpoints)
+        """
+        with self._lock:
+            if endpoint is not None:
+                stats = self._endpoints.get(endpoint)
+                return stats.snapshot() if stats else None
+            return {ep: s.snapshot() for ep, s in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.started = time.time()
+
+    def after_fork(self):
+        """Start empty in a forked child (the parent's lock and dump thread aren't ours)."""
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self._dump_stop = None
+        self.reset()
+
+    # ------------------------------------------------------------------
+    # Periodic JSON-lines dump
+    # ------------------------------------------------------------------
+
+    def dump(self, path):
+        """Append one snapshot line to path."""
+        line = {'time': time.time(), 'elapsed': time.time() - self.started,
+                'endpoints': self.snapshot()}
+        with open(path, 'a') as f:
+            f.write(json.dumps(line) + '\n')
+
+    def start_dump(self, path, interval=30.0):
+        """Append a snapshot to path every interval seconds in the background."""
+        self.stop_dump()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.dump(path)
+            self.dump(path)
+
+        self._dump_stop = stop
+        self._dump_thread = threading.Thread(target=run, daemon=True,
+                                             name='bsky-telemetry-dump')
+        self._dump_thread.start()
+
+    def stop_dump(self):
+        """Stop the background dump (writing one final snapshot)."""
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
+
+    def summary(self):
+        """Human-readable one-line-per-endpoint summary."""
+        lines = []
+        for ep, s in self.snapshot().items():
+            p50 = s['latency_p50'] or 0.0
+            p95 = s['latency_p95'] or 0.0
+            waited = sum(s['wait_time'].values())
+            lines.append(f"{ep}: {s['calls']} calls, p50 {p50 * 1000:.0f}ms, "
+                         f"p95 {p95 * 1000:.0f}ms, {s['bytes_received'] / 1e6:.1f} MB "
+                         f"({s['bytes_decoded'] / 1e6:.1f} MB decoded), "
+                         f"decode {s['decode_time']:.1f}s, waited {waited:.1f}s, "
+                         f"statuses {s['statuses']}")
+        return '\n'.join(lines)
+
+
+class ProgressLine:
+    """
+    Live one-line progress indicator with requests/sec and ETA.
+
+    Args:
+        total: Number of work units expected
+        telemetry: Telemetry registry to read the request rate from
+        label: Text shown before the counts
+        stream: Where to write (default sys.stderr)
+    """
+
+    def __init__(self, total, telemetry, label='', stream=None, min_interval=0.5):
+        self.total = total
+        self.done = 0
+        self.telemetry = telemetry
+        self.label = label
+        self.stream = stream or sys.stderr
+        self.min_interval = min_interval
+        self._start = time.time()
+        self._start_calls = telemetry.total_calls()
+        self._last_draw = 0.0
+
+    def update(self, n=1):
+        self.done += n
+        now = time.time()
+        if now - self._last_draw >= self.min_interval or self.done >= self.total:
+            self._last_draw = now
+            self.stream.write('\r' + self.render(now))
+            self.stream.flush()
+
+    def render(self, now=None):
+        elapsed = max((now or time.time()) - self._start, 1e-9)
+        rps = (self.telemetry.total_calls() - self._start_calls) / elapsed
+        rate = self.done / elapsed
+        remaining = (self.total - self.done) / rate if rate > 0 else 0
+        mins, secs = divmod(int(remaining), 60)
+        return (f"{self.label} {self.done}/{self.total} | {rps:.1f} req/s | "
+                f"ETA {mins:d}m{secs:02d}s   ")
+
+    def close(self):
+        self.stream.write('\r' + self.render() + '\n')
+        self.stream.flush()
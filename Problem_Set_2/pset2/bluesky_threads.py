@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Flatten getPostThread responses into a compact reply table.
+
+get_post_thread(uri, depth=50) returns a nested structure: every node has a
+'post' and a list of 'replies', each of which is a node again. Walking it
+recursively hits Python's recursion limit on deep conversations and tends
+to build large intermediate lists. iter_thread_rows() walks the tree with an
+explicit stack and yields one small row per reply:
+
+    uri, parent_uri, root_uri, depth, author, displayName, createdAt,
+    likeCount, text, status
+
+depth is 1 for direct replies to the root post, 2 for replies to those, etc.
+status is 'ok' for normal posts and 'blocked' / 'notFound' for nodes the API
+couldn't show (their post fields are empty and they have no children).
+
+ThreadTableWriter streams rows straight into a CSV file so many large
+threads can be flattened without keeping them in memory. Every write_rows()
+call also stores a write_id (increasing across runs), so a thread that is
+fetched again is read back as of its latest write:
+
+    with ThreadTableWriter('thread_rows.csv') as writer:
+        for uri in uris:
+            writer.write_rows(iter_thread_rows(get_post_thread(uri)))
+
+    for row in read_thread_table('thread_rows.csv'):
+        ...
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import csv
+import os
+import time
+
+THREAD_COLUMNS = ('uri', 'parent_uri', 'root_uri', 'depth', 'author',
+                  'displayName', 'createdAt', 'likeCount', 'text', 'status')
+
+# On disk each row also carries the id of the write_rows() call that wrote it
+FILE_COLUMNS = THREAD_COLUMNS + ('write_id',)
+
+BLOCKED_POST = 'app.bsky.feed.defs#blockedPost'
+NOT_FOUND_POST = 'app.bsky.feed.defs#notFoundPost'
+
+
+def _node_status(node):
+    node_type = node.get('$type', '')
+    if node_type == BLOCKED_POST or node.get('blocked'):
+        return 'blocked'
+    if node_type == NOT_FOUND_POST or node.get('notFound'):
+        return 'notFound'
+    return 'ok'
+
+
+def iter_thread_rows(thread, include_root=False):
+    """
+    Walk a getPostThread response without recursion.
+
+    Args:
+        thread: Response from get_post_thread() (or its 'thread' node)
+        include_root: Also emit the root post itself as depth 0
+
+    Yields:
+        Dicts with the THREAD_COLUMNS keys, in the same pre-order the API
+        lists the replies (a reply is followed by its own sub-replies)
+    """
+    if not thread:
+        return
+    root = thread.get('thread', thread)
+    root_uri = root.get('post', {}).get('uri') or root.get('uri')
+
+    # Stack of (node, parent_uri, depth); children are pushed in reverse so
+    # they pop off in the API's order
+    stack = [(root, None, 0)]
+    while stack:
+        node, parent_uri, depth = stack.pop()
+        status = _node_status(node)
+        post = node.get('post') or {}
+        uri = post.get('uri') or node.get('uri')
+
+        if depth > 0 or include_root:
+            author = post.get('author', {})
+            record = post.get('record', {})
+            yield {
+                'uri': uri,
+                'parent_uri': parent_uri,
+                'root_uri': root_uri,
+                'depth': depth,
+                'author': author.get('handle'),
+                'displayName': author.get('displayName'),
+                'createdAt': record.get('createdAt'),
+                'likeCount': post.get('likeCount', 0) if status == 'ok' else None,
+                'text': record.get('text'),
+                'status': status,
+            }
+
+        for child in reversed(node.get('replies') or []):
+            stack.append((child, uri, depth + 1))
+
+
+class ThreadTableWriter:
+    """
+    Append thread rows to a CSV file as they are produced.
+
+    Args:
+        path: CSV file; the header is written only when the file is new
+            (a file from before write ids keeps its columns)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        fieldnames = FILE_COLUMNS
+        if not new_file:
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                fieldnames = next(csv.reader(f), None) or FILE_COLUMNS
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction='ignore')
+        if new_file:
+            self._writer.writeheader()
+        self._write_id = 0
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write_rows(self, rows):
+        """Write an iterable of rows (one thread's write); returns how many were written."""
+        # Nanosecond clock, so a later run's writes get larger ids than this one's
+        self._write_id = max(time.time_ns(), self._write_id + 1)
+        n = 0
+        for row in rows:
+            self._writer.writerow({**row, 'write_id': self._write_id})
+            n += 1
+        self._file.flush()
+        self.rows_written += n
+        return n
+
+    def close(self):
+        self._file.close()
+
+
+def read_thread_table(path):
+    """
+    Stream rows back from a ThreadTableWriter CSV.
+
+    'depth' and 'likeCount' are converted back to ints (likeCount is None
+    for blocked/notFound rows, as is parent_uri for root rows). A thread
+    written more than once (re-fetched by a later or resumed run) is
+    returned as of its latest write (the largest write_id for its root):
+    its current like counts and replies, without rows from earlier copies.
+    Files written before write ids treat each run of rows with the same
+    root_uri as one write.
+
+    Yields:
+        Row dicts with the THREAD_COLUMNS keys
+    """
+    # First pass: the latest write of every thread
+    latest_write = {}
+    for root, write_id, _ in _thread_writes(path):
+        latest_write[root] = max(write_id, latest_write.get(root, write_id))
+
+    for root, write_id, row in _thread_writes(path):
+        if write_id != latest_write[root]:
+            continue
+        row.pop('write_id', None)
+        row['parent_uri'] = row['parent_uri'] or None
+        row['depth'] = int(row['depth'])
+        row['likeCount'] = int(row['likeCount']) if row['likeCount'] else None
+        yield row
+
+
+def _thread_writes(path):
+    # (root_uri, write id, row) for every row of a thread table
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if 'write_id' in (reader.fieldnames or ()):
+            for row in reader:
+                yield row['root_uri'], int(row['write_id']), row
+            return
+        # Older files: a write is a run of consecutive rows with the same root
+        run = 0
+        previous_root = None
+        for row in reader:
+            if row['root_uri'] != previous_root:
+                run += 1
+                previous_root = row['root_uri']
+            yield row['root_uri'], run, row
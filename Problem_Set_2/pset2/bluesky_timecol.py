@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+createdAt as an int64 epoch-microsecond column, and array helpers on top.
+
+Comparing createdAt strings only orders them correctly while every string
+has the same UTC offset and precision ('...T12:00:00Z' sorts after
+'...T12:00:00.500Z', and '+02:00' offsets are ignored altogether), and
+parsing them one datetime at a time is slow for hundreds of thousands of
+replies. Convert the strings once, then work on integers:
+
+    ts = epoch_us_column([r['createdAt'] for r in replies])   # int64, UTC
+    recent = within_hours(ts, 24)                              # bool mask
+    rank, size = group_rank(ts, post_index)                    # order within each post
+    early = rank < size // 4
+
+Missing or unparseable timestamps become TS_NULL; they never match a
+window and sort after every real timestamp.
+
+bluesky_columnar.py stores these columns (createdAt_us, post_createdAt_us)
+next to the original strings.
+
+Dependencies: numpy
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bluesky_helpers import to_epoch_us as _to_epoch_us
+
+# Missing timestamp (sorts first numerically, so the helpers treat it explicitly)
+TS_NULL = np.iinfo(np.int64).min
+
+_US = 1_000_000
+
+
+def to_epoch_us(value):
+    """
+    One timestamp as integer microseconds since the epoch (UTC).
+
+    bluesky_helpers.to_epoch_us() with TS_NULL for None / unparseable values.
+    """
+    return _to_epoch_us(value, TS_NULL)
+
+
+def epoch_us_column(values):
+    """
+    Convert a sequence of createdAt strings to an int64 epoch-µs array.
+
+    Strings in the API's usual 'YYYY-MM-DDTHH:MM:SS[.fff]Z' form are parsed
+    by NumPy in one call; anything else (other offsets, None, junk) falls
+    back to to_epoch_us() one value at a time.
+
+    Returns:
+        np.ndarray of int64 (TS_NULL where missing)
+    """
+    values = list(values)
+    out = np.full(len(values), TS_NULL, dtype=np.int64)
+    fast = [i for i, v in enumerate(values)
+            if isinstance(v, str) and v.endswith('Z') and 'T' in v]
+    if fast:
+        try:
+            parsed = np.array([values[i][:-1] for i in fast], dtype='datetime64[us]')
+            out[fast] = parsed.astype(np.int64)
+        except ValueError:
+            fast = []  # some string NumPy can't read: parse everything the slow way
+    done = set(fast)
+    for i, value in enumerate(values):
+        if i not in done and value is not None:
+            out[i] = to_epoch_us(value)
+    return out
+
+
+def to_iso(ts):
+    """Epoch-µs int (or array) back to ISO 8601 UTC strings ('...Z'); None for TS_NULL."""
+    if np.ndim(ts) == 0:
+        if int(ts) == TS_NULL:
+            return None
+        return str(np.datetime64(int(ts), 'us')) + 'Z'
+    return [to_iso(t) for t in np.asarray(ts)]
+
+
+def now_us():
+    return to_epoch_us(datetime.now(timezone.utc))
+
+
+# ============================================================================
+# Windows
+# ============================================================================
+
+def window_mask(ts, start=None, end=None):
+    """
+    Rows with start <= ts < end.
+
+    Args:
+        ts: int64 epoch-µs array
+        start, end: Bounds as datetime, ISO string or epoch-µs int (None = open)
+
+    Returns:
+        Boolean array; TS_NULL rows are always False
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    mask = ts != TS_NULL
+    if start is not None:
+        mask &= ts >= to_epoch_us(start)
+    if end is not None:
+        mask &= ts < to_epoch_us(end)
+    return mask
+
+
+def within_hours(ts, hours, now=None):
+    """
+    Vectorized is_within_hours(): rows from the last `hours` hours.
+
+    Args:
+        ts: int64 epoch-µs array
+        hours: Window length
+        now: End of the window (default: the current time, read once)
+    """
+    end = now_us() if now is None else to_epoch_us(now)
+    return window_mask(ts, end - int(hours * 3600 * _US), None)
+
+
+# ============================================================================
+# Ordering within groups (e.g. the replies of each post)
+# ============================================================================
+
+def time_order(ts, groups=None):
+    """
+    Stable sort order by (group, time), with TS_NULL rows last in each group.
+
+    Rows with equal timestamps keep their original order.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    missing = ts == TS_NULL
+    keys = [ts, missing]
+    if groups is not None:
+        keys.append(np.asarray(groups))
+    # lexsort sorts by the last key first, and is stable
+    return np.lexsort(keys)
+
+
+def group_rank(ts, groups):
+    """
+    0-based chronological rank of every row within its group.
+
+    Args:
+        ts: int64 epoch-µs array
+        groups: Array of group ids of the same length (e.g. post index)
+
+    Returns:
+        (rank, size): int64 arrays, size = number of rows in the row's group
+    """
+    groups = np.asarray(groups)
+    n = len(groups)
+    rank = np.empty(n, dtype=np.int64)
+    size = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return rank, size
+    order = time_order(ts, groups)
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    position = np.arange(n) - np.repeat(starts, counts)
+    rank[order] = position
+    size[order] = np.repeat(counts, counts)
+    return rank, size
+
+
+def quantile_bins(ts, groups, n_bins=4):
+    """
+    Bin index (0..n_bins-1) of every row by its relative time within its group.
+
+    Row k of n (chronologically) falls in bin floor((k + 0.5) / n * n_bins),
+    so each group is split into n_bins equal-count time slices.
+    """
+    rank, size = group_rank(ts, groups)
+    bins = ((2 * rank + 1) * n_bins) // (2 * np.maximum(size, 1))
+    return np.minimum(bins, n_bins - 1)
+
+
+def group_quantiles(ts, groups, q):
+    """
+    Per-group quantiles of the timestamps (e.g. the median reply time of each post).
+
+    Args:
+        ts: int64 epoch-µs array
+        groups: Group id per row
+        q: Quantile or sequence of quantiles in [0, 1]
+
+    Returns:
+        (group_ids, values): the sorted unique groups, and an int64 array of
+        shape (len(group_ids), len(q)) (lower interpolation; TS_NULL for a
+        group with no timestamps)
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    groups = np.asarray(groups)
+    q = np.atleast_1d(np.asarray(q, dtype=float))
+    valid = ts != TS_NULL
+    group_ids = np.unique(groups)
+    values = np.full((len(group_ids), len(q)), TS_NULL, dtype=np.int64)
+    if not valid.any():
+        return group_ids, values
+
+    order = time_order(ts[valid], groups[valid])
+    sorted_ts = ts[valid][order]
+    sorted_groups = groups[valid][order]
+    present, starts, counts = np.unique(sorted_groups, return_index=True, return_counts=True)
+    # index of the q-quantile inside each group's sorted slice
+    offsets = np.floor(q[None, :] * (counts[:, None] - 1)).astype(np.int64)
+    values[np.searchsorted(group_ids, present)] = sorted_ts[starts[:, None] + offsets]
+    return group_ids, values
+
+
+def elapsed_seconds(ts, reference):
+    """Seconds from reference (same shape or scalar, epoch µs) to ts; NaN where missing."""
+    ts = np.asarray(ts, dtype=np.int64)
+    reference = np.asarray(reference, dtype=np.int64)
+    out = (ts - reference) / _US
+    return np.where((ts == TS_NULL) | (reference == TS_NULL), np.nan, out)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Per-account high-water marks for incremental (repeated) crawls.
+
+A collector that runs every day doesn't need to re-read an account's whole
+time window: everything up to the newest post it saw last time is already
+in the dataset. WatermarkStore remembers, per account:
+
+    newest_createdAt, newest_uri   newest post collected so far
+    cursor                         last pagination cursor of an unfinished
+                                   crawl (None once the account is done)
+    updated_at                     when the mark last changed
+    posts                          uri -> [createdAt, replyCount] of the posts
+                                   still inside the crawl window, so a rerun
+                                   can tell which threads gained replies
+
+    marks = WatermarkStore('reply_watermarks.json')
+    since = marks.since(handle)            # datetime, or None on a first run
+    for items, cursor in iter_author_feed_pages(handle, since=since):
+        ...
+        marks.set_cursor(handle, cursor)
+    marks.advance(handle, newest_post_createdAt, newest_post_uri)
+
+The file is small JSON, rewritten atomically after every change, so an
+interrupted crawl never leaves a half-written store behind.
+
+Dependencies: Only uses standard library (no pip install required)
+"""
+
+import json
+import os
+import threading
+import time
+
+from bluesky_helpers import parse_datetime
+
+
+class WatermarkStore:
+    """
+    JSON file of account -> high-water mark.
+
+    Args:
+        path: State file (created on the first update)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._marks = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self._marks = json.load(f)
+
+    def __contains__(self, account):
+        return account in self._marks
+
+    def __len__(self):
+        return len(self._marks)
+
+    def get(self, account):
+        """The account's mark as a dict, or None if it was never collected."""
+        with self._lock:
+            mark = self._marks.get(account)
+            return dict(mark) if mark else None
+
+    def since(self, account):
+        """createdAt of the newest collected post as a datetime, or None."""
+        mark = self.get(account)
+        if not mark or not mark.get('newest_createdAt'):
+            return None
+        return parse_datetime(mark['newest_createdAt'])
+
+    def advance(self, account, created_at, uri=None):
+        """
+        Move the mark forward to a newer post (older posts are ignored).
+
+        Args:
+            account: Handle
+            created_at: createdAt string of the newest post collected
+            uri: That post's URI
+
+        Returns:
+            True if the mark moved
+        """
+        if not created_at:
+            return False
+        with self._lock:
+            mark = self._marks.setdefault(account, {'newest_createdAt': None,
+                                                    'newest_uri': None, 'cursor': None})
+            current = mark.get('newest_createdAt')
+            if current and parse_datetime(current) >= parse_datetime(created_at):
+                return False
+            mark['newest_createdAt'] = created_at
+            mark['newest_uri'] = uri
+            mark['updated_at'] = time.time()
+            self._save()
+        return True
+
+    def set_cursor(self, account, cursor):
+        """Remember where an unfinished crawl of account stopped (None when done)."""
+        with self._lock:
+            mark = self._marks.setdefault(account, {'newest_createdAt': None,
+                                                    'newest_uri': None, 'cursor': None})
+            if mark.get('cursor') == cursor:
+                return
+            mark['cursor'] = cursor
+            mark['updated_at'] = time.time()
+            self._save()
+
+    def known_posts(self, account):
+        """
+        Posts remembered for account.
+
+        Returns:
+            Dict of uri -> (createdAt, replyCount when last collected)
+        """
+        with self._lock:
+            posts = (self._marks.get(account) or {}).get('posts') or {}
+            return {uri: tuple(value) for uri, value in posts.items()}
+
+    def remember_posts(self, account, posts, window_start=None):
+        """
+        Record the reply counts the dataset now reflects.
+
+        Args:
+            account: Handle
+            posts: Iterable of (uri, createdAt, replyCount)
+            window_start: Forget posts created before this datetime; they
+                have left the crawl window and won't be refreshed again
+        """
+        with self._lock:
+            mark = self._marks.setdefault(account, {'newest_createdAt': None,
+                                                    'newest_uri': None, 'cursor': None})
+            known = mark.setdefault('posts', {})
+            for uri, created_at, reply_count in posts:
+                known[uri] = [created_at, reply_count]
+            if window_start is not None:
+                for uri in [u for u, (created_at, _) in known.items()
+                            if not created_at or parse_datetime(created_at) < window_start]:
+                    del known[uri]
+            mark['updated_at'] = time.time()
+            self._save()
+
+    def merge(self, other, accounts=None):
+        """
+        Take over marks from another store, e.g. a shard worker's (bluesky_shard.py).
+
+        Args:
+            other: WatermarkStore (or its path)
+            accounts: Only merge these accounts (default: all of other's)
+
+        Returns:
+            Number of marks taken over. A mark replaces ours only if it was
+            updated more recently, so merging shards in any order gives the
+            same store.
+        """
+        if not isinstance(other, WatermarkStore):
+            other = WatermarkStore(other)
+        taken = 0
+        with self._lock:
+            for account in sorted(other._marks if accounts is None else accounts):
+                theirs = other.get(account)
+                if theirs is None:
+                    continue
+                ours = self._marks.get(account)
+                if ours is None or theirs.get('updated_at', 0) > ours.get('updated_at', 0):
+                    self._marks[account] = theirs
+                    taken += 1
+            if taken:
+                self._save()
+        return taken
+
+    def reset(self, account=None):
+        """Forget one account's mark (or all of them) to force a full re-crawl."""
+        with self._lock:
+            if account is None:
+                self._marks = {}
+            else:
+                self._marks.pop(account, None)
+            self._save()
+
+    def _save(self):
+        # Caller holds the lock
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._marks, f, indent=2)
+        os.replace(tmp, self.path)